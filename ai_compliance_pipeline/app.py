@@ -1,125 +1,526 @@
-from fastapi import FastAPI
-from fastapi.responses import HTMLResponse
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import FileResponse, HTMLResponse, PlainTextResponse, RedirectResponse, Response, StreamingResponse
 from fastapi.staticfiles import StaticFiles
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from html import escape
 from pathlib import Path
-import os, json
-from azure.storage.blob import BlobServiceClient
+import asyncio, hashlib, os, json, sys, time, uuid
+from typing import Any, Dict, Optional
+from urllib.parse import urlencode
 
-app = FastAPI(title="AI Compliance Pipeline Viewer")
+# The app is served as ai_compliance_pipeline.app from the repo root, while the
+# pipeline package is imported top-level (as main.py does).
+if str(Path(__file__).parent) not in sys.path:
+    sys.path.insert(0, str(Path(__file__).parent))
+from pipeline.bundle import BUNDLE_FILENAME, RunBundle, archive_path
+from pipeline.catalog import RunCatalog
+from pipeline.jobs import STATUSES as JOB_STATUSES, JobQueue
+from pipeline.storage import content_type_for
+
+
+@asynccontextmanager
+async def _lifespan(app):
+    yield
+    if _async_blob_service is not None:
+        await _async_blob_service.close()
+
+
+app = FastAPI(title="AI Compliance Pipeline Viewer", lifespan=_lifespan)
 
 
 base = Path(__file__).parent / "artifacts" / "runs"
+archive_dir = Path(__file__).parent / "artifacts" / "archive"
 
 
 AZURE_CONN_STR = os.getenv("AZURE_STORAGE_CONNECTION_STRING")
 AZURE_CONTAINER = "artifacts"
 blob_service = None
 if AZURE_CONN_STR:
+    from azure.storage.blob import BlobServiceClient
+
     blob_service = BlobServiceClient.from_connection_string(AZURE_CONN_STR)
 
+_async_blob_service = None
+
+
+def _async_container():
+    """Container client of the async Blob SDK, created on first use inside the event loop."""
+    global _async_blob_service
+    if _async_blob_service is None:
+        from azure.storage.blob.aio import BlobServiceClient as AsyncBlobServiceClient
+
+        _async_blob_service = AsyncBlobServiceClient.from_connection_string(AZURE_CONN_STR)
+    return _async_blob_service.get_container_client(AZURE_CONTAINER)
+
+
+model_download_dir = Path(__file__).parent / "artifacts" / "model_cache"
+MODEL_FILES = ["model.lrm", "model.joblib", "encoder.json"]
+_batcher = None
+
+
+def _download_bundle(container, run_id: str) -> Optional[RunBundle]:
+    """A run's bundle from Blob Storage, downloaded once into the model cache directory."""
+    from azure.core.exceptions import ResourceNotFoundError
+
+    target = model_download_dir / run_id / BUNDLE_FILENAME
+    if not target.exists():
+        target.parent.mkdir(parents=True, exist_ok=True)
+        tmp = target.with_name(f".{target.name}.{uuid.uuid4().hex}.part")
+        try:
+            with tmp.open("wb") as f:
+                container.get_blob_client(f"runs/{run_id}/{BUNDLE_FILENAME}").download_blob().readinto(f)
+        except ResourceNotFoundError:
+            tmp.unlink(missing_ok=True)
+            return None
+        os.replace(tmp, target)
+    return RunBundle(target)
+
+
+def _extract_model(bundle: RunBundle, local_dir: Path) -> Path:
+    bundle.extract(local_dir, [n for n in MODEL_FILES if n in bundle.members and not (local_dir / n).exists()])
+    return local_dir
+
+
+def _load_model(run_id: str):
+    """Load a run's model + encoder from local artifacts, an archived bundle or Blob Storage."""
+    from pipeline.serving import load_run_model
+
+    local_dir = model_download_dir / run_id
+    if not blob_service:
+        archived = archive_path(archive_dir, run_id)
+        if not (base / run_id).exists() and archived.exists():
+            return load_run_model(_extract_model(RunBundle(archived), local_dir), run_id)
+        return load_run_model(base / run_id, run_id)
+    local_dir.mkdir(parents=True, exist_ok=True)
+    container = blob_service.get_container_client(AZURE_CONTAINER)
+    bundle = _download_bundle(container, run_id)
+    if bundle is not None:
+        return load_run_model(_extract_model(bundle, local_dir), run_id)
+    from azure.core.exceptions import ResourceNotFoundError
+
+    for fname in ["model.joblib", "encoder.json"]:
+        target = local_dir / fname
+        if not target.exists():
+            tmp = target.with_suffix(target.suffix + ".part")
+            try:
+                with tmp.open("wb") as f:
+                    container.get_blob_client(f"runs/{run_id}/{fname}").download_blob().readinto(f)
+            except ResourceNotFoundError:
+                tmp.unlink(missing_ok=True)
+                raise FileNotFoundError(f"Run {run_id} has no {fname}") from None
+            os.replace(tmp, target)
+    return load_run_model(local_dir, run_id)
+
+
+def _get_batcher():
+    """Build the scoring stack on first use; pandas/sklearn are not needed to browse runs."""
+    global _batcher
+    if _batcher is None:
+        from pipeline.serving import ModelCache, MicroBatcher
+
+        model_cache = ModelCache(int(os.getenv("MODEL_CACHE_MB", "512")) * 1024 * 1024)
+        _batcher = MicroBatcher(model_cache, _load_model)
+    return _batcher
+
+catalog = RunCatalog(Path(__file__).parent / "artifacts" / "catalog.sqlite")
+jobs = JobQueue(Path(os.getenv("JOB_QUEUE", Path(__file__).parent / "artifacts" / "jobs.sqlite")))
+run_log = Path(__file__).parent / "artifacts" / "run_log"
+CATALOG_SYNC_SECONDS = float(os.getenv("CATALOG_SYNC_SECONDS", "60"))
+_last_catalog_sync = float("-inf")
+LIST_CHUNK_ROWS = 100  # rows per streamed chunk of the /runs table
+RUN_CACHE_SECONDS = float(os.getenv("RUN_CACHE_SECONDS", "30"))
+RUN_CACHE_MAX = 1024
+ARTIFACT_NAMES = [
+    "metadata.json",
+    "dataset_card.md",
+    "model_card.md",
+    "run_report.md",
+    "compliance_findings.json",
+    "compliance_summary.txt",
+    "model.joblib",
+    "model.lrm",
+    BUNDLE_FILENAME,
+]
+_run_cache: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+_bundle_etags: Dict[str, str] = {}  # run id -> ETag of the bundle blob downloaded for it
+
+
+def _sync_catalog():
+    """Keep the catalog current without rescanning every run on each request.
+
+    Locally, main.py and run_compliance_check.py update the catalog as they
+    write metadata, so it is only rebuilt from the run log when empty. In
+    blob mode, at most once per CATALOG_SYNC_SECONDS, only the run prefixes
+    are listed and metadata is downloaded for runs not yet catalogued.
+    """
+    global _last_catalog_sync
+    now = time.monotonic()
+    if now - _last_catalog_sync < CATALOG_SYNC_SECONDS:
+        return
+    _last_catalog_sync = now
+    if not blob_service:
+        if catalog.count() == 0:
+            catalog.rebuild_from_log(run_log)
+        return
+    container = blob_service.get_container_client(AZURE_CONTAINER)
+    known = catalog.run_ids()
+    new_records = []
+    for prefix in container.walk_blobs(name_starts_with="runs/", delimiter="/"):
+        parts = prefix.name.split("/")
+        run_id = parts[1] if len(parts) > 1 else ""
+        if not run_id or run_id in known:
+            continue
+        try:
+            meta_blob = container.get_blob_client(f"runs/{run_id}/metadata.json")
+            new_records.append(json.loads(meta_blob.download_blob().readall()))
+        except Exception:
+            # Runs uploaded as a single bundle carry their metadata inside it.
+            try:
+                bundle = _download_bundle(container, run_id)
+                if bundle is not None:
+                    new_records.append(json.loads(bundle.read("metadata.json")))
+            except Exception:
+                pass
+    catalog.upsert_many(new_records)
+
 
 @app.get("/", response_class=HTMLResponse)
 async def home():
-    return '<h2>Go to <a href="/runs">/runs</a> to view pipeline runs</h2>'
+    return '<h2>Go to <a href="/runs">/runs</a> to view pipeline runs, <a href="/jobs">/jobs</a> for the worker queue</h2>'
 
 
 @app.get("/runs", response_class=HTMLResponse)
-async def list_runs():
-    """List all runs either from Blob Storage or local artifacts."""
-    rows = []
+async def list_runs(
+    page: int = 1,
+    per_page: int = 50,
+    sort: str = "timestamp",
+    order: str = "desc",
+    status: Optional[str] = None,
+    dataset: Optional[str] = None,
+    min_accuracy: Optional[float] = None,
+):
+    """List runs from the SQLite catalog: paginated, sortable and filterable."""
+    await asyncio.to_thread(_sync_catalog)
+    page = max(page, 1)
+    per_page = min(max(per_page, 1), 500)
+    try:
+        runs, total = await asyncio.to_thread(
+            catalog.query,
+            limit=per_page,
+            offset=(page - 1) * per_page,
+            sort=sort,
+            descending=order != "asc",
+            status=status,
+            dataset_sha256=dataset,
+            min_accuracy=min_accuracy,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    params = {k: v for k, v in {"per_page": per_page, "sort": sort, "order": order, "status": status,
+                                "dataset": dataset, "min_accuracy": min_accuracy}.items() if v is not None}
+    pager = f"<p>{total} runs, page {page} of {max((total + per_page - 1) // per_page, 1)} "
+    if page > 1:
+        pager += f"<a href='/runs?{urlencode({**params, 'page': page - 1})}'>prev</a> "
+    if page * per_page < total:
+        pager += f"<a href='/runs?{urlencode({**params, 'page': page + 1})}'>next</a>"
+    pager += "</p>"
+
+    async def body():
+        yield pager
+        yield "<table border=1><tr><th>Run ID</th><th>Time</th><th>Accuracy</th><th>Compliance</th><th>Link</th></tr>"
+        for i in range(0, len(runs), LIST_CHUNK_ROWS):
+            yield "".join(
+                f"<tr><td>{r['run_id']}</td>"
+                f"<td>{r['timestamp_utc']}</td>"
+                f"<td>{r['accuracy'] if r['accuracy'] is not None else '-'}</td>"
+                f"<td>{r['compliance_status'] or '-'}</td>"
+                f"<td><a href='/runs/{r['run_id']}'>View</a></td></tr>"
+                for r in runs[i:i + LIST_CHUNK_ROWS]
+            )
+        yield "</table>"
+
+    return StreamingResponse(body(), media_type="text/html; charset=utf-8")
+
+
+@app.get("/jobs", response_class=HTMLResponse)
+async def list_jobs(status: Optional[str] = None, limit: int = 100):
+    """Queued, running and finished jobs of the resident worker (main.py --worker)."""
+    try:
+        rows = await asyncio.to_thread(jobs.list, status, min(max(limit, 1), 1000))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    counts = await asyncio.to_thread(jobs.counts)
+    html = "<h2>Jobs</h2><p>" + " | ".join(
+        f"<a href='/jobs?status={s}'>{s}</a>: {counts[s]}" for s in JOB_STATUSES) + " | <a href='/jobs'>all</a></p>"
+    html += ("<table border=1><tr><th>Job</th><th>Status</th><th>Dataset</th><th>Config</th><th>Submitted</th>"
+             "<th>Started</th><th>Finished</th><th>Seconds</th><th>Run</th><th>Verdict</th><th>Error</th></tr>")
+    for j in rows:
+        run = f"<a href='/runs/{j['run_id']}'>{j['run_id']}</a>" if j["run_id"] and j["status"] == "done" else (j["run_id"] or "-")
+        html += (f"<tr><td>{j['id']}</td><td>{j['status']}</td><td>{escape(j['dataset'])}</td>"
+                 f"<td>{escape(json.dumps(j['config']))}</td><td>{j['submitted_utc']}</td>"
+                 f"<td>{j['started_utc'] or '-'}</td><td>{j['finished_utc'] or '-'}</td>"
+                 f"<td>{j['seconds'] if j['seconds'] is not None else '-'}</td><td>{run}</td>"
+                 f"<td>{j['verdict'] or '-'}</td><td>{escape(j['error'] or '')}</td></tr>")
+    return html + "</table>"
+
+
+def _profile_html(meta: dict) -> str:
+    """Per-stage wall/CPU/memory table from the run's recorded profile."""
+    spans = (meta.get("profile") or {}).get("spans")
+    if not spans:
+        return ""
+    rows = "".join(
+        f"<tr><td>{s['name']}</td><td>{s['wall_s']}</td><td>{s.get('cpu_s', '-')}</td>"
+        f"<td>{s.get('peak_rss_mb', '-')}</td><td>{s.get('tracemalloc_peak_mb', '-')}</td></tr>"
+        for s in spans
+    )
+    return (
+        "<h3>Profile:</h3><table border=1><tr><th>Span</th><th>Wall (s)</th><th>CPU (s)</th>"
+        "<th>Peak RSS (MB)</th><th>tracemalloc peak (MB)</th></tr>" + rows + "</table>"
+    )
+
+
+def _label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Aggregated run profiles and run counts in Prometheus text format."""
+    await asyncio.to_thread(_sync_catalog)
+    aggregates = await asyncio.to_thread(catalog.span_aggregates)
+    statuses = await asyncio.to_thread(catalog.status_counts)
+    lines = [
+        "# HELP pipeline_runs Runs in the catalog by compliance status.",
+        "# TYPE pipeline_runs gauge",
+        *(f'pipeline_runs{{status="{_label(k)}"}} {v}' for k, v in sorted(statuses.items())),
+        "# HELP pipeline_span_wall_seconds Wall time of profiled pipeline spans across runs.",
+        "# TYPE pipeline_span_wall_seconds summary",
+    ]
+    for a in aggregates:
+        span = _label(a["span"])
+        lines.append(f'pipeline_span_wall_seconds_sum{{span="{span}"}} {a["wall_sum"] or 0}')
+        lines.append(f'pipeline_span_wall_seconds_count{{span="{span}"}} {a["count"]}')
+    gauges = [
+        ("pipeline_span_max_wall_seconds", "Longest wall time of a span in any run.", "wall_max", 1),
+        ("pipeline_span_cpu_seconds_total", "CPU time of spans summed over runs.", "cpu_sum", 1),
+        ("pipeline_span_peak_rss_bytes_max", "Highest peak RSS observed during a span.", "rss_max", 1024 * 1024),
+        ("pipeline_span_tracemalloc_peak_bytes_max", "Highest tracemalloc peak during a span.", "tracemalloc_max", 1024 * 1024),
+    ]
+    for name, help_text, column, scale in gauges:
+        kind = "counter" if name.endswith("_total") else "gauge"
+        lines += [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+        for a in aggregates:
+            if a[column] is not None:
+                lines.append(f'{name}{{span="{_label(a["span"])}"}} {round(a[column] * scale, 4) if scale == 1 else int(a[column] * scale)}')
+    return "\n".join(lines) + "\n"
+
+
+async def _open_bundle(run_id: str, entry: Dict[str, Any]) -> RunBundle:
+    """The run's bundle as a local file; in blob mode it is downloaded again only when its ETag changes."""
+    if not blob_service:
+        return await asyncio.to_thread(RunBundle, entry["path"])
+    path = model_download_dir / run_id / BUNDLE_FILENAME
+    if _bundle_etags.get(run_id) != entry["etag"] or not path.exists():
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f".{path.name}.{uuid.uuid4().hex}.part")
+        stream = await _async_container().get_blob_client(f"runs/{run_id}/{BUNDLE_FILENAME}").download_blob()
+        with tmp.open("wb") as f:
+            await stream.readinto(f)
+        os.replace(tmp, path)
+        _bundle_etags[run_id] = entry["etag"]
+    return await asyncio.to_thread(RunBundle, path)
+
+
+async def _list_artifacts(run_id: str) -> Dict[str, Dict[str, Any]]:
+    """{file name: {"etag", "last_modified"}} of a run, from one directory or prefix listing.
+
+    Runs stored only as a bundle (uploaded that way, or archived locally)
+    list the bundle's members instead, marked with the open ``bundle``.
+    """
+    found = {}
     if blob_service:
-        container = blob_service.get_container_client(AZURE_CONTAINER)
-        blobs = container.list_blobs()
-        seen = set()
-        for b in blobs:
-            parts = b.name.split("/")
-            if len(parts) >= 2 and parts[0] == "runs":
-                run_id = parts[1]
-                if run_id not in seen:
-                    seen.add(run_id)
-                    meta_blob = container.get_blob_client(f"runs/{run_id}/metadata.json")
-                    try:
-                        meta = json.loads(meta_blob.download_blob().readall())
-                        rows.append(
-                            f"<tr><td>{meta['run_id']}</td>"
-                            f"<td>{meta['timestamp_utc']}</td>"
-                            f"<td>{meta.get('model',{}).get('metrics',{}).get('value','-')}</td>"
-                            f"<td>{meta.get('compliance',{}).get('status','-')}</td>"
-                            f"<td><a href='/runs/{meta['run_id']}'>View</a></td></tr>"
-                        )
-                    except Exception:
-                        pass
+        prefix = f"runs/{run_id}/"
+        async for blob in _async_container().list_blobs(name_starts_with=prefix):
+            found[blob.name[len(prefix):]] = {"etag": blob.etag, "last_modified": blob.last_modified}
     else:
-        for run_dir in sorted(base.iterdir(), reverse=True):
-            meta_path = run_dir / "metadata.json"
-            if meta_path.exists():
-                meta = json.loads(meta_path.read_text())
-                rows.append(
-                    f"<tr><td>{meta['run_id']}</td>"
-                    f"<td>{meta['timestamp_utc']}</td>"
-                    f"<td>{meta.get('model',{}).get('metrics',{}).get('value','-')}</td>"
-                    f"<td>{meta.get('compliance',{}).get('status','-')}</td>"
-                    f"<td><a href='/runs/{meta['run_id']}'>View</a></td></tr>"
-                )
-
-    table = (
-        "<table border=1><tr><th>Run ID</th><th>Time</th><th>Accuracy</th><th>Compliance</th><th>Link</th></tr>"
-    )
-    table += "".join(rows) + "</table>"
-    return table
+        def stat_entry(path: Path, st) -> Dict[str, Any]:
+            return {"etag": f"{st.st_mtime_ns:x}-{st.st_size:x}", "path": path,
+                    "last_modified": datetime.fromtimestamp(st.st_mtime, timezone.utc)}
+
+        def scan():
+            try:
+                with os.scandir(base / run_id) as entries:
+                    for entry in entries:
+                        if entry.is_file():
+                            found[entry.name] = stat_entry(Path(entry.path), entry.stat())
+            except (FileNotFoundError, NotADirectoryError):
+                archived = archive_path(archive_dir, run_id)
+                if archived.exists():
+                    found[BUNDLE_FILENAME] = {**stat_entry(archived, archived.stat()), "archived": True}
+            return found
+
+        await asyncio.to_thread(scan)
+    if "metadata.json" not in found and BUNDLE_FILENAME in found:
+        entry = found[BUNDLE_FILENAME]
+        bundle = await _open_bundle(run_id, entry)
+        for name, member in bundle.members.items():
+            found.setdefault(name, {"etag": member["sha256"][:32], "last_modified": entry["last_modified"],
+                                    "bundle": bundle})
+    return found
+
+
+async def _read_metadata(run_id: str, entry: Dict[str, Any]) -> Dict[str, Any]:
+    if "bundle" in entry:
+        return json.loads(await asyncio.to_thread(entry["bundle"].read, "metadata.json"))
+    if blob_service:
+        blob = _async_container().get_blob_client(f"runs/{run_id}/metadata.json")
+        return json.loads(await (await blob.download_blob()).readall())
+    return json.loads(await asyncio.to_thread((base / run_id / "metadata.json").read_text))
+
+
+async def _run_info(run_id: str) -> Optional[Dict[str, Any]]:
+    """Metadata and artefact listing of a run, cached for RUN_CACHE_SECONDS.
+
+    Within the TTL no storage is touched at all. After it, the run is listed
+    again (one round trip) and metadata.json is only re-read when its ETag
+    changed. The entry's ``etag`` covers metadata and the artefact set, so
+    it doubles as the HTTP validator of the detail page.
+    """
+    cached = _run_cache.get(run_id)
+    if cached and time.monotonic() - cached["fetched"] < RUN_CACHE_SECONDS:
+        _run_cache.move_to_end(run_id)
+        return cached
+    files = await _list_artifacts(run_id)
+    if "metadata.json" not in files:
+        _run_cache.pop(run_id, None)
+        return None
+    meta_etag = files["metadata.json"]["etag"]
+    meta = cached["meta"] if cached and cached["meta_etag"] == meta_etag else await _read_metadata(run_id, files["metadata.json"])
+    names = sorted(files)
+    digest = hashlib.sha256(json.dumps([meta_etag, names]).encode()).hexdigest()[:32]
+    entry = {
+        "meta": meta,
+        "meta_etag": meta_etag,
+        "files": names,
+        "entries": files,
+        "etag": f'"{digest}"',
+        "last_modified": max(f["last_modified"] for f in files.values()),
+        "fetched": time.monotonic(),
+    }
+    _run_cache[run_id] = entry
+    _run_cache.move_to_end(run_id)
+    while len(_run_cache) > RUN_CACHE_MAX:
+        _run_cache.popitem(last=False)
+    return entry
+
+
+def _not_modified(request: Request, etag: str, last_modified: datetime) -> bool:
+    """Evaluate If-None-Match (preferred) or If-Modified-Since against a resource's validators."""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        tags = [t.strip().removeprefix("W/") for t in if_none_match.split(",")]
+        return "*" in tags or etag in tags
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=timezone.utc)
+        return last_modified.replace(microsecond=0) <= since
+    return False
 
 
 @app.get("/runs/{run_id}", response_class=HTMLResponse)
-async def run_detail(run_id: str):
+async def run_detail(run_id: str, request: Request):
     """Show details + artefact links for a specific run."""
-    if blob_service:
-        container = blob_service.get_container_client(AZURE_CONTAINER)
-        meta_blob = container.get_blob_client(f"runs/{run_id}/metadata.json")
-        if not meta_blob.exists():
-            return f"<p>No run {run_id} found in Blob.</p>"
-        meta = json.loads(meta_blob.download_blob().readall())
-        links = []
-        for fname in [
-            "metadata.json",
-            "dataset_card.md",
-            "model_card.md",
-            "run_report.md",
-            "compliance_findings.json",
-            "compliance_summary.txt",
-            "model.joblib",
-        ]:
-            blob = container.get_blob_client(f"runs/{run_id}/{fname}")
-            if blob.exists():
-                url = blob.url
-                links.append(f"<li><a href='{url}'>{fname}</a></li>")
-        html = f"<h2>Run {run_id}</h2>"
-        html += f"<p><b>Timestamp:</b> {meta['timestamp_utc']}</p>"
-        html += f"<p><b>Compliance:</b> {meta.get('compliance',{}).get('status','-')}</p>"
-        html += "<h3>Artefacts:</h3><ul>" + "".join(links) + "</ul>"
-        return html
-    else:
-        run_dir = base / run_id
-        if not run_dir.exists():
-            return f"<p>No run {run_id} found locally.</p>"
-        meta = json.loads((run_dir / "metadata.json").read_text())
-        links = []
-        for file in [
-            "metadata.json",
-            "dataset_card.md",
-            "model_card.md",
-            "run_report.md",
-            "compliance_findings.json",
-            "compliance_summary.txt",
-            "model.joblib",
-        ]:
-            if (run_dir / file).exists():
-                links.append(f"<li><a href='/static/{run_id}/{file}'>{file}</a></li>")
-        html = f"<h2>Run {run_id}</h2>"
-        html += f"<p><b>Timestamp:</b> {meta['timestamp_utc']}</p>"
-        html += f"<p><b>Compliance:</b> {meta.get('compliance',{}).get('status','-')}</p>"
-        html += "<h3>Artefacts:</h3><ul>" + "".join(links) + "</ul>"
-        return html
+    where = "Blob" if blob_service else "locally"
+    if "/" in run_id or ".." in run_id:
+        return HTMLResponse(f"<p>No run {run_id} found {where}.</p>")
+    info = await _run_info(run_id)
+    if info is None:
+        return HTMLResponse(f"<p>No run {run_id} found {where}.</p>")
+    # Browsers and proxies must revalidate, and get a 304 while the run is unchanged.
+    headers = {
+        "ETag": info["etag"],
+        "Last-Modified": format_datetime(info["last_modified"].astimezone(timezone.utc), usegmt=True),
+        "Cache-Control": "no-cache",
+    }
+    if _not_modified(request, info["etag"], info["last_modified"]):
+        return Response(status_code=304, headers=headers)
+
+    meta = info["meta"]
+    links = []
+    for fname in ARTIFACT_NAMES:
+        if fname not in info["files"]:
+            continue
+        entry = info["entries"][fname]
+        if "bundle" in entry or entry.get("archived"):
+            url = f"/runs/{run_id}/files/{fname}"
+        elif blob_service:
+            url = _async_container().get_blob_client(f"runs/{run_id}/{fname}").url
+        else:
+            url = f"/static/{run_id}/{fname}"
+        links.append(f"<li><a href='{url}'>{fname}</a></li>")
+    html = f"<h2>Run {run_id}</h2>"
+    html += f"<p><b>Timestamp:</b> {meta['timestamp_utc']}</p>"
+    html += f"<p><b>Compliance:</b> {meta.get('compliance',{}).get('status','-')}</p>"
+    html += _profile_html(meta)
+    html += "<h3>Artefacts:</h3><ul>" + "".join(links) + "</ul>"
+    return HTMLResponse(html, headers=headers)
+
+
+@app.get("/runs/{run_id}/files/{name}")
+async def run_file(run_id: str, name: str, request: Request):
+    """One artefact of a run, read straight out of the run's bundle when it is not stored on its own."""
+    if "/" in run_id or ".." in run_id or "/" in name or name.startswith("."):
+        raise HTTPException(status_code=404, detail="Not found")
+    info = await _run_info(run_id)
+    entry = info["entries"].get(name) if info else None
+    if entry is None:
+        raise HTTPException(status_code=404, detail=f"No {name} in run {run_id}")
+    if "bundle" not in entry:
+        if "path" in entry:
+            return FileResponse(entry["path"], media_type=content_type_for(name))
+        if name == BUNDLE_FILENAME:
+            return FileResponse((await _open_bundle(run_id, entry)).path, media_type=content_type_for(name))
+        return RedirectResponse(_async_container().get_blob_client(f"runs/{run_id}/{name}").url)
+    etag = f'"{entry["etag"]}"'
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if _not_modified(request, etag, entry["last_modified"]):
+        return Response(status_code=304, headers=headers)
+    try:
+        data = await asyncio.to_thread(entry["bundle"].read, name)
+    except ValueError as e:  # member does not match its manifest hash
+        raise HTTPException(status_code=500, detail=str(e))
+    return Response(data, media_type=content_type_for(name), headers=headers)
+
+
+@app.post("/runs/{run_id}/predict")
+async def predict(run_id: str, request: Request):
+    """Score a batch of bank-schema rows (see pipeline.serving.parse_rows for the accepted bodies)."""
+    from pipeline.serving import parse_rows
 
+    if "/" in run_id or ".." in run_id:
+        raise HTTPException(status_code=400, detail="Invalid run id")
+    try:
+        df = parse_rows(await request.body(), request.headers.get("content-type", ""))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Could not parse rows: {e}")
+    if df.empty:
+        return {"run_id": run_id, "probabilities": []}
+    try:
+        probs = await _get_batcher().submit(run_id, df)
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail=f"No model for run {run_id}")
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    return {"run_id": run_id, "probabilities": [float(p) for p in probs]}
 
 
 if not blob_service:
@@ -0,0 +1,258 @@
+"""End-to-end benchmark of the pipeline functions on synthetic bank datasets.
+
+    python benchmark.py --scales 100000,1000000 --repeat 3
+    python benchmark.py --compare artifacts/benchmarks/<earlier>.json
+
+Each scale gets a generated dataset (reused from --data-dir when present).
+Every function is timed ``--repeat`` times with wall/CPU time and peak RSS.
+Results go to artifacts/benchmarks/bench_<timestamp>_<commit>.json.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import warnings
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from pipeline.profiling import Profiler
+from pipeline.synthetic import dataset_name, generate_csv
+
+ROOT = Path(__file__).parent.resolve()
+FUNCTIONS = [
+    "sha256_of_file", "load_csv", "load_csv_fingerprinted", "basic_clean",
+    "prepare_features", "train_logreg", "evaluate", "run_checks", "runs_endpoint",
+]
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def environment() -> Dict[str, Any]:
+    import numpy, pandas, scipy, sklearn
+
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "packages": {m.__name__: m.__version__ for m in (numpy, pandas, scipy, sklearn)},
+    }
+
+
+def measure(name: str, rows: int, fn: Callable[[], Any], repeat: int) -> tuple[Dict[str, Any], Any]:
+    """Run ``fn`` ``repeat`` times; return timing stats and the last result."""
+    profiler = Profiler()
+    result = None
+    for _ in range(repeat):
+        result = None  # release the previous result before measuring the next run
+        with profiler.span(name):
+            result = fn()
+    walls = [s["wall_s"] for s in profiler.spans]
+    record = {
+        "function": name,
+        "rows": rows,
+        "repeat": repeat,
+        "wall_s": {"min": min(walls), "median": round(statistics.median(walls), 4), "max": max(walls)},
+        "cpu_s": round(statistics.median(s["cpu_s"] for s in profiler.spans), 4),
+        "peak_rss_mb": max(s["peak_rss_mb"] for s in profiler.spans),
+        "rows_per_s": round(rows / min(walls)) if min(walls) > 0 else None,
+    }
+    return record, result
+
+
+def _fake_run(run_dir: Path, model, encoder, dataset_sha256: str) -> Dict[str, Any]:
+    """A complete run directory for run_checks (artifacts, card, hashes)."""
+    from pipeline.hashing import sha256_of_file
+    from pipeline.model import save_model
+    from pipeline.reports import write_model_card
+    from pipeline.runlog import RunLog
+
+    run_dir.mkdir(parents=True, exist_ok=True)
+    RunLog(run_dir.parent.parent / "run_log").append({"run_id": run_dir.name})
+    model_path = save_model(model, run_dir / "model.joblib")
+    encoder.save(run_dir / "encoder.json")
+    meta = {
+        "run_id": run_dir.name,
+        "dataset": {"dataset_sha256": dataset_sha256},
+        "transform": {"rows_after_clean": 1, "feature_count": encoder.n_features},
+        "model": {"algorithm": "LogisticRegression", "artifact_path": model_path,
+                  "metrics": {"metric": "accuracy", "value": 0.0}},
+    }
+    write_model_card(run_dir, meta)
+    meta["model_card_hash"] = sha256_of_file(run_dir / "model_card.md")
+    meta["artifact_hashes"] = {n: sha256_of_file(run_dir / n) for n in ("model.joblib", "encoder.json")}
+    return meta
+
+
+def bench_runs_endpoint(runs: int, repeat: int, workdir: Path) -> List[Dict[str, Any]]:
+    """Time /runs pages against a catalog holding ``runs`` synthetic runs."""
+    import random
+    from fastapi.testclient import TestClient
+    import app as viewer
+    from pipeline.catalog import RunCatalog
+
+    catalog = RunCatalog(workdir / f"catalog_{runs}.sqlite")
+    if catalog.count() != runs:
+        rng = random.Random(0)
+        catalog.upsert_many({
+            "run_id": f"bench-{i:09d}",
+            "timestamp_utc": f"2025-01-01T00:00:{i % 60:02d}.{i:09d}+00:00",
+            "model": {"metrics": {"value": rng.random()}},
+            "compliance": {"status": rng.choice(["PASS", "WARN", "FAIL"])},
+            "dataset": {"dataset_sha256": f"{i % 17:064x}"},
+        } for i in range(runs))
+    viewer.catalog = catalog
+    client = TestClient(viewer.app)
+    last_page = max(runs // 50, 1)
+    cases = {
+        "runs_endpoint": "/runs",
+        "runs_endpoint_last_page": f"/runs?page={last_page}",
+        "runs_endpoint_filtered": "/runs?status=FAIL&sort=accuracy&min_accuracy=0.5",
+    }
+    results = []
+    for name, url in cases.items():
+        record, response = measure(name, runs, lambda: client.get(url), repeat)
+        assert response.status_code == 200, (url, response.status_code)
+        record["catalog_runs"] = record.pop("rows")
+        results.append(record)
+    return results
+
+
+def bench_scale(rows: int, args, workdir: Path) -> List[Dict[str, Any]]:
+    from pipeline.hashing import sha256_of_file
+    from pipeline.ingestion import load_csv, load_csv_fingerprinted
+    from pipeline.transform import basic_clean, prepare_features, train_test_split_simple
+    from pipeline.model import evaluate, train_logreg
+    from pipeline.checks import run_checks
+
+    data_dir = Path(args.data_dir)
+    path = data_dir / dataset_name(rows, args.seed, args.duplicates, args.rare)
+    if not path.exists():
+        print(f"Generating {rows} rows -> {path}")
+        generate_csv(path, rows, Path(args.source), args.seed, args.duplicates, args.rare)
+
+    wanted = set(args.functions)
+    results = []
+
+    def run(name, fn):
+        record, result = measure(name, rows, fn, args.repeat)
+        if name in wanted:
+            results.append(record)
+            print(f"{name:<24} {rows:>11} rows  {record['wall_s']['min']:>9.4f}s  {record['peak_rss_mb']:>9.1f} MB")
+        return result
+
+    # Later steps need earlier outputs, so prerequisites run even when not reported (with repeat 1).
+    def step(name, fn, needed: bool = True):
+        if name in wanted:
+            return run(name, fn)
+        return fn() if needed else None
+
+    digest = step("sha256_of_file", lambda: sha256_of_file(path), needed=False)
+    step("load_csv", lambda: load_csv(path), needed=False)
+    needs_frame = wanted & {"load_csv_fingerprinted", "basic_clean", "prepare_features", "train_logreg", "evaluate", "run_checks"}
+    df, digest, _ = step("load_csv_fingerprinted", lambda: load_csv_fingerprinted(path), bool(needs_frame)) or (None, digest, None)
+    df_clean = step("basic_clean", lambda: basic_clean(df), bool(needs_frame - {"load_csv_fingerprinted"}))
+    del df
+    needs_matrix = wanted & {"prepare_features", "train_logreg", "evaluate", "run_checks"}
+    X, y, encoder = step("prepare_features", lambda: prepare_features(df_clean), bool(needs_matrix)) or (None, None, None)
+    del df_clean
+    model = None
+    if wanted & {"train_logreg", "evaluate", "run_checks"}:
+        X_train, X_test, y_train, y_test = train_test_split_simple(X, y)
+        model = step("train_logreg", lambda: train_logreg(X_train, y_train, max_iter=args.max_iter))
+        step("evaluate", lambda: evaluate(model, X_test, y_test), needed=False)
+    if "run_checks" in wanted:
+        meta = _fake_run(workdir / "artifacts" / "runs" / f"bench-{rows}", model, encoder, digest or "")
+        run("run_checks", lambda: run_checks(meta, workdir / "artifacts" / "runs" / f"bench-{rows}"))
+    if "runs_endpoint" in wanted:
+        for record in bench_runs_endpoint(min(rows, args.max_catalog_runs), args.repeat, workdir):
+            results.append(record)
+            print(f"{record['function']:<24} {record['catalog_runs']:>11} runs  {record['wall_s']['min']:>9.4f}s")
+    return results
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> List[Dict[str, Any]]:
+    """Per (function, scale) ratio of median wall time, current / baseline."""
+    def index(doc):
+        return {(r["function"], r.get("rows", r.get("catalog_runs"))): r for r in doc["results"]}
+
+    base, rows = index(baseline), []
+    for key, r in sorted(index(current).items()):
+        if key not in base:
+            continue
+        old, new = base[key]["wall_s"]["median"], r["wall_s"]["median"]
+        ratio = new / old if old else None
+        rows.append({"function": key[0], "scale": key[1], "baseline_s": old, "current_s": new,
+                     "ratio": round(ratio, 3) if ratio else None,
+                     "regression": bool(ratio and ratio > threshold)})
+    return rows
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Benchmark pipeline functions on synthetic bank datasets")
+    ap.add_argument("--scales", type=str, default="100000,1000000", help="Comma-separated row counts")
+    ap.add_argument("--repeat", type=int, default=3, help="Timed repetitions per function")
+    ap.add_argument("--functions", type=str, default=",".join(FUNCTIONS), help=f"Subset of: {', '.join(FUNCTIONS)}")
+    ap.add_argument("--source", type=str, default=str(ROOT / "data" / "bank.csv"), help="Dataset the generator imitates")
+    ap.add_argument("--data-dir", type=str, default=str(ROOT / "data" / "synthetic"), help="Where generated datasets are kept")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--duplicates", type=float, default=0.02, help="Duplicate-row fraction of generated data")
+    ap.add_argument("--rare", type=float, default=0.001, help="Rare-category row fraction of generated data")
+    ap.add_argument("--max-iter", type=int, default=200, help="max_iter for train_logreg")
+    ap.add_argument("--max-catalog-runs", type=int, default=100_000, help="Cap on catalog size for the /runs benchmark")
+    ap.add_argument("--out", type=str, default=str(ROOT / "artifacts" / "benchmarks"), help="Results directory")
+    ap.add_argument("--compare", type=str, default=None, help="Earlier results JSON to compare against")
+    ap.add_argument("--threshold", type=float, default=1.2, help="Slowdown ratio reported as a regression")
+    args = ap.parse_args()
+    args.functions = [f.strip() for f in args.functions.split(",") if f.strip()]
+    unknown = set(args.functions) - set(FUNCTIONS)
+    if unknown:
+        ap.error(f"unknown functions: {sorted(unknown)}")
+
+    # Short max_iter runs do not converge on purpose; the warnings would drown the table.
+    warnings.filterwarnings("ignore", message=".*failed to converge")
+    commit = git_commit()
+    started = datetime.now(timezone.utc)
+    results = []
+    with tempfile.TemporaryDirectory(prefix="bench_") as tmp:
+        for rows in [int(s) for s in args.scales.split(",") if s.strip()]:
+            results += bench_scale(rows, args, Path(tmp))
+
+    doc = {
+        "commit": commit,
+        "timestamp_utc": started.isoformat(),
+        "environment": environment(),
+        "config": {k: v for k, v in vars(args).items() if k not in ("out", "compare")},
+        "results": results,
+    }
+    out_dir = Path(args.out)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    out = out_dir / f"bench_{started.strftime('%Y%m%dT%H%M%SZ')}_{(commit or 'nocommit')[:8]}.json"
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text(encoding="utf-8"))
+        doc["comparison"] = {"baseline": args.compare, "baseline_commit": baseline.get("commit"),
+                             "rows": compare(doc, baseline, args.threshold)}
+    out.write_text(json.dumps(doc, indent=2), encoding="utf-8")
+    print(f"Results: {out}")
+
+    if args.compare:
+        print(f"{'Function':<26} {'Scale':>11} {'Baseline':>10} {'Current':>10} {'Ratio':>7}")
+        for r in doc["comparison"]["rows"]:
+            flag = "  REGRESSION" if r["regression"] else ""
+            print(f"{r['function']:<26} {r['scale']:>11} {r['baseline_s']:>10.4f} {r['current_s']:>10.4f} {r['ratio'] or '-':>7}{flag}")
+        if any(r["regression"] for r in doc["comparison"]["rows"]):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,15 +1,26 @@
 from __future__ import annotations
-import argparse
+import argparse, glob, hashlib, json, os, signal, time, traceback
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, as_completed, wait
+from contextlib import redirect_stderr, redirect_stdout
 from pipeline.reports import write_dataset_card, write_model_card, write_run_report
 from pathlib import Path
 from typing import Dict, Any
 from rich import print
 from pipeline.checks import run_checks, write_findings
-from pipeline.ingestion import load_csv, dataframe_schema
-from pipeline.compliance import new_run_id, utc_now_iso, sha256_of_file, append_jsonl, write_json
-from pipeline.transform import basic_clean, prepare_features, train_test_split_simple
-from pipeline.model import train_logreg, evaluate, save_model
-from pipeline.compliance import upload_to_blob
+from pipeline.compliance import new_run_id, utc_now_iso, sha256_of_file, write_json
+from pipeline.catalog import RunCatalog
+from pipeline.runlog import RunLog
+from pipeline.compliance import default_backend
+from pipeline.storage import UploadManager
+from pipeline.hashing import HashManifest, stat_signature
+from pipeline.profiling import Profiler, summarize, write_folded
+from pipeline.stages import Stage, StageRunner, STATE_FILENAME, load_state
+from pipeline.export import COMPACT_FILENAME, LinearScorer, export_linear_model, verify_export
+from pipeline.bundle import BUNDLE_FILENAME, write_bundle
+
+# pandas/sklearn/scipy-backed modules (pipeline.ingestion, .transform, .cache,
+# .streaming, .model) are imported inside the code paths that need them, so
+# `--help` and paths that do not train stay fast to start.
 
 def ensure_dirs() -> Dict[str, Path]:
     root = Path(__file__).parent.resolve()
@@ -18,111 +29,684 @@ def ensure_dirs() -> Dict[str, Path]:
         "data": root / "data",
         "artifacts": root / "artifacts",
         "runs": root / "artifacts" / "runs",
-        "log": root / "artifacts" / "run_log.jsonl",
+        "log": root / "artifacts" / "run_log",
+        "cache": root / "artifacts" / "cache",
+        "catalog": root / "artifacts" / "catalog.sqlite",
+        "jobs": root / "artifacts" / "jobs.sqlite",
     }
     for p in [paths["data"], paths["artifacts"], paths["runs"]]:
         p.mkdir(parents=True, exist_ok=True)
     return paths
 
-def gather_metadata(dataset_path: Path, df) -> Dict[str, Any]:
+def gather_metadata(dataset_path: Path, df, dataset_sha256: str | None = None, schema: dict | None = None) -> Dict[str, Any]:
+    from pipeline.ingestion import dataframe_schema
+
     file_size = dataset_path.stat().st_size if dataset_path.exists() else None
     return {
         "dataset_path": str(dataset_path),
-        "dataset_sha256": sha256_of_file(dataset_path),
+        "dataset_sha256": dataset_sha256 or sha256_of_file(dataset_path),
         "file_size_bytes": file_size,
         "rows": int(len(df)),
         "columns": list(df.columns),
-        "schema": dataframe_schema(df),
+        "schema": schema or dataframe_schema(df),
     }
 
-def main():
-    ap = argparse.ArgumentParser(description="Transform + Model + Logs")
-    ap.add_argument("--data", type=str, default="data/bank.csv", help="Path to CSV dataset")
-    args = ap.parse_args()
+def _source_file(dataset_path: Path) -> Dict[str, Any]:
+    """Identity of the input CSV for stage keys (path plus stat signature)."""
+    return {"path": str(dataset_path.resolve()), **stat_signature(dataset_path)} if dataset_path.exists() else {"path": str(dataset_path)}
 
-    paths = ensure_dirs()
+def stage_load(ctx: Dict[str, Any]) -> Dict[str, Any]:
+    args, paths = ctx["args"], ctx["paths"]
     dataset_path = Path(args.data)
     if not dataset_path.exists():
         print(f"[red]Dataset not found:[/red] {dataset_path}")
         raise SystemExit(1)
 
+    if args.streaming:
+        from pipeline.streaming import scan_dataset
+
+        print("[bold cyan]Step 1: Scan dataset (streaming)[/bold cyan]")
+        with ctx["profiler"].span("ingest"):
+            encoder, dataset_meta = scan_dataset(dataset_path, chunksize=args.chunksize)
+        print(f"[green]Scanned[/green] {dataset_meta['rows']} rows in chunks of {args.chunksize}.")
+        return {"dataset": dataset_meta, "source": encoder, "dataprofile": None}
+
+    from pipeline.cache import FeatureCache
+    from pipeline.dataprofile import DatasetProfile, profile_chunks
+    from pipeline.ingestion import load_csv_fingerprinted
+    from pipeline.incremental import (ChainHasher, FingerprintStore, TeeHasher, appended_schema, fingerprint_meta,
+                                      read_appended, unchanged)
+    from pipeline.transform import TRANSFORM_VERSION
+
+    cache = None if args.no_cache else FeatureCache(paths["cache"], max_bytes=args.cache_max_mb * 1024 * 1024)
+    # Incremental mode also records the file's chained fingerprint, which can
+    # be extended over appended bytes; it needs the cache for the base version.
+    store = FingerprintStore(paths["cache"]) if args.incremental and cache else None
+    cached, prev = None, None
+    with ctx["profiler"].span("hash"):
+        if store:
+            prev = store.get(dataset_path)
+            dataset_sha256 = prev.get("sha256") if unchanged(prev, dataset_path) else None
+        else:
+            dataset_sha256 = cache.known_hash(dataset_path) if cache else None
+    if dataset_sha256:
+        with ctx["profiler"].span("cache_read"):
+            cached = cache.get(FeatureCache.key(dataset_sha256, TRANSFORM_VERSION))
+
     print("[bold cyan]Step 1: Load dataset[/bold cyan]")
-    df = load_csv(dataset_path)
+    if cached is not None:
+        dataset_meta = {
+            **cached.dataset,
+            "dataset_path": str(dataset_path),
+            "file_size_bytes": dataset_path.stat().st_size,
+        }
+        print(f"[green]Cache hit[/green] for dataset {dataset_sha256[:12]}, skipping parse.")
+        return {"dataset": dataset_meta, "source": cached, "dataprofile": None}
+
+    if prev and prev.get("sha256") and not dataset_sha256:
+        base_key = FeatureCache.key(prev["sha256"], TRANSFORM_VERSION)
+        base = cache.get(base_key) if cache.row_index(base_key) is not None else None
+        appended = None
+        if base is not None:
+            with ctx["profiler"].span("ingest"):
+                appended = read_appended(dataset_path, prev, base, chunksize=args.chunksize)
+        if appended is not None:
+            store.put(dataset_path, {**appended.state, "sha256": appended.sha256}, dataset_path.stat().st_mtime_ns)
+            dataset_meta = {
+                "dataset_path": str(dataset_path),
+                "dataset_sha256": appended.sha256,
+                "file_size_bytes": dataset_path.stat().st_size,
+                "rows": int(base.dataset["rows"]) + len(appended.rows),
+                "columns": list(base.dataset["columns"]),
+                "schema": appended_schema(base.dataset["schema"], appended.rows),
+                "fingerprint": fingerprint_meta(appended.state, "append", base_sha256=prev["sha256"],
+                                                appended_rows=len(appended.rows),
+                                                appended_bytes=appended.appended_bytes,
+                                                bytes_read=appended.bytes_read),
+            }
+            # The base version's sketches absorb the appended rows; nothing else is re-profiled.
+            base_state = cache.profile_state(base_key)
+            profile = DatasetProfile.from_arrays(base_state) if base_state is not None else None
+            if profile is not None:
+                with ctx["profiler"].span("profile"):
+                    profile.merge(profile_chunks([appended.rows], workers=args.dataprofile_workers))
+                dataset_meta["profile"] = profile.summary()
+            print(f"[green]Appended[/green] {len(appended.rows)} rows to dataset {prev['sha256'][:12]} "
+                  f"({appended.appended_bytes} bytes parsed, {appended.bytes_read} bytes re-hashed).")
+            return {"dataset": dataset_meta, "source": appended, "dataprofile": profile}
+        print("[yellow]Dataset is not an append of its last fingerprinted version, reading it in full.[/yellow]")
+
+    # Single pass: the file is hashed while it is parsed and profiled chunk by chunk, so "ingest" covers all three.
+    chain = ChainHasher() if store else None
+    hasher = TeeHasher(hashlib.sha256(), chain) if store else None
+    profile = DatasetProfile()
+    with ctx["profiler"].span("ingest"):
+        df, dataset_sha256, schema = load_csv_fingerprinted(dataset_path, chunksize=args.chunksize, hasher=hasher,
+                                                            profile=profile, profile_workers=args.dataprofile_workers)
+    dataset_meta = gather_metadata(dataset_path, df, dataset_sha256, schema)
+    dataset_meta["profile"] = profile.summary()
+    if store:
+        store.put(dataset_path, {**chain.state(), "sha256": dataset_sha256}, dataset_path.stat().st_mtime_ns)
+        dataset_meta["fingerprint"] = fingerprint_meta(chain.state(), "full")
+    elif cache:
+        cache.remember_hash(dataset_path, dataset_sha256)
+    if cache:
+        cached = cache.get(FeatureCache.key(dataset_sha256, TRANSFORM_VERSION))
     print(f"[green]Loaded[/green] {len(df)} rows, {len(df.columns)} columns.")
+    return {"dataset": dataset_meta, "source": cached if cached is not None else df, "dataprofile": profile}
+
+def stage_transform(ctx: Dict[str, Any]) -> Dict[str, Any]:
+    """Clean and encode the dataset, going through the feature cache when enabled."""
+    from pipeline.cache import CachedDataset, FeatureCache
+    from pipeline.incremental import AppendedRows, append_clean, build_row_index
+    from pipeline.transform import basic_clean, prepare_features, TARGET_COL, TRANSFORM_VERSION
 
-    print("[bold cyan]Step 2: Create run + base metadata[/bold cyan]")
-    run_id = new_run_id()
-    run_dir = paths["runs"] / run_id
-    base = {"run_id": run_id, "timestamp_utc": utc_now_iso(), "dataset": gather_metadata(dataset_path, df)}
+    args, paths, dataset_meta, source = ctx["args"], ctx["paths"], ctx["dataset"], ctx["source"]
+    prof, dataprofile = ctx["profiler"], ctx["dataprofile"]
+    cache_key = FeatureCache.key(dataset_meta["dataset_sha256"], TRANSFORM_VERSION)
+    if args.streaming:
+        # Chunks are cleaned and encoded inside the training loop.
+        features = {"cache_key": cache_key, "streaming": True, "feature_count": int(source.n_features)}
+        transform_meta = {"cache": {"enabled": False, "key": None, "hit": False}}
+        return {"features": features, "transform": transform_meta, "X": None, "y": None, "encoder": source}
 
-    print("[bold cyan]Step 3: Transform[/bold cyan]")
-    df_clean = basic_clean(df)
-    X, y = prepare_features(df_clean)
-    X_train, X_test, y_train, y_test = train_test_split_simple(X, y)
+    print("[bold cyan]Step 2: Transform[/bold cyan]")
+    hit = isinstance(source, CachedDataset)
+    appended = isinstance(source, AppendedRows)
+    cache = None if args.no_cache else FeatureCache(paths["cache"], max_bytes=args.cache_max_mb * 1024 * 1024)
+    row_index, incremental = None, None
+    if hit:
+        df_clean, X, y, encoder = source.df_clean, source.X, source.y, source.encoder
+    elif appended:
+        # Only the appended rows are deduplicated and encoded (see pipeline.incremental).
+        with prof.span("append"):
+            df_clean, X, y, encoder, row_index, incremental = append_clean(
+                source, cache.row_index(source.base.key), TARGET_COL)
+        print(f"[green]Incremental refresh[/green]: {incremental['appended_rows']} appended rows, "
+              f"{incremental['duplicates_dropped']} duplicates dropped.")
+    else:
+        with prof.span("clean"):
+            df_clean = basic_clean(source)
+        with prof.span("encode"):
+            X, y, encoder = prepare_features(df_clean)
+        if args.incremental and cache:
+            with prof.span("row_index"):
+                row_index = build_row_index(df_clean)
+    if cache and not hit:
+        with prof.span("cache_write"):
+            stored = {k: dataset_meta[k] for k in ("dataset_sha256", "rows", "columns", "schema", "fingerprint", "profile")
+                      if k in dataset_meta}
+            cache.put(cache_key, stored, df_clean, X, y, encoder, row_index=row_index,
+                      profile_state=dataprofile.to_arrays() if dataprofile is not None else None)
+    features = {"cache_key": cache_key, "rows_after_clean": int(len(df_clean)), "feature_count": int(X.shape[1])}
     transform_meta = {
-        "rows_after_clean": int(len(df_clean)),
-        "feature_count": int(X.shape[1]),
-        "train_size": int(len(y_train)),
-        "test_size": int(len(y_test)),
+        "rows_after_clean": features["rows_after_clean"],
+        "feature_count": features["feature_count"],
+        "cache": {"enabled": not args.no_cache, "key": cache_key, "hit": hit},
     }
+    if incremental is not None:
+        transform_meta["incremental"] = incremental
+    return {"features": features, "transform": transform_meta, "X": X, "y": y, "encoder": encoder}
+
+def export_compact(model, encoder, path: Path, algorithm: str, X_test=None, verify: bool = False) -> Dict[str, Any]:
+    """Write the memory-mappable model export, with ``verify`` also checking it against the sklearn model.
 
-    print("[bold cyan]Step 4: Train + evaluate[/bold cyan]")
-    model = train_logreg(X_train, y_train, max_iter=1000)
-    metrics = evaluate(model, X_test, y_test)
-    model_path = save_model(model, run_dir / "model.joblib")
-    with open(model_path, "rb") as f:
-        upload_to_blob(run_id, "model.joblib", f.read())
+    The scorer's equivalence is covered by tests/test_export.py; with
+    ``verify`` an export that does not reproduce the model's predictions on
+    the test split is removed.
+    """
+    info = export_linear_model(model, encoder, path, algorithm)
+    if not verify:
+        return info
+    info["verification"] = verify_export(model, encoder, LinearScorer(path), X_test)
+    if not info["verification"]["passed"]:
+        print(f"[yellow]Compact export does not match the model, discarding it:[/yellow] {info['verification']}")
+        path.unlink(missing_ok=True)
+        info["path"] = None
+    return info
+
+def stage_train(ctx: Dict[str, Any]) -> Dict[str, Any]:
+    from pipeline.model import save_model
+
+    args, run_dir, run_id, encoder = ctx["args"], ctx["run_dir"], ctx["run"]["run_id"], ctx["encoder"]
+    prof = ctx["profiler"]
+    sweep, cv, X_test = None, None, None
+    if args.streaming:
+        from pipeline.streaming import train_streaming
+
+        print("[bold cyan]Step 2-3: Transform + train + evaluate (streaming)[/bold cyan]")
+        if args.cv:
+            print("[yellow]--cv is not supported with --streaming, skipping cross-validation[/yellow]")
+        # The final evaluation pass happens inside train_streaming, so "fit" includes it.
+        with prof.span("fit"):
+            model, metrics, split = train_streaming(Path(args.data), encoder, chunksize=args.chunksize, epochs=args.epochs,
+                                                    n_bootstrap=args.bootstrap, eval_workers=args.eval_workers,
+                                                    shuffle_buffer=args.shuffle_buffer)
+        algorithm = "SGDClassifier"
+        hyperparameters = {"loss": "log_loss", "alpha": model.alpha, "average": True, "epochs": args.epochs,
+                           "chunksize": args.chunksize, "shuffle_buffer": args.shuffle_buffer}
+    else:
+        from pipeline.model import train_logreg, evaluate, fit_logreg, run_cv, run_sweep, sweep_configs
+        from pipeline.transform import train_test_split_simple
+
+        with prof.span("split"):
+            X_train, X_test, y_train, y_test = train_test_split_simple(ctx["X"], ctx["y"])
+        split = {"train_size": int(len(y_train)), "test_size": int(len(y_test))}
+
+        print("[bold cyan]Step 3: Train + evaluate[/bold cyan]")
+        if args.sweep:
+            configs = sweep_configs()
+            print(f"Sweeping {len(configs)} configs...")
+            with prof.span("sweep"):
+                sweep = run_sweep(X_train, y_train, configs, workers=args.sweep_workers)
+            hyperparameters = sweep["best"]
+            print(f"[green]Best config[/green] {hyperparameters}")
+            with prof.span("fit"):
+                model = fit_logreg(hyperparameters, X_train, y_train)
+        else:
+            with prof.span("fit"):
+                model = train_logreg(X_train, y_train, max_iter=1000)
+            hyperparameters = {"max_iter": 1000}
+        if args.cv:
+            print(f"Cross-validating over {args.cv} stratified folds...")
+            with prof.span("cv"):
+                cv = run_cv(X_train, y_train, hyperparameters, k=args.cv, workers=args.cv_workers)
+            acc = cv["summary"]["accuracy"]
+            print(f"[green]CV accuracy[/green] {acc['mean']:.4f} ± {acc['std']:.4f} ({cv['wall_seconds']:.2f}s)")
+        with prof.span("evaluate"):
+            metrics = evaluate(model, X_test, y_test, n_bootstrap=args.bootstrap, workers=args.eval_workers)
+        algorithm = "LogisticRegression"
+
+    with prof.span("save"):
+        model_path = save_model(model, run_dir / "model.joblib")
+        encoder_path = encoder.save(run_dir / "encoder.json")
+    with prof.span("export"):
+        compact = export_compact(model, encoder, run_dir / COMPACT_FILENAME, algorithm, X_test, verify=args.verify_export)
+    # Uploads run in the background while the rest of the run proceeds.
+    ctx["uploads"].submit_file(run_id, "model.joblib", Path(model_path))
+    ctx["uploads"].submit_file(run_id, "encoder.json", Path(encoder_path))
+    if compact.get("path"):
+        ctx["uploads"].submit_file(run_id, COMPACT_FILENAME, Path(compact["path"]))
     model_meta = {
-        "algorithm": "LogisticRegression",
-        "hyperparameters": {"max_iter": 1000},
+        "algorithm": algorithm,
+        "hyperparameters": hyperparameters,
         "artifact_path": model_path,
+        "encoder_path": encoder_path,
         "metrics": metrics,
+        "compact_export": compact,
+    }
+    if sweep is not None:
+        model_meta["sweep"] = sweep
+    if cv is not None:
+        model_meta["cv"] = cv
+    return {"model": model_meta, "split": split}
+
+def stage_cards(ctx: Dict[str, Any]) -> Dict[str, Any]:
+    run_dir, run_id, prof = ctx["run_dir"], ctx["run"]["run_id"], ctx["profiler"]
+    record = {
+        **ctx["run"],
+        "dataset": ctx["dataset"],
+        "transform": {**ctx["transform"], **ctx["split"]},
+        "model": ctx["model"],
     }
 
-    record = {**base, "transform": transform_meta, "model": model_meta}
+    # Generate & hash model card (plus model artifacts) before compliance checks
+    with prof.span("write"):
+        dataset_card = write_dataset_card(run_dir, record)
+        model_card = write_model_card(run_dir, record)
+    with prof.span("hash"):
+        manifest = HashManifest.for_run(run_dir)
+        artifacts = [n for n in ("model.joblib", "encoder.json", COMPACT_FILENAME) if (run_dir / n).exists()]
+        hashes = manifest.hash_many([*(run_dir / n for n in artifacts), Path(model_card)])
+        manifest.save()
+    record["model_card_hash"] = hashes["model_card.md"]
+    record["artifact_hashes"] = {n: hashes[n] for n in artifacts}
+    # The run report is written once the run's profile is known (see finalize_run).
+    for card in [dataset_card, model_card]:
+        ctx["uploads"].submit_file(run_id, Path(card).name, Path(card))
+    return {"record": record}
 
-    # Generate & hash model card before compliance checks
-    dataset_card = write_dataset_card(run_dir, record)
-    model_card = write_model_card(run_dir, record)
-    from pipeline.compliance import sha256_of_file
-    model_card_path = Path(model_card)
-    model_card_hash = sha256_of_file(model_card_path)
-    record["model_card_hash"] = model_card_hash
-    run_report = write_run_report(run_dir, record)
+def stage_compliance(ctx: Dict[str, Any]) -> Dict[str, Any]:
+    run_dir, run_id, record = ctx["run_dir"], ctx["run"]["run_id"], ctx["record"]
 
     # Write metadata.json before compliance checks
     write_json(run_dir / "metadata.json", record)
 
-    print("[bold cyan]Step 5: Compliance checks[/bold cyan]")
-    findings = run_checks(record, run_dir)
+    print("[bold cyan]Step 4: Compliance checks[/bold cyan]")
+    with ctx["profiler"].span("checks"):
+        findings = run_checks(record, run_dir)
+        for f in findings:
+            ctx["profiler"].record(f.id, f.duration_ms / 1000)
     status = write_findings(run_dir, findings)
-    upload_to_blob(run_id, "compliance_findings.json", (run_dir / "compliance_findings.json").read_text())
-    upload_to_blob(run_id, "compliance_summary.txt", (run_dir / "compliance_summary.txt").read_text())
-
-    # Attach compliance status into metadata
-    record["compliance"] = {
+    compliance = {
         "status": status,
         "blockers": [f.id for f in findings if f.severity == "BLOCKER" and not f.passed],
         "warnings": [f.id for f in findings if f.severity == "WARN" and not f.passed],
     }
 
     # write metadata with compliance
-    append_jsonl(paths["log"], record)
-    write_json(run_dir / "metadata.json", record)
-    upload_to_blob(run_id, "metadata.json", record)
+    write_json(run_dir / "metadata.json", {**record, "compliance": compliance})
+    for fname in ["compliance_findings.json", "compliance_summary.txt"]:
+        ctx["uploads"].submit_file(run_id, fname, run_dir / fname)
+    return {"compliance": compliance}
+
+def stage_publish(ctx: Dict[str, Any]) -> Dict[str, Any]:
+    """Index the finished run in the global log and the catalog."""
+    record = {**ctx["record"], "compliance": ctx["compliance"]}
+    run_log = RunLog(ctx["paths"]["log"])
+    run_log.migrate()
+    run_log.append(record)
+    RunCatalog(ctx["paths"]["catalog"]).upsert(record)
+    return {}
+
+STAGES = [
+    Stage("load", stage_load, inputs=("source_file",), outputs=("dataset",), transient=("source", "dataprofile"),
+          config=("streaming", "chunksize", "incremental"),
+          code=("pipeline.ingestion", "pipeline.incremental", "pipeline.streaming", "pipeline.dataprofile")),
+    Stage("transform", stage_transform, inputs=("dataset",), uses=("source", "dataprofile"),
+          outputs=("features", "transform"), transient=("X", "y", "encoder"),
+          config=("streaming", "incremental"), code=("pipeline.transform", "pipeline.encoding", "pipeline.incremental")),
+    Stage("train", stage_train, inputs=("features",), uses=("X", "y", "encoder"), outputs=("model", "split"),
+          config=("streaming", "epochs", "chunksize", "shuffle_buffer", "sweep", "cv", "bootstrap", "verify_export"),
+          code=("pipeline.model", "pipeline.evaluation", "pipeline.streaming", "pipeline.encoding", "pipeline.export"),
+          produces=("model.joblib", "encoder.json")),
+    Stage("cards", stage_cards, inputs=("run", "dataset", "transform", "split", "model"), outputs=("record",),
+          files=("model.joblib", "encoder.json", COMPACT_FILENAME), code=("pipeline.reports",),
+          produces=("dataset_card.md", "model_card.md", "hash_manifest.json")),
+    Stage("compliance", stage_compliance, inputs=("record",), outputs=("compliance",),
+          files=("model.joblib", "encoder.json", COMPACT_FILENAME, "model_card.md"), code=("pipeline.checks",),
+          produces=("metadata.json", "compliance_findings.json", "compliance_summary.txt")),
+    Stage("publish", stage_publish, inputs=("record", "compliance")),
+]
+
+def finalize_run(run_dir: Path, runner: StageRunner, ctx: Dict[str, Any]) -> Dict[str, Any]:
+    """Attach the run's profile to metadata.json, write the run report and re-index the run."""
+    args, profiler, uploads = ctx["args"], ctx["profiler"], ctx["uploads"]
+    profiler.stop()
+    meta = json.loads((run_dir / "metadata.json").read_text(encoding="utf-8"))
+    # Uploads of files that were not re-created in this invocation keep their earlier timings.
+    upload_spans = {s["name"]: s for s in meta.get("profile", {}).get("spans", []) if s["name"].startswith("upload/")}
+    for key, seconds in uploads.timings.items():
+        name = f"upload/{key.rsplit('/', 1)[-1]}"
+        upload_spans[name] = {"name": name, "wall_s": seconds}
+    spans = runner.profile() + list(upload_spans.values())
+    profile = {"summary": summarize(spans), "spans": spans}
+    if args.profile:
+        profile["cprofile_path"] = profiler.dump_cprofile(run_dir / "profile.prof")
+        profile["folded_path"] = write_folded(spans, run_dir / "profile.folded")
+    meta["profile"] = profile
+
+    write_json(run_dir / "metadata.json", meta)
+    run_report = write_run_report(run_dir, meta)
+    RunCatalog(ctx["paths"]["catalog"]).upsert(meta)
+    for path in [run_dir / "metadata.json", Path(run_report), *(Path(p) for p in (profile.get("cprofile_path"), profile.get("folded_path")) if p)]:
+        uploads.submit_file(meta["run_id"], path.name, path)
+    if not args.no_bundle:
+        # Everything above travels in this one archive (and, with a backend, one upload).
+        bundle = write_bundle(run_dir)
+        uploads.submit_file(meta["run_id"], BUNDLE_FILENAME, Path(bundle["path"]))
+    return meta
 
-    # Upload reports
-    for card in [dataset_card, model_card, run_report]:
-        upload_to_blob(run_id, Path(card).name, Path(card).read_text())
+def run_pipeline(args, paths: Dict[str, Path], run_dir: Path, only=None) -> Dict[str, Any]:
+    """Execute (or resume) one run and return a short summary of it."""
+    profiler = Profiler(trace_memory=args.trace_memory, cprofile=args.profile)
+    runner = StageRunner(STAGES, run_dir, vars(args), profiler=profiler)
+    try:
+        runner.check_names(args.from_stage, only)
+    except ValueError as e:
+        print(f"[red]{e}[/red]")
+        raise SystemExit(2)
+    run = runner.state["run"]
+    if not run:
+        run.update({"run_id": run_dir.name, "timestamp_utc": utc_now_iso()})
+    ctx: Dict[str, Any] = {
+        "args": args,
+        "paths": paths,
+        "run_dir": run_dir,
+        "run": dict(run),
+        "source_file": _source_file(Path(args.data)),
+        "uploads": UploadManager(default_backend(), only=None if args.no_bundle else {BUNDLE_FILENAME}),
+        "profiler": profiler,
+    }
+    report = runner.run(ctx, from_stage=args.from_stage, only=only)
+
+    uploads = ctx["uploads"]
+    if any(r["status"] == "ran" for r in report.values()) and (run_dir / "metadata.json").exists():
+        uploads.flush()
+        meta = finalize_run(run_dir, runner, ctx)
+        print(f"• Profile: {meta['profile']['summary']}")
+    uploaded = uploads.wait()
+    if uploaded:
+        print(f"[green]Uploaded[/green] {len(uploaded)} artifacts (slowest {max(uploads.timings.values()):.2f}s).")
 
     print("[bold cyan]Done![/bold cyan]")
-    print(f"• Run ID: [bold]{run_id}[/bold]")
-    print(f"• Accuracy: {metrics['value']:.3f}")
+    print(f"• Run ID: [bold]{run['run_id']}[/bold]")
+    print("• Stages: " + ", ".join(f"{name} {r['status']} ({r['seconds']:.2f}s)" for name, r in report.items()))
+    if "model" in ctx:
+        metrics = ctx["model"]["metrics"]
+        print(f"• Accuracy: {metrics['value']:.3f}")
+        if metrics.get("roc_auc") is not None:
+            ci = ((metrics.get("bootstrap") or {}).get("intervals") or {}).get("roc_auc")
+            print(f"• ROC-AUC: {metrics['roc_auc']:.3f}" + (f" (CI {ci[0]:.3f}-{ci[1]:.3f})" if ci else ""))
+        print(f"• Model: {ctx['model']['artifact_path']}")
     print(f"• Global log: {paths['log']}")
     print(f"• Per-run metadata: {run_dir/'metadata.json'}")
-    print(f"• Model: {model_path}")
-    print(f"• Compliance verdict: [bold]{status}[/bold]")
-    print(f"• Findings: {run_dir/'compliance_findings.json'}")
+    if "compliance" in ctx:
+        print(f"• Compliance verdict: [bold]{ctx['compliance']['status']}[/bold]")
+        print(f"• Findings: {run_dir/'compliance_findings.json'}")
+    return {
+        "dataset": args.data,
+        "run_id": run["run_id"],
+        "accuracy": ctx["model"]["metrics"]["value"] if "model" in ctx else None,
+        "status": ctx["compliance"]["status"] if "compliance" in ctx else None,
+        "stages": {name: r["status"] for name, r in report.items()},
+    }
+
+def resolve_batch(spec: str) -> list[Path]:
+    """Datasets of a batch: a manifest (.txt: one path per line, .json: list) or a glob."""
+    manifest = Path(spec)
+    if manifest.is_file() and manifest.suffix in (".txt", ".json"):
+        if manifest.suffix == ".json":
+            entries = json.loads(manifest.read_text(encoding="utf-8"))
+        else:
+            lines = manifest.read_text(encoding="utf-8").splitlines()
+            entries = [l.strip() for l in lines if l.strip() and not l.strip().startswith("#")]
+        # Relative entries are resolved against the manifest's directory.
+        return [p if p.is_absolute() else manifest.parent / p for p in map(Path, entries)]
+    return [Path(p) for p in sorted(glob.glob(spec, recursive=True))]
+
+def _batch_worker(args_dict: Dict[str, Any], dataset: str, log_path: str, run_id: str | None = None) -> Dict[str, Any]:
+    """Run one dataset of a batch in a worker process, with its console output in log_path."""
+    args = argparse.Namespace(**{**args_dict, "data": dataset, "batch": None})
+    # Allocated up front so a failed run can still be found (and cleaned up) by its id.
+    run_id = run_id or new_run_id()
+    start = time.perf_counter()
+    with open(log_path, "w", encoding="utf-8") as log, redirect_stdout(log), redirect_stderr(log):
+        try:
+            paths = ensure_dirs()
+            result = run_pipeline(args, paths, paths["runs"] / run_id)
+        except BaseException as e:  # one bad dataset must not take the batch down
+            if isinstance(e, KeyboardInterrupt):
+                raise
+            traceback.print_exc()
+            result = {"dataset": dataset, "run_id": run_id, "accuracy": None, "status": "ERROR",
+                      "error": f"{type(e).__name__}: {e}"}
+    result["seconds"] = round(time.perf_counter() - start, 2)
+    result["log"] = log_path
+    return result
+
+def run_batch(args, paths: Dict[str, Path]) -> Dict[str, Any]:
+    """Run every dataset of ``args.batch`` concurrently, at most ``args.jobs`` at a time."""
+    datasets = resolve_batch(args.batch)
+    if not datasets:
+        print(f"[red]No datasets match[/red] {args.batch}")
+        raise SystemExit(1)
+    batch_id = f"batch_{utc_now_iso().replace(':', '').replace('-', '')[:15]}_{new_run_id()[:8]}"
+    batch_dir = paths["artifacts"] / "batches" / batch_id
+    batch_dir.mkdir(parents=True, exist_ok=True)
+    jobs = max(1, min(args.jobs, len(datasets)))
+    print(f"[bold cyan]Batch {batch_id}[/bold cyan]: {len(datasets)} datasets, {jobs} at a time")
+
+    start = time.perf_counter()
+    results = []
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        futures = [
+            pool.submit(_batch_worker, vars(args), str(ds), str(batch_dir / f"{i:04d}_{ds.stem}.log"))
+            for i, ds in enumerate(datasets)
+        ]
+        for fut in as_completed(futures):
+            r = fut.result()
+            results.append(r)
+            acc = f"{r['accuracy']:.3f}" if r.get("accuracy") is not None else "-"
+            print(f"[{len(results)}/{len(datasets)}] {r['dataset']}: {r['status']} (accuracy {acc}, {r['seconds']}s)")
+
+    results.sort(key=lambda r: r["dataset"])
+    accuracies = [r["accuracy"] for r in results if r.get("accuracy") is not None]
+    verdicts: Dict[str, int] = {}
+    for r in results:
+        verdicts[r["status"] or "UNKNOWN"] = verdicts.get(r["status"] or "UNKNOWN", 0) + 1
+    summary = {
+        "batch_id": batch_id,
+        "timestamp_utc": utc_now_iso(),
+        "spec": args.batch,
+        "jobs": jobs,
+        "seconds": round(time.perf_counter() - start, 2),
+        "verdicts": dict(sorted(verdicts.items())),
+        "accuracy": {
+            "mean": sum(accuracies) / len(accuracies) if accuracies else None,
+            "min": min(accuracies, default=None),
+            "max": max(accuracies, default=None),
+        },
+        "runs": results,
+    }
+    write_json(batch_dir / "summary.json", summary)
+
+    print("[bold cyan]Batch summary[/bold cyan]")
+    print(f"{'Dataset':<40} {'Run ID':<36} {'Verdict':<8} {'Accuracy':>8}")
+    for r in results:
+        acc = f"{r['accuracy']:.3f}" if r.get("accuracy") is not None else "-"
+        print(f"{Path(r['dataset']).name[:40]:<40} {r['run_id'] or '-':<36} {r['status'] or '-':<8} {acc:>8}")
+    print(f"• Verdicts: {summary['verdicts']}")
+    if accuracies:
+        print(f"• Accuracy: mean {summary['accuracy']['mean']:.3f}, min {summary['accuracy']['min']:.3f}, "
+              f"max {summary['accuracy']['max']:.3f}")
+    print(f"• Wall time: {summary['seconds']}s; summary: {batch_dir / 'summary.json'}")
+    return summary
+
+# Options that describe the worker itself, not a run, and may not be set per job.
+WORKER_OPTIONS = {"data", "batch", "jobs", "worker", "queue", "poll", "exit_when_idle", "run_id", "from_stage", "only"}
+
+def _warm_worker() -> None:
+    """Pool initializer: pay for the heavy imports and the storage client once per worker process."""
+    import pandas, sklearn.linear_model, sklearn.metrics  # noqa: F401
+    import pipeline.cache, pipeline.evaluation, pipeline.incremental, pipeline.model, pipeline.streaming, pipeline.transform  # noqa: F401
+    default_backend()
+
+def _job_args(defaults: Dict[str, Any], config: Dict[str, Any]) -> Dict[str, Any]:
+    """main.py options of one job: the worker's own options overridden by the job's config."""
+    bad = sorted(k for k in config if k not in defaults or k in WORKER_OPTIONS)
+    if bad:
+        raise ValueError(f"Unsupported job options: {', '.join(bad)}")
+    return {**defaults, **config}
+
+def run_worker(args, paths: Dict[str, Path]) -> None:
+    """Resident worker: run jobs from the SQLite queue in warm processes, at most ``args.jobs`` at once.
+
+    Pool processes import pandas/sklearn and build the storage client once
+    and then serve job after job, so a run costs only its own work. Job
+    status (queued, running, done, failed) is written back to the queue,
+    which the viewer's /jobs page reads.
+    """
+    from pipeline.jobs import JobQueue, worker_name
+
+    queue = JobQueue(Path(args.queue) if args.queue else paths["jobs"])
+    log_dir = paths["artifacts"] / "jobs"
+    log_dir.mkdir(parents=True, exist_ok=True)
+    name = worker_name()
+    requeued = queue.requeue_orphans()
+    defaults = {**vars(args), "worker": False, "batch": None}
+    stopping = False
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+
+    signal.signal(signal.SIGTERM, stop)
+    print(f"[bold cyan]Worker {name}[/bold cyan]: queue {queue.db_path}, {args.jobs} at a time"
+          + (f", {requeued} orphaned jobs re-queued" if requeued else ""))
+    inflight: Dict[Any, Dict[str, Any]] = {}
+    with ProcessPoolExecutor(max_workers=args.jobs, initializer=_warm_worker) as pool:
+        while True:
+            while not stopping and len(inflight) < args.jobs:
+                job = queue.claim(name, new_run_id())
+                if job is None:
+                    break
+                try:
+                    job_args = _job_args(defaults, job["config"])
+                except ValueError as e:
+                    queue.finish(job["id"], {"status": "ERROR", "error": str(e), "run_id": None})
+                    print(f"[red]Job {job['id']} rejected:[/red] {e}")
+                    continue
+                log_path = str(log_dir / f"{job['id']:06d}.log")
+                inflight[pool.submit(_batch_worker, job_args, job["dataset"], log_path, job["run_id"])] = job
+                print(f"Job {job['id']} started: {job['dataset']} -> run {job['run_id']}")
+            if not inflight:
+                if stopping or args.exit_when_idle:
+                    break
+                time.sleep(args.poll)
+                continue
+            done, _ = wait(inflight, timeout=args.poll, return_when=FIRST_COMPLETED)
+            for fut in done:
+                job = inflight.pop(fut)
+                try:
+                    result = fut.result()
+                except Exception as e:  # the pool process itself died
+                    result = {"status": "ERROR", "error": f"{type(e).__name__}: {e}"}
+                queue.finish(job["id"], result)
+                print(f"Job {job['id']} {result.get('status')}: run {result.get('run_id') or job['run_id']} "
+                      f"({result.get('seconds', '-')}s)")
+    print("[bold cyan]Worker stopped[/bold cyan]")
+
+def main():
+    stage_names = [s.name for s in STAGES]
+    ap = argparse.ArgumentParser(description="Transform + Model + Logs")
+    ap.add_argument("--data", type=str, default="data/bank.csv", help="Path to CSV dataset")
+    ap.add_argument("--chunksize", type=int, default=200_000, help="Rows per parser chunk during ingestion")
+    ap.add_argument("--no-cache", action="store_true", help="Always re-parse and re-transform the dataset")
+    ap.add_argument("--cache-max-mb", type=int, default=2048, help="Size bound of the feature cache (LRU eviction)")
+    ap.add_argument("--incremental", action="store_true",
+                    help="Fingerprint the dataset in blocks; when it only grew by appended rows, hash, dedup and encode just those")
+    ap.add_argument("--dataprofile-workers", type=int, default=1,
+                    help="Threads profiling parsed chunks for the dataset card (results do not depend on it)")
+    ap.add_argument("--streaming", action="store_true", help="Out-of-core training: chunked reads + incremental SGD")
+    ap.add_argument("--epochs", type=int, default=3, help="Passes over the data in --streaming mode")
+    ap.add_argument("--shuffle-buffer", type=int, default=100_000,
+                    help="Training rows mixed across chunks before each --streaming update (bounds memory)")
+    ap.add_argument("--sweep", action="store_true", help="Tune C/penalty/solver in a process pool and keep the best model")
+    ap.add_argument("--sweep-workers", type=int, default=None, help="Worker processes for --sweep (default: all cores)")
+    ap.add_argument("--cv", type=int, default=0, metavar="K",
+                    help="Also run stratified K-fold cross-validation (K >= 2) on the training split, folds in parallel")
+    ap.add_argument("--cv-workers", type=int, default=None, help="Worker processes for --cv (default: all cores, at most K)")
+    ap.add_argument("--bootstrap", type=int, default=1000, help="Bootstrap resamples for metric confidence intervals (0: none)")
+    ap.add_argument("--eval-workers", type=int, default=1, help="Threads computing bootstrap blocks")
+    ap.add_argument("--verify-export", action="store_true",
+                    help="Check model.lrm against the sklearn model on the test split (discarded on mismatch)")
+    ap.add_argument("--no-bundle", action="store_true",
+                    help=f"Do not write {BUNDLE_FILENAME}; upload every artifact as its own blob instead")
+    ap.add_argument("--run_id", type=str, default=None,
+                    help="Resume an existing run: only stages whose inputs, config or code changed are re-executed")
+    ap.add_argument("--from-stage", choices=stage_names, default=None,
+                    help="Re-execute this stage and every later one (earlier stages come from the run's state)")
+    ap.add_argument("--only", type=str, default=None,
+                    help=f"Comma-separated stages to re-execute, e.g. cards,compliance ({', '.join(stage_names)})")
+    ap.add_argument("--profile", action="store_true",
+                    help="Also write cProfile stats (profile.prof) and folded stacks (profile.folded) to the run directory")
+    ap.add_argument("--trace-memory", action="store_true",
+                    help="Record tracemalloc peaks per stage (precise Python allocations, but ~3x slower training)")
+    ap.add_argument("--batch", type=str, default=None,
+                    help="Glob (quote it) or manifest (.txt/.json) of datasets to run concurrently instead of --data")
+    ap.add_argument("--jobs", type=int, default=min(4, os.cpu_count() or 1),
+                    help="Datasets processed at once in --batch mode, jobs at once in --worker mode")
+    ap.add_argument("--worker", action="store_true",
+                    help="Stay resident and run jobs from the queue (submit with python -m pipeline.jobs submit)")
+    ap.add_argument("--queue", type=str, default=None, help="Job queue database for --worker (default: artifacts/jobs.sqlite)")
+    ap.add_argument("--poll", type=float, default=1.0, help="Seconds between queue polls when the worker is idle")
+    ap.add_argument("--exit-when-idle", action="store_true", help="Stop the worker once the queue is empty")
+    args = ap.parse_args()
+
+    if args.cv == 1 or args.cv < 0:
+        print("[red]--cv needs K >= 2 folds[/red]")
+        raise SystemExit(1)
+    paths = ensure_dirs()
+    only = [s.strip() for s in args.only.split(",") if s.strip()] if args.only else None
+    if args.run_id:
+        run_dir = paths["runs"] / args.run_id
+        if not (run_dir / STATE_FILENAME).exists():
+            print(f"[red]No resumable run[/red] {args.run_id} (missing {run_dir / STATE_FILENAME})")
+            raise SystemExit(1)
+        # A resumed run keeps the options it was started with unless overridden on the command line.
+        recorded = load_state(run_dir).get("config", {})
+        ap.set_defaults(**{k: v for k, v in recorded.items() if k not in ("run_id", "from_stage", "only", "batch", "jobs")})
+        args = ap.parse_args()
+    else:
+        if args.from_stage or only:
+            print("[red]--from-stage/--only need --run_id of an existing run[/red]")
+            raise SystemExit(1)
+        run_dir = paths["runs"] / new_run_id()
+
+    if args.worker:
+        if args.run_id or args.batch:
+            print("[red]--worker cannot be combined with --run_id/--batch[/red]")
+            raise SystemExit(1)
+        run_worker(args, paths)
+        return
+    if args.batch:
+        if args.run_id:
+            print("[red]--batch cannot be combined with --run_id/--from-stage/--only[/red]")
+            raise SystemExit(1)
+        run_batch(args, paths)
+        return
+    run_pipeline(args, paths, run_dir, only)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,240 @@
+from __future__ import annotations
+import argparse, hashlib, json, os, shutil, struct, time, uuid, zipfile, zlib
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+# A run bundle is a zip archive of a run directory whose last member,
+# MANIFEST.json (stored uncompressed), records for every other member its
+# SHA-256, size, compression method and the absolute offset of its data.
+# A member is read with one seek and one read of ``compressed_size`` bytes,
+# without parsing or inflating the rest of the archive; any zip tool can
+# still open the bundle.
+BUNDLE_FILENAME = "run_bundle.zip"
+MANIFEST_NAME = "MANIFEST.json"
+FORMAT = "run-bundle/1"
+COPY_BUFFER_SIZE = 1 << 20
+_LOCAL_HEADER = struct.Struct("<4s5H3I2H")  # zip local file header, 30 bytes
+
+
+def _bundled_files(run_dir: Path) -> List[Path]:
+    """Regular files of a run directory that belong in its bundle (no temp, lock or bundle files)."""
+    skip_suffixes = (".tmp", ".part", ".lock")
+    return sorted(
+        p for p in Path(run_dir).iterdir()
+        if p.is_file() and p.name != BUNDLE_FILENAME and not p.name.startswith(".") and not p.name.endswith(skip_suffixes)
+    )
+
+
+def _data_offsets(path: Path, infos: Iterable[zipfile.ZipInfo]) -> Dict[str, int]:
+    """Absolute offset of each member's (compressed) data, read from its local header."""
+    offsets = {}
+    with open(path, "rb") as f:
+        for info in infos:
+            f.seek(info.header_offset)
+            fields = _LOCAL_HEADER.unpack(f.read(_LOCAL_HEADER.size))
+            name_len, extra_len = fields[-2], fields[-1]
+            offsets[info.filename] = info.header_offset + _LOCAL_HEADER.size + name_len + extra_len
+    return offsets
+
+
+def write_bundle(run_dir: Path, path: Optional[Path] = None) -> Dict[str, Any]:
+    """Pack a run directory into ``path`` (default ``run_dir/run_bundle.zip``) atomically.
+
+    Each file is read once, feeding both the deflate stream and its SHA-256.
+    Returns a summary (path, members, bytes) for the caller.
+    """
+    run_dir = Path(run_dir)
+    path = Path(path) if path else run_dir / BUNDLE_FILENAME
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.{uuid.uuid4().hex}.tmp")
+    members: Dict[str, Dict[str, Any]] = {}
+    try:
+        with zipfile.ZipFile(tmp, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+            for file in _bundled_files(run_dir):
+                h, size = hashlib.sha256(), 0
+                info = zipfile.ZipInfo.from_file(file, file.name)
+                info.compress_type = zipfile.ZIP_DEFLATED
+                with open(file, "rb") as src, zf.open(info, "w") as dst:
+                    for chunk in iter(lambda: src.read(COPY_BUFFER_SIZE), b""):
+                        h.update(chunk)
+                        size += len(chunk)
+                        dst.write(chunk)
+                members[file.name] = {"sha256": h.hexdigest(), "size": size}
+            infos = list(zf.infolist())
+        offsets = _data_offsets(tmp, infos)
+        for info in infos:
+            members[info.filename].update({
+                "compressed_size": info.compress_size,
+                "method": "deflate" if info.compress_type == zipfile.ZIP_DEFLATED else "stored",
+                "offset": offsets[info.filename],
+                "crc32": info.CRC,
+            })
+        manifest = {"format": FORMAT, "run_id": run_dir.name, "members": members}
+        # Appending rewrites only the central directory; member offsets stay valid.
+        with zipfile.ZipFile(tmp, "a") as zf:
+            zf.writestr(MANIFEST_NAME, json.dumps(manifest, indent=2), compress_type=zipfile.ZIP_STORED)
+        os.replace(tmp, path)
+    finally:
+        tmp.unlink(missing_ok=True)
+    return {"path": str(path), "members": len(members), "bytes": path.stat().st_size}
+
+
+class RunBundle:
+    """Random access to the members of a run bundle through its manifest."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        with zipfile.ZipFile(self.path) as zf:
+            self.manifest = json.loads(zf.read(MANIFEST_NAME))
+        if self.manifest.get("format") != FORMAT:
+            raise ValueError(f"Unsupported run bundle format {self.manifest.get('format')} in {self.path}")
+        self.members: Dict[str, Dict[str, Any]] = self.manifest["members"]
+
+    @property
+    def run_id(self) -> str:
+        return self.manifest["run_id"]
+
+    def names(self) -> List[str]:
+        return list(self.members)
+
+    def read(self, name: str, verify: bool = True) -> bytes:
+        """Bytes of one member; raises KeyError if absent and ValueError if it fails its hash."""
+        member = self.members[name]
+        with open(self.path, "rb") as f:
+            f.seek(member["offset"])
+            raw = f.read(member["compressed_size"])
+        data = zlib.decompress(raw, -zlib.MAX_WBITS) if member["method"] == "deflate" else raw
+        if verify and hashlib.sha256(data).hexdigest() != member["sha256"]:
+            raise ValueError(f"Member {name} of {self.path} does not match its recorded SHA-256")
+        return data
+
+    def extract(self, dest: Path, names: Optional[Iterable[str]] = None) -> List[Path]:
+        """Write (verified) members into ``dest``, each via an atomic rename."""
+        dest = Path(dest)
+        dest.mkdir(parents=True, exist_ok=True)
+        written = []
+        for name in names if names is not None else self.members:
+            target = dest / name
+            tmp = target.with_name(f".{name}.{uuid.uuid4().hex}.tmp")
+            tmp.write_bytes(self.read(name))
+            os.replace(tmp, target)
+            written.append(target)
+        return written
+
+    def verify(self) -> bool:
+        try:
+            for name in self.members:
+                self.read(name)
+        except ValueError:
+            return False
+        return True
+
+
+def archive_path(archive_dir: Path, run_id: str) -> Path:
+    return Path(archive_dir) / f"{run_id}.zip"
+
+
+def _run_time(run_dir: Path) -> float:
+    """Run start as a POSIX timestamp, from metadata.json or else the directory mtime."""
+    try:
+        meta = json.loads((run_dir / "metadata.json").read_text(encoding="utf-8"))
+        return datetime.fromisoformat(meta["timestamp_utc"].replace("Z", "+00:00")).timestamp()
+    except (OSError, ValueError, KeyError, AttributeError):
+        return run_dir.stat().st_mtime
+
+
+def archive_runs(runs_root: Path, archive_dir: Path, older_than_days: Optional[float] = None,
+                 run_ids: Optional[Iterable[str]] = None, backend=None) -> List[Dict[str, Any]]:
+    """Replace finished run directories by a single bundle each under ``archive_dir``.
+
+    A directory is only removed once its bundle reads back with every
+    member matching its hash. With a storage ``backend`` the bundle is also
+    uploaded and the run's per-file objects are deleted, so the store keeps
+    one object per archived run.
+    """
+    runs_root, archive_dir = Path(runs_root), Path(archive_dir)
+    cutoff = time.time() - older_than_days * 86400 if older_than_days is not None else None
+    selected = list(run_ids) if run_ids is not None else sorted(p.name for p in runs_root.iterdir() if p.is_dir())
+    results = []
+    for run_id in selected:
+        run_dir = runs_root / run_id
+        if not (run_dir / "metadata.json").exists():
+            continue
+        if cutoff is not None and _run_time(run_dir) > cutoff:
+            continue
+        info = write_bundle(run_dir, archive_path(archive_dir, run_id))
+        bundle = RunBundle(Path(info["path"]))
+        if not bundle.verify():
+            Path(info["path"]).unlink(missing_ok=True)
+            results.append({"run_id": run_id, "archived": False, "error": "bundle failed verification"})
+            continue
+        if backend is not None:
+            from pipeline.storage import content_type_for
+
+            backend.put_file(f"runs/{run_id}/{BUNDLE_FILENAME}", Path(info["path"]), content_type_for(BUNDLE_FILENAME))
+            for name in bundle.names():
+                backend.delete(f"runs/{run_id}/{name}")
+        files = len(list(run_dir.iterdir()))
+        shutil.rmtree(run_dir)
+        results.append({"run_id": run_id, "archived": True, "files_removed": files, **info})
+    return results
+
+
+def restore_run(runs_root: Path, archive_dir: Path, run_id: str) -> Path:
+    """Unpack an archived run back into ``runs_root`` and drop its archive."""
+    path = archive_path(archive_dir, run_id)
+    run_dir = Path(runs_root) / run_id
+    RunBundle(path).extract(run_dir)
+    path.unlink()
+    return run_dir
+
+
+def main() -> None:
+    root = Path(__file__).resolve().parent.parent / "artifacts"
+    ap = argparse.ArgumentParser(description="Pack, inspect, archive and restore run bundles")
+    ap.add_argument("--runs", type=Path, default=root / "runs", help="Run directories root")
+    ap.add_argument("--archive-dir", type=Path, default=root / "archive", help="Where archived bundles are kept")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    p = sub.add_parser("pack", help="(Re)write run_bundle.zip inside run directories")
+    p.add_argument("run_ids", nargs="*", help="Runs to pack (default: all)")
+    p = sub.add_parser("ls", help="List the members of a run's bundle")
+    p.add_argument("run_id")
+    p = sub.add_parser("archive", help="Move finished runs into single bundles and delete their directories")
+    p.add_argument("run_ids", nargs="*", help="Runs to archive (default: all, subject to --older-than-days)")
+    p.add_argument("--older-than-days", type=float, default=None)
+    p.add_argument("--upload", action="store_true", help="Also upload the bundle and delete the per-file objects")
+    p = sub.add_parser("restore", help="Unpack an archived run back into its run directory")
+    p.add_argument("run_id")
+    args = ap.parse_args()
+
+    if args.cmd == "pack":
+        run_ids = args.run_ids or sorted(p.name for p in args.runs.iterdir() if (p / "metadata.json").exists())
+        for run_id in run_ids:
+            info = write_bundle(args.runs / run_id)
+            print(f"{run_id}: {info['members']} members, {info['bytes']} bytes")
+    elif args.cmd == "ls":
+        path = args.runs / args.run_id / BUNDLE_FILENAME
+        bundle = RunBundle(path if path.exists() else archive_path(args.archive_dir, args.run_id))
+        print(f"{'member':<28} {'size':>10} {'packed':>10} {'offset':>10}  sha256")
+        for name, m in bundle.members.items():
+            print(f"{name:<28} {m['size']:>10} {m['compressed_size']:>10} {m['offset']:>10}  {m['sha256'][:16]}")
+    elif args.cmd == "archive":
+        backend = None
+        if args.upload:
+            from pipeline.compliance import default_backend
+
+            backend = default_backend()
+        results = archive_runs(args.runs, args.archive_dir, args.older_than_days, args.run_ids or None, backend)
+        archived = [r for r in results if r["archived"]]
+        print(f"Archived {len(archived)} runs ({sum(r['files_removed'] for r in archived)} files removed) "
+              f"into {args.archive_dir}")
+        for r in results:
+            if not r["archived"]:
+                print(f"  {r['run_id']}: {r['error']}")
+    elif args.cmd == "restore":
+        print(f"Restored {restore_run(args.runs, args.archive_dir, args.run_id)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,193 @@
+from __future__ import annotations
+import json, os, shutil, uuid
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Any, Optional, Tuple
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from pipeline.encoding import CategoricalEncoder
+from pipeline.locking import file_lock
+
+DEFAULT_MAX_BYTES = 2 * 1024 ** 3
+
+
+@dataclass
+class CachedDataset:
+    key: str
+    dataset: Dict[str, Any]  # rows/columns/schema of the raw dataset
+    df_clean: pd.DataFrame
+    X: sparse.csr_matrix
+    y: pd.Series
+    encoder: CategoricalEncoder
+
+
+def _dir_size(path: Path) -> int:
+    return sum(p.stat().st_size for p in path.rglob("*") if p.is_file())
+
+
+def _write_frame(frame_dir: Path, df: pd.DataFrame) -> Dict[str, Any]:
+    """Store a frame column by column as .npy files; categoricals as codes."""
+    frame_dir.mkdir(parents=True, exist_ok=True)
+    layout = {"columns": [], "dtypes": {}, "categories": {}}
+    for i, col in enumerate(df.columns):
+        series = df[col]
+        if not isinstance(series.dtype, pd.CategoricalDtype) and not pd.api.types.is_numeric_dtype(series):
+            series = series.astype("category")
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            layout["categories"][col] = [str(c) for c in series.cat.categories]
+            values = series.cat.codes.to_numpy()
+            layout["dtypes"][col] = "category"
+        else:
+            values = series.to_numpy()
+            layout["dtypes"][col] = str(values.dtype)
+        np.save(frame_dir / f"{i}.npy", values)
+        layout["columns"].append(col)
+    return layout
+
+
+def _read_frame(frame_dir: Path, layout: Dict[str, Any]) -> pd.DataFrame:
+    data = {}
+    for i, col in enumerate(layout["columns"]):
+        values = np.load(frame_dir / f"{i}.npy", mmap_mode="r")
+        if layout["dtypes"][col] == "category":
+            data[col] = pd.Categorical.from_codes(values, categories=layout["categories"][col])
+        else:
+            data[col] = values
+    return pd.DataFrame(data, columns=layout["columns"], copy=False)
+
+
+class FeatureCache:
+    """Content-addressed cache of cleaned frames and encoded CSR feature matrices.
+
+    Entries live under ``root/<dataset_sha256>-<transform_version>/`` in a
+    columnar layout of .npy files, so features are loaded memory-mapped rather
+    than re-parsed. Total size is bounded; the least recently used entries are
+    evicted first (recency is tracked through the mtime of ``meta.json``).
+    Entries written for incremental refreshes also hold a sorted row-hash
+    index of the clean frame (see ``pipeline.incremental``).
+    """
+
+    def __init__(self, root: Path, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self.root.mkdir(parents=True, exist_ok=True)
+        self._paths_index = self.root / "paths.json"
+
+    @staticmethod
+    def key(dataset_sha256: str, transform_version: str) -> str:
+        return f"{dataset_sha256}-{transform_version}"
+
+    def _stat_key(self, path: Path) -> str:
+        st = path.stat()
+        return f"{path.resolve()}|{st.st_size}|{st.st_mtime_ns}"
+
+    def known_hash(self, path: Path) -> Optional[str]:
+        """Return the dataset hash recorded for an unchanged file, if any."""
+        if not self._paths_index.exists():
+            return None
+        try:
+            index = json.loads(self._paths_index.read_text(encoding="utf-8"))
+        except ValueError:
+            return None
+        return index.get(self._stat_key(path))
+
+    def remember_hash(self, path: Path, dataset_sha256: str) -> None:
+        # Locked read-modify-write, so concurrent runs do not drop each other's entries.
+        with file_lock(self._paths_index):
+            index = {}
+            if self._paths_index.exists():
+                try:
+                    index = json.loads(self._paths_index.read_text(encoding="utf-8"))
+                except ValueError:
+                    index = {}
+            index[self._stat_key(path)] = dataset_sha256
+            tmp = self._paths_index.with_suffix(f".{uuid.uuid4().hex}.tmp")
+            tmp.write_text(json.dumps(index), encoding="utf-8")
+            os.replace(tmp, self._paths_index)
+
+    def get(self, key: str) -> Optional[CachedDataset]:
+        entry = self.root / key
+        meta_path = entry / "meta.json"
+        if not meta_path.exists():
+            return None
+        meta = json.loads(meta_path.read_text(encoding="utf-8"))
+        os.utime(meta_path)  # mark as recently used
+        df_clean = _read_frame(entry / "clean", meta["clean"])
+        X = sparse.csr_matrix(
+            tuple(np.load(entry / f"X_{part}.npy", mmap_mode="r") for part in ("data", "indices", "indptr")),
+            shape=tuple(meta["shape"]),
+            copy=False,
+        )
+        y = pd.Series(np.load(entry / "y.npy", mmap_mode="r"), name=meta["target"])
+        encoder = CategoricalEncoder.from_dict(meta["encoder"])
+        return CachedDataset(key=key, dataset=meta["dataset"], df_clean=df_clean, X=X, y=y, encoder=encoder)
+
+    def row_index(self, key: str) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        """Sorted row hashes and row positions of an entry's clean frame, if stored."""
+        entry = self.root / key
+        if not (entry / "rows_hash.npy").exists():
+            return None
+        return np.load(entry / "rows_hash.npy", mmap_mode="r"), np.load(entry / "rows_pos.npy", mmap_mode="r")
+
+    def profile_state(self, key: str) -> Optional[Dict[str, np.ndarray]]:
+        """Sketch state of the raw dataset's profile (pipeline.dataprofile), if stored."""
+        path = self.root / key / "profile.npz"
+        if not path.exists():
+            return None
+        with np.load(path) as state:
+            return {name: state[name] for name in state.files}
+
+    def put(
+        self,
+        key: str,
+        dataset: Dict[str, Any],
+        df_clean: pd.DataFrame,
+        X: sparse.csr_matrix,
+        y: pd.Series,
+        encoder: CategoricalEncoder,
+        row_index: Optional[Tuple[np.ndarray, np.ndarray]] = None,
+        profile_state: Optional[Dict[str, np.ndarray]] = None,
+    ) -> None:
+        entry = self.root / key
+        if entry.exists():
+            return
+        tmp = self.root / f".{key}.{uuid.uuid4().hex}.tmp"
+        tmp.mkdir(parents=True)
+        try:
+            meta = {
+                "dataset": dataset,
+                "clean": _write_frame(tmp / "clean", df_clean),
+                "encoder": encoder.to_dict(),
+                "shape": list(X.shape),
+                "target": y.name,
+            }
+            for part in ("data", "indices", "indptr"):
+                np.save(tmp / f"X_{part}.npy", getattr(X, part))
+            np.save(tmp / "y.npy", y.to_numpy())
+            if row_index is not None:
+                np.save(tmp / "rows_hash.npy", row_index[0])
+                np.save(tmp / "rows_pos.npy", row_index[1])
+            if profile_state is not None:
+                np.savez(tmp / "profile.npz", **profile_state)
+            (tmp / "meta.json").write_text(json.dumps(meta), encoding="utf-8")
+            os.replace(tmp, entry)
+        except OSError:
+            shutil.rmtree(tmp, ignore_errors=True)
+            if not entry.exists():
+                raise
+        self.evict()
+
+    def evict(self) -> None:
+        """Drop least recently used entries until the cache fits in max_bytes."""
+        entries = []
+        for d in self.root.iterdir():
+            meta_path = d / "meta.json"
+            if d.is_dir() and meta_path.exists():
+                entries.append((meta_path.stat().st_mtime, _dir_size(d), d))
+        total = sum(size for _, size, _ in entries)
+        for _, size, d in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(d, ignore_errors=True)
+            total -= size
@@ -0,0 +1,188 @@
+from __future__ import annotations
+import argparse, sqlite3
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Any, Iterable, List, Optional, Tuple
+
+SORT_COLUMNS = {
+    "timestamp": "timestamp_utc",
+    "accuracy": "accuracy",
+    "status": "compliance_status",
+    "run_id": "run_id",
+}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id TEXT PRIMARY KEY,
+    timestamp_utc TEXT,
+    accuracy REAL,
+    compliance_status TEXT,
+    dataset_sha256 TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_runs_timestamp ON runs (timestamp_utc);
+CREATE INDEX IF NOT EXISTS idx_runs_accuracy ON runs (accuracy);
+CREATE INDEX IF NOT EXISTS idx_runs_status ON runs (compliance_status, timestamp_utc);
+CREATE INDEX IF NOT EXISTS idx_runs_dataset ON runs (dataset_sha256, timestamp_utc);
+CREATE TABLE IF NOT EXISTS run_spans (
+    run_id TEXT NOT NULL,
+    span TEXT NOT NULL,
+    wall_s REAL,
+    cpu_s REAL,
+    peak_rss_mb REAL,
+    tracemalloc_peak_mb REAL,
+    PRIMARY KEY (run_id, span)
+);
+"""
+
+
+def catalog_row(record: Dict[str, Any]) -> Tuple:
+    """Project a run metadata record onto the catalog columns."""
+    accuracy = (record.get("model", {}).get("metrics") or {}).get("value")
+    return (
+        record["run_id"],
+        record.get("timestamp_utc"),
+        float(accuracy) if accuracy is not None else None,
+        (record.get("compliance") or {}).get("status"),
+        (record.get("dataset") or {}).get("dataset_sha256"),
+    )
+
+
+class RunCatalog:
+    """Embedded SQLite index of runs, so listings never scan run directories."""
+
+    def __init__(self, db_path: Path):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def upsert(self, record: Dict[str, Any]) -> None:
+        self.upsert_many([record])
+
+    def upsert_many(self, records: Iterable[Dict[str, Any]]) -> int:
+        records = [r for r in records if r.get("run_id")]
+        rows = [catalog_row(r) for r in records]
+        with self._connect() as conn:
+            conn.executemany(
+                "INSERT INTO runs (run_id, timestamp_utc, accuracy, compliance_status, dataset_sha256) "
+                "VALUES (?, ?, ?, ?, ?) ON CONFLICT(run_id) DO UPDATE SET "
+                "timestamp_utc=excluded.timestamp_utc, accuracy=excluded.accuracy, "
+                "compliance_status=excluded.compliance_status, dataset_sha256=excluded.dataset_sha256",
+                rows,
+            )
+        self.upsert_profiles(records)
+        return len(rows)
+
+    def upsert_profiles(self, records: Iterable[Dict[str, Any]]) -> None:
+        """Replace the stored profile spans of every record that carries a profile."""
+        with self._connect() as conn:
+            for r in records:
+                spans = (r.get("profile") or {}).get("spans")
+                if not r.get("run_id") or spans is None:
+                    continue
+                conn.execute("DELETE FROM run_spans WHERE run_id = ?", (r["run_id"],))
+                conn.executemany(
+                    "INSERT OR REPLACE INTO run_spans VALUES (?, ?, ?, ?, ?, ?)",
+                    [(r["run_id"], sp["name"], sp.get("wall_s"), sp.get("cpu_s"), sp.get("peak_rss_mb"),
+                      sp.get("tracemalloc_peak_mb")) for sp in spans],
+                )
+
+    def span_aggregates(self) -> List[Dict[str, Any]]:
+        """Per-span totals and maxima over all profiled runs."""
+        with self._connect() as conn:
+            conn.row_factory = sqlite3.Row
+            rows = conn.execute(
+                "SELECT span, COUNT(*) AS count, SUM(wall_s) AS wall_sum, MAX(wall_s) AS wall_max, "
+                "SUM(cpu_s) AS cpu_sum, MAX(peak_rss_mb) AS rss_max, MAX(tracemalloc_peak_mb) AS tracemalloc_max "
+                "FROM run_spans GROUP BY span ORDER BY span"
+            ).fetchall()
+        return [dict(r) for r in rows]
+
+    def status_counts(self) -> Dict[str, int]:
+        with self._connect() as conn:
+            rows = conn.execute("SELECT COALESCE(compliance_status, 'UNKNOWN'), COUNT(*) FROM runs GROUP BY 1")
+            return {status: n for status, n in rows}
+
+    def set_status(self, run_id: str, status: str) -> None:
+        with self._connect() as conn:
+            conn.execute("UPDATE runs SET compliance_status = ? WHERE run_id = ?", (status, run_id))
+
+    def rebuild_from_log(self, log_path: Path) -> int:
+        """Re-index every record of the global run log directory (later records win)."""
+        from pipeline.runlog import RunLog
+
+        records = list(RunLog(Path(log_path)).records())
+        with self._connect() as conn:
+            conn.execute("DELETE FROM runs")
+        return self.upsert_many(records)
+
+    def count(self) -> int:
+        with self._connect() as conn:
+            return conn.execute("SELECT COUNT(*) FROM runs").fetchone()[0]
+
+    def run_ids(self, since: Optional[str] = None) -> set:
+        """All catalogued run ids, optionally only those at or after an ISO timestamp."""
+        with self._connect() as conn:
+            if since:
+                rows = conn.execute("SELECT run_id FROM runs WHERE timestamp_utc >= ?", (since,))
+            else:
+                rows = conn.execute("SELECT run_id FROM runs")
+            return {r[0] for r in rows}
+
+    def query(
+        self,
+        limit: int = 50,
+        offset: int = 0,
+        sort: str = "timestamp",
+        descending: bool = True,
+        status: Optional[str] = None,
+        dataset_sha256: Optional[str] = None,
+        min_accuracy: Optional[float] = None,
+    ) -> Tuple[List[Dict[str, Any]], int]:
+        """Return one page of runs plus the total number of matching runs."""
+        column = SORT_COLUMNS.get(sort)
+        if column is None:
+            raise ValueError(f"Unknown sort key {sort!r}; expected one of {sorted(SORT_COLUMNS)}")
+        where, params = [], []
+        if status:
+            where.append("compliance_status = ?")
+            params.append(status)
+        if dataset_sha256:
+            where.append("dataset_sha256 = ?")
+            params.append(dataset_sha256)
+        if min_accuracy is not None:
+            where.append("accuracy >= ?")
+            params.append(min_accuracy)
+        clause = f"WHERE {' AND '.join(where)}" if where else ""
+        order = "DESC" if descending else "ASC"
+        with self._connect() as conn:
+            conn.row_factory = sqlite3.Row
+            total = conn.execute(f"SELECT COUNT(*) FROM runs {clause}", params).fetchone()[0]
+            rows = conn.execute(
+                f"SELECT * FROM runs {clause} ORDER BY {column} {order}, run_id {order} LIMIT ? OFFSET ?",
+                [*params, limit, offset],
+            ).fetchall()
+        return [dict(r) for r in rows], total
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Maintain the SQLite run catalog")
+    ap.add_argument("--db", type=str, default="artifacts/catalog.sqlite", help="Catalog database path")
+    ap.add_argument("--log", type=str, default="artifacts/run_log", help="Global run log directory to rebuild from")
+    args = ap.parse_args()
+    n = RunCatalog(Path(args.db)).rebuild_from_log(Path(args.log))
+    print(f"Rebuilt catalog {args.db} with {n} runs from {args.log}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,15 @@
 from __future__ import annotations
 from dataclasses import dataclass, asdict
-from typing import Dict, Any, List
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Any, List, Tuple
 from pathlib import Path
-import json
+import json, time
 from datetime import datetime
 import pytz
 
+# Bump whenever a check is added or its logic changes, so bulk re-checks
+# re-evaluate runs whose artifacts have not changed.
+CHECK_SUITE_VERSION = "7"
 
 @dataclass
 class Finding:
@@ -14,106 +18,155 @@ class Finding:
     severity: str  # "BLOCKER", "WARN", "INFO"
     passed: bool
     details: str
+    duration_ms: float | None = None
 
 
-def run_checks(meta: Dict[str, Any], run_dir: Path) -> List[Finding]:
-    """Run basic compliance checks against metadata."""
-    findings: List[Finding] = []
-
-    # 1. Run ID
-    findings.append(
-        Finding(
-            id="CHECK-001",
-            title="Run ID present",
-            severity="BLOCKER",
-            passed=bool(meta.get("run_id")),
-            details="Each run must have a unique identifier.",
-        )
-    )
-
-    # 2. Dataset hash
-    dataset = meta.get("dataset", {})
-    findings.append(
-        Finding(
-            id="CHECK-002",
-            title="Dataset fingerprint exists",
-            severity="BLOCKER",
-            passed=bool(dataset.get("dataset_sha256")),
-            details="Dataset SHA-256 must be logged for reproducibility.",
-        )
-    )
-
-    # 3. Model metrics
-    model = meta.get("model", {})
-    metric_val = (model.get("metrics") or {}).get("value")
-    findings.append(
-        Finding(
-            id="CHECK-003",
-            title="Model metrics recorded",
-            severity="BLOCKER",
-            passed=metric_val is not None,
-            details="At least one evaluation metric must be saved.",
-        )
-    )
-
-    # 4. Model artifact
-    artifact_path = model.get("artifact_path")
-    findings.append(
-        Finding(
-            id="CHECK-004",
-            title="Model artifact saved",
-            severity="WARN",
-            passed=artifact_path and Path(artifact_path).exists(),
-            details="All artefacts (model, dataset card, model card, run report) must be saved for auditability and reproducibility.",
-        )
-    )
-
-    # 5. Global log exists
-    global_log = run_dir.parent.parent / "run_log.jsonl"
-    findings.append(
-        Finding(
-            id="CHECK-005",
-            title="Global run log exists",
-            severity="WARN",
-            passed=global_log.exists(),
-            details="Append-only diary of all runs must exist.",
-        )
-    )
-
-    # 6. Transformation metadata
+@dataclass(frozen=True)
+class CheckSpec:
+    id: str
+    title: str
+    severity: str
+    details: str
+    fn: Callable[[Dict[str, Any], Path], bool]
+    depends_on: Tuple[str, ...] = ()  # artifacts read from disk; empty = metadata only
+
+
+CHECKS: Dict[str, CheckSpec] = {}
+
+
+def register_check(id: str, title: str, severity: str, details: str, depends_on: Tuple[str, ...] = ()):
+    """Decorator adding a check to the registry; the function returns pass/fail."""
+    def decorator(fn: Callable[[Dict[str, Any], Path], bool]):
+        CHECKS[id] = CheckSpec(id=id, title=title, severity=severity, details=details, fn=fn, depends_on=depends_on)
+        return fn
+    return decorator
+
+
+# 1. Run ID
+@register_check("CHECK-001", "Run ID present", "BLOCKER", "Each run must have a unique identifier.")
+def _run_id_present(meta: Dict[str, Any], run_dir: Path) -> bool:
+    return bool(meta.get("run_id"))
+
+
+# 2. Dataset hash
+@register_check("CHECK-002", "Dataset fingerprint exists", "BLOCKER",
+                "Dataset SHA-256 must be logged for reproducibility.")
+def _dataset_fingerprint(meta: Dict[str, Any], run_dir: Path) -> bool:
+    return bool(meta.get("dataset", {}).get("dataset_sha256"))
+
+
+# 3. Model metrics
+@register_check("CHECK-003", "Model metrics recorded", "BLOCKER", "At least one evaluation metric must be saved.")
+def _metrics_recorded(meta: Dict[str, Any], run_dir: Path) -> bool:
+    return (meta.get("model", {}).get("metrics") or {}).get("value") is not None
+
+
+# 4. Model artifact
+@register_check("CHECK-004", "Model artifact saved", "WARN",
+                "All artefacts (model, dataset card, model card, run report) must be saved for auditability and reproducibility.",
+                depends_on=("model.joblib",))
+def _model_artifact_saved(meta: Dict[str, Any], run_dir: Path) -> bool:
+    artifact_path = meta.get("model", {}).get("artifact_path")
+    return bool(artifact_path and Path(artifact_path).exists())
+
+
+# 5. Global log exists
+@register_check("CHECK-005", "Global run log exists", "WARN", "Append-only diary of all runs must exist.",
+                depends_on=("run_log",))
+def _global_log_exists(meta: Dict[str, Any], run_dir: Path) -> bool:
+    from pipeline.runlog import RunLog
+
+    return RunLog(run_dir.parent.parent / "run_log").exists()
+
+
+# 6. Transformation metadata
+@register_check("CHECK-006", "Transformation metadata exists and data cleaned", "WARN",
+                "Transformation step metadata (rows_after_clean, features, splits) must be present and data must be cleaned for reproducibility.")
+def _transform_metadata(meta: Dict[str, Any], run_dir: Path) -> bool:
     transform = meta.get("transform")
     rows_cleaned = transform.get("rows_after_clean") if transform else None
-    findings.append(
-        Finding(
-            id="CHECK-006",
-            title="Transformation metadata exists and data cleaned",
-            severity="WARN",
-            passed=transform is not None and isinstance(rows_cleaned, int) and rows_cleaned > 0,
-            details="Transformation step metadata (rows_after_clean, features, splits) must be present and data must be cleaned for reproducibility.",
-        )
-    )
-
-        # 7. Model card integrity
-    model_card_path = run_dir / "model_card.md"
-    expected_hash = meta.get("model_card_hash")
-    actual_hash = None
-    if model_card_path.exists():
-        try:
-            from pipeline.compliance import sha256_of_file
-            actual_hash = sha256_of_file(model_card_path)
-        except Exception:
-            actual_hash = None
-    findings.append(
-        Finding(
-            id="CHECK-007",
-            title="Model card integrity",
-            severity="BLOCKER",
-            passed=(expected_hash is not None and actual_hash == expected_hash),
-            details="Model card hash must match the value saved at creation. Tampering will trigger a FAIL verdict.",
-        )
-    )
-
-    return findings
+    return transform is not None and isinstance(rows_cleaned, int) and rows_cleaned > 0
+
+
+# 7. Model card integrity
+@register_check("CHECK-007", "Model card integrity", "BLOCKER",
+                "Model card hash must match the value saved at creation. Tampering will trigger a FAIL verdict.",
+                depends_on=("model_card.md",))
+def _model_card_integrity(meta: Dict[str, Any], run_dir: Path) -> bool:
+    return _artifact_matches(run_dir, "model_card.md", meta.get("model_card_hash"))
+
+
+# 8. Model artifact integrity
+@register_check("CHECK-008", "Model artifact integrity", "WARN",
+                "model.joblib, encoder.json and (when exported) model.lrm hashes must match the values recorded at "
+                "training time. Runs from before artifact hashes were recorded have nothing to compare and pass.",
+                depends_on=("model.joblib", "encoder.json", "model.lrm"))
+def _model_artifact_integrity(meta: Dict[str, Any], run_dir: Path) -> bool:
+    if "artifact_hashes" not in meta:
+        return True
+    from pipeline.hashing import HashManifest
+
+    recorded = meta["artifact_hashes"] or {}
+    names = ["model.joblib", "encoder.json", *(n for n in recorded if n == "model.lrm")]
+    manifest = HashManifest.for_run(run_dir)
+    try:
+        return all(_artifact_matches(run_dir, name, recorded.get(name), manifest) for name in names)
+    finally:
+        if manifest.misses:
+            manifest.save()
+
+
+def _artifact_matches(run_dir: Path, name: str, expected_hash: str | None, manifest=None) -> bool:
+    """Compare a run artifact's SHA-256 against its recorded hash.
+
+    With a ``manifest`` (pipeline.hashing.HashManifest) the stored digest is
+    reused while the file's stat signature is unchanged, so large artifacts
+    are rehashed only after they change. Without one every byte is read,
+    which is what the model card check needs to catch tampering that
+    restores size and mtime.
+    """
+    path = run_dir / name
+    if expected_hash is None or not path.exists():
+        return False
+    from pipeline.hashing import sha256_of_file
+
+    try:
+        return (manifest.hash(path) if manifest is not None else sha256_of_file(path)) == expected_hash
+    except OSError:
+        return False
+
+
+def _evaluate(spec: CheckSpec, meta: Dict[str, Any], run_dir: Path) -> Finding:
+    start = time.perf_counter()
+    details = spec.details
+    try:
+        passed = bool(spec.fn(meta, run_dir))
+    except Exception as e:  # a broken check fails closed instead of aborting the suite
+        passed = False
+        details = f"{spec.details} (check raised {type(e).__name__}: {e})"
+    duration_ms = round((time.perf_counter() - start) * 1000, 3)
+    return Finding(id=spec.id, title=spec.title, severity=spec.severity, passed=passed,
+                   details=details, duration_ms=duration_ms)
+
+
+def run_checks(meta: Dict[str, Any], run_dir: Path, max_workers: int = 8) -> List[Finding]:
+    """Run every registered compliance check against a run's metadata.
+
+    Metadata-only checks run inline; checks that declare artifact
+    dependencies do I/O and run concurrently on a thread pool. Findings are
+    returned in check-id order with per-check wall time in ``duration_ms``.
+    """
+    specs = sorted(CHECKS.values(), key=lambda c: c.id)
+    io_specs = [c for c in specs if c.depends_on]
+    results: Dict[str, Finding] = {}
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(io_specs)))) as pool:
+        futures = {c.id: pool.submit(_evaluate, c, meta, run_dir) for c in io_specs}
+        for c in specs:
+            if not c.depends_on:
+                results[c.id] = _evaluate(c, meta, run_dir)
+        for check_id, fut in futures.items():
+            results[check_id] = fut.result()
+    return [results[c.id] for c in specs]
 
 
 def write_findings(run_dir: Path, findings: List[Finding]) -> str:
@@ -1,61 +1,67 @@
-import json, uuid, hashlib, os
+import json, uuid, os
 from datetime import datetime, timezone
+from functools import lru_cache
 from pathlib import Path
-from typing import Dict, Any
-from azure.storage.blob import BlobServiceClient, ContentSettings
+from typing import Dict, Any, Optional
+from pipeline.hashing import sha256_of_file  # noqa: F401 (re-exported)
+from pipeline.locking import append_line
+from pipeline.storage import StorageBackend, AzureBlobBackend, LocalBackend, MemoryBackend, content_type_for
 
 
 AZURE_CONN_STR = os.getenv("AZURE_STORAGE_CONNECTION_STRING")
 AZURE_CONTAINER = "artifacts"
 
-# Initialize blob service
-blob_service = None
-if AZURE_CONN_STR:
+
+@lru_cache(maxsize=None)
+def get_blob_service():
+    """Create the blob service client (and container) on first use, then reuse it.
+
+    Kept out of import time so that importing this module never touches the
+    network or loads the Azure SDK.
+    """
+    if not AZURE_CONN_STR:
+        return None
+    from azure.storage.blob import BlobServiceClient
+
     blob_service = BlobServiceClient.from_connection_string(AZURE_CONN_STR)
     try:
         blob_service.create_container(AZURE_CONTAINER)
     except Exception:
-        pass  
+        pass
+    return blob_service
+
+
+@lru_cache(maxsize=None)
+def default_backend() -> Optional[StorageBackend]:
+    """Storage backend for run artifacts, chosen by STORAGE_BACKEND (azure|local|memory)."""
+    kind = os.getenv("STORAGE_BACKEND", "azure")
+    if kind == "local":
+        return LocalBackend(Path(os.getenv("STORAGE_LOCAL_ROOT", "artifacts/storage")))
+    if kind == "memory":
+        return MemoryBackend()
+    blob_service = get_blob_service()
+    if blob_service is None:
+        return None
+    return AzureBlobBackend(blob_service, AZURE_CONTAINER)
 
 
 def upload_to_blob(run_id: str, filename: str, data: bytes | str | Dict[str, Any]):
     """Upload a file, string, or dict to Azure Blob Storage with correct content type."""
-    if blob_service is None:
+    backend = default_backend()
+    if backend is None:
         print("No Azure Blob connection. Skipping upload.")
         return
 
-    blob_client = blob_service.get_blob_client(
-        container=AZURE_CONTAINER,
-        blob=f"runs/{run_id}/{filename}"
-    )
-
-    
-    if filename.endswith(".json"):
-        content_type = "application/json"
-    elif filename.endswith(".txt"):
-        content_type = "text/plain"
-    elif filename.endswith(".md"):
-        content_type = "text/markdown"
-    elif filename.endswith(".joblib"):
-        content_type = "application/octet-stream" 
-    else:
-        content_type = "application/octet-stream"
-
-    
+    content_type = content_type_for(filename)
+
     if isinstance(data, dict):
         data = json.dumps(data, indent=2)
 
-    
     if isinstance(data, str):
         data = data.encode("utf-8")
 
-   
-    blob_client.upload_blob(
-        data,
-        overwrite=True,
-        content_settings=ContentSettings(content_type=content_type)
-    )
-    print(f"✅ Uploaded {filename} to Azure Blob with type {content_type}")
+    backend.put_bytes(f"runs/{run_id}/{filename}", data, content_type)
+    print(f"✅ Uploaded {filename} to {backend.name} storage with type {content_type}")
 
 
 def new_run_id() -> str:
@@ -68,20 +74,14 @@ def utc_now_iso() -> str:
     return datetime.now(timezone.utc).isoformat()
 
 
-def sha256_of_file(path: Path) -> str:
-    """Compute SHA-256 hash of a file (like a fingerprint)."""
-    h = hashlib.sha256()
-    with path.open('rb') as f:
-        for chunk in iter(lambda: f.read(8192), b''):
-            h.update(chunk)
-    return h.hexdigest()
-
-
 def append_jsonl(log_path: Path, obj: Dict[str, Any]) -> None:
-    """Append a JSON object as one line to a .jsonl file."""
+    """Append a JSON object as one line to a .jsonl file.
+
+    Safe with concurrent writers (e.g. batch-mode workers): the line is
+    written in one call while holding an exclusive lock on the file.
+    """
     log_path.parent.mkdir(parents=True, exist_ok=True)
-    with log_path.open('a', encoding='utf-8') as f:
-        f.write(json.dumps(obj, ensure_ascii=False) + '\n')
+    append_line(log_path, json.dumps(obj, ensure_ascii=False))
 
 
 def write_json(path: Path, obj: Dict[str, Any]) -> None:
@@ -0,0 +1,472 @@
+from __future__ import annotations
+import argparse, json, math
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+import numpy as np
+import pandas as pd
+
+# Column statistics built in one pass over parsed chunks. Every statistic is
+# mergeable: exact counts/min/max/moments (Chan's parallel update), a
+# KLL-style quantile sketch, a HyperLogLog distinct count and a Misra-Gries
+# heavy-hitter summary. Chunks can therefore be profiled independently (in
+# parallel) and folded together, and a stored profile can be extended by the
+# rows appended to a dataset without re-reading the rest.
+PROFILE_VERSION = "1"
+QUANTILES = [0.0, 0.01, 0.05, 0.1, 0.2, 0.25, 0.3, 0.4, 0.5, 0.6, 0.7, 0.75, 0.8, 0.9, 0.95, 0.99, 1.0]
+DECILES = [0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9]  # numeric PSI bins, all in QUANTILES
+QUANTILE_K = 256
+HLL_PRECISION = 12
+TOP_K_CAPACITY = 64
+TOP_K_REPORTED = 10
+# Population stability index bands: < 0.1 stable, 0.1-0.25 moderate shift, > 0.25 major shift.
+PSI_MODERATE = 0.1
+PSI_MAJOR = 0.25
+NULL_RATE_TOLERANCE = 0.05
+_EPS = 1e-4
+
+
+class QuantileSketch:
+    """KLL-style compactor hierarchy: level h holds items of weight 2**h.
+
+    A level over its capacity is sorted and every other item is promoted,
+    alternating the kept offset so compactions do not bias the ranks. Rank
+    error is about 1% at k=256; streams of up to ``k`` items stay exact.
+    """
+
+    def __init__(self, k: int = QUANTILE_K):
+        self.k = k
+        self.n = 0
+        self.levels: List[np.ndarray] = [np.empty(0)]
+        self._offset = 0
+
+    def _capacity(self, h: int) -> int:
+        return max(2, int(math.ceil(self.k * (2 / 3) ** (len(self.levels) - h - 1))))
+
+    def _compress(self) -> None:
+        h = 0
+        while h < len(self.levels):
+            level = self.levels[h]
+            if len(level) > self._capacity(h):
+                if h + 1 == len(self.levels):
+                    self.levels.append(np.empty(0))
+                level = np.sort(level)
+                keep = level[len(level) - len(level) % 2:]
+                promoted = level[self._offset:len(level) - len(keep):2]
+                self._offset ^= 1
+                self.levels[h + 1] = np.concatenate([self.levels[h + 1], promoted])
+                self.levels[h] = keep
+                h = 0  # capacities shift when a level is added
+                continue
+            h += 1
+
+    def update(self, values: np.ndarray) -> None:
+        if len(values):
+            self.levels[0] = np.concatenate([self.levels[0], np.asarray(values, dtype=np.float64)])
+            self.n += len(values)
+            self._compress()
+
+    def merge(self, other: "QuantileSketch") -> None:
+        for h, level in enumerate(other.levels):
+            if h == len(self.levels):
+                self.levels.append(np.empty(0))
+            self.levels[h] = np.concatenate([self.levels[h], level])
+        self.n += other.n
+        self._compress()
+
+    def quantiles(self, qs: Iterable[float]) -> List[Optional[float]]:
+        qs = list(qs)
+        if not self.n:
+            return [None] * len(qs)
+        items = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(len(level), 2.0 ** h) for h, level in enumerate(self.levels)])
+        order = np.argsort(items, kind="stable")
+        items, cum = items[order], np.cumsum(weights[order])
+        idx = np.searchsorted(cum, np.asarray(qs) * cum[-1], side="left")
+        return [float(items[min(i, len(items) - 1)]) for i in idx]
+
+
+def _clz64(w: np.ndarray) -> np.ndarray:
+    """Leading zero bits of each uint64 (64 for zero)."""
+    n = np.zeros(len(w), dtype=np.uint8)
+    for shift in (32, 16, 8, 4, 2, 1):
+        mask = w < (np.uint64(1) << np.uint64(64 - shift))
+        n[mask] += shift
+        w = np.where(mask, w << np.uint64(shift), w)
+    return n + (w == 0)
+
+
+class HyperLogLog:
+    """Distinct-count sketch over 64-bit value hashes; merging takes the register-wise max."""
+
+    def __init__(self, precision: int = HLL_PRECISION):
+        self.p = precision
+        self.registers = np.zeros(1 << precision, dtype=np.uint8)
+
+    def update_hashes(self, hashes: np.ndarray) -> None:
+        if not len(hashes):
+            return
+        hashes = np.asarray(hashes, dtype=np.uint64)
+        idx = (hashes >> np.uint64(64 - self.p)).astype(np.intp)
+        rank = np.minimum(_clz64(hashes << np.uint64(self.p)) + 1, 64 - self.p + 1).astype(np.uint8)
+        np.maximum.at(self.registers, idx, rank)
+
+    def merge(self, other: "HyperLogLog") -> None:
+        np.maximum(self.registers, other.registers, out=self.registers)
+
+    def estimate(self) -> int:
+        m = len(self.registers)
+        raw = 0.7213 / (1 + 1.079 / m) * m * m / np.sum(np.ldexp(1.0, -self.registers.astype(np.int64)))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if raw <= 2.5 * m and zeros:
+            return int(round(m * math.log(m / zeros)))  # linear counting for small cardinalities
+        return int(round(raw))
+
+
+class TopK:
+    """Misra-Gries heavy hitters; counts are exact while fewer than ``capacity`` values were seen."""
+
+    def __init__(self, capacity: int = TOP_K_CAPACITY):
+        self.capacity = capacity
+        self.counts: Dict[str, int] = {}
+        self.exact = True
+
+    def update_counts(self, counts: Dict[str, int]) -> None:
+        for value, c in counts.items():
+            self.counts[value] = self.counts.get(value, 0) + int(c)
+        if len(self.counts) > self.capacity:
+            cut = sorted(self.counts.values(), reverse=True)[self.capacity]
+            self.counts = {v: c - cut for v, c in self.counts.items() if c > cut}
+            self.exact = False
+
+    def merge(self, other: "TopK") -> None:
+        self.exact = self.exact and other.exact
+        self.update_counts(other.counts)
+
+    def top(self, n: int) -> List[tuple]:
+        return sorted(self.counts.items(), key=lambda kv: (-kv[1], kv[0]))[:n]
+
+
+def _hash_values(values: np.ndarray) -> np.ndarray:
+    return pd.util.hash_array(values, categorize=False)
+
+
+class ColumnProfile:
+    def __init__(self, kind: str):
+        self.kind = kind  # "numeric" or "categorical"
+        self.count = 0  # non-null values
+        self.nulls = 0
+        self.distinct = HyperLogLog()
+        if kind == "numeric":
+            self.min, self.max, self.mean, self.m2 = math.inf, -math.inf, 0.0, 0.0
+            self.sketch = QuantileSketch()
+        else:
+            self.top = TopK()
+
+    def update(self, series: pd.Series) -> None:
+        if self.kind == "numeric":
+            values = series.to_numpy(dtype=np.float64, na_value=np.nan)
+            valid = values[~np.isnan(values)]
+            self.nulls += len(values) - len(valid)
+            if len(valid):
+                mean = float(valid.mean())
+                self._merge_moments(len(valid), mean, float(np.square(valid - mean).sum()))
+                self.min, self.max = min(self.min, float(valid.min())), max(self.max, float(valid.max()))
+                self.sketch.update(valid)
+                self.distinct.update_hashes(_hash_values(valid))
+            return
+        cat = series if isinstance(series.dtype, pd.CategoricalDtype) else series.astype("category")
+        codes = cat.cat.codes.to_numpy()
+        valid = codes[codes >= 0]
+        self.nulls += len(codes) - len(valid)
+        self.count += len(valid)
+        categories = cat.cat.categories.astype(str).to_numpy(dtype=object)
+        # Hash each category once and index by code instead of hashing every row.
+        self.distinct.update_hashes(_hash_values(categories)[np.unique(valid)])
+        freq = np.bincount(valid, minlength=len(categories))
+        self.top.update_counts({categories[i]: int(freq[i]) for i in np.flatnonzero(freq)})
+
+    def _merge_moments(self, n: int, mean: float, m2: float) -> None:
+        total = self.count + n
+        delta = mean - self.mean
+        self.m2 += m2 + delta * delta * self.count * n / total
+        self.mean += delta * n / total
+        self.count = total
+
+    def merge(self, other: "ColumnProfile") -> None:
+        self.nulls += other.nulls
+        self.distinct.merge(other.distinct)
+        if self.kind == "numeric":
+            if other.count:
+                self._merge_moments(other.count, other.mean, other.m2)
+                self.min, self.max = min(self.min, other.min), max(self.max, other.max)
+            self.sketch.merge(other.sketch)
+        else:
+            self.count += other.count
+            self.top.merge(other.top)
+
+    def summary(self, rows: int) -> Dict[str, Any]:
+        out: Dict[str, Any] = {
+            "kind": self.kind,
+            "count": self.count,
+            "nulls": self.nulls,
+            "null_rate": self.nulls / rows if rows else 0.0,
+            "distinct": min(self.distinct.estimate(), self.count),
+        }
+        if self.kind == "numeric":
+            has = self.count > 0
+            out.update({
+                "min": self.min if has else None,
+                "max": self.max if has else None,
+                "mean": self.mean if has else None,
+                "std": math.sqrt(self.m2 / (self.count - 1)) if self.count > 1 else None,
+                "quantiles": dict(zip((str(q) for q in QUANTILES), self.sketch.quantiles(QUANTILES))),
+            })
+            if has:  # the extremes are known exactly, compaction may have dropped them from the sketch
+                out["quantiles"]["0.0"], out["quantiles"]["1.0"] = self.min, self.max
+        else:
+            out["top"] = [{"value": v, "count": c, "share": c / self.count if self.count else 0.0}
+                          for v, c in self.top.top(TOP_K_REPORTED)]
+            out["top_exact"] = self.top.exact
+        return out
+
+
+def _kind(dtype) -> str:
+    if pd.api.types.is_bool_dtype(dtype) or not pd.api.types.is_numeric_dtype(dtype):
+        return "categorical"
+    return "numeric"
+
+
+class DatasetProfile:
+    """Per-column profile of a dataset, built from chunks and mergeable with other profiles."""
+
+    def __init__(self):
+        self.rows = 0
+        self.columns: Dict[str, ColumnProfile] = {}
+
+    def update(self, chunk: pd.DataFrame) -> "DatasetProfile":
+        self.rows += len(chunk)
+        for col in chunk.columns:
+            if col not in self.columns:
+                self.columns[col] = ColumnProfile(_kind(chunk[col].dtype))
+            self.columns[col].update(chunk[col])
+        return self
+
+    def merge(self, other: "DatasetProfile") -> "DatasetProfile":
+        self.rows += other.rows
+        for col, profile in other.columns.items():
+            if col in self.columns:
+                self.columns[col].merge(profile)
+            else:
+                self.columns[col] = profile
+        return self
+
+    def summary(self) -> Dict[str, Any]:
+        """JSON-ready statistics for metadata.json and the dataset card."""
+        return {
+            "version": PROFILE_VERSION,
+            "rows": self.rows,
+            "columns": {col: p.summary(self.rows) for col, p in self.columns.items()},
+        }
+
+    def to_arrays(self) -> Dict[str, np.ndarray]:
+        """Full sketch state as named arrays (see FeatureCache.put(profile_state=...))."""
+        meta: Dict[str, Any] = {"version": PROFILE_VERSION, "rows": self.rows, "columns": []}
+        arrays: Dict[str, np.ndarray] = {}
+        for i, (col, p) in enumerate(self.columns.items()):
+            entry = {"name": col, "kind": p.kind, "count": p.count, "nulls": p.nulls}
+            arrays[f"hll_{i}"] = p.distinct.registers
+            if p.kind == "numeric":
+                entry.update({"min": p.min, "max": p.max, "mean": p.mean, "m2": p.m2,
+                              "sketch_n": p.sketch.n, "levels": len(p.sketch.levels)})
+                for h, level in enumerate(p.sketch.levels):
+                    arrays[f"kll_{i}_{h}"] = level
+            else:
+                entry.update({"top": p.top.counts, "top_exact": p.top.exact})
+            meta["columns"].append(entry)
+        arrays["meta"] = np.array(json.dumps(meta))
+        return arrays
+
+    @classmethod
+    def from_arrays(cls, arrays) -> Optional["DatasetProfile"]:
+        meta = json.loads(str(arrays["meta"]))
+        if meta.get("version") != PROFILE_VERSION:
+            return None
+        profile = cls()
+        profile.rows = meta["rows"]
+        for i, entry in enumerate(meta["columns"]):
+            p = ColumnProfile(entry["kind"])
+            p.count, p.nulls = entry["count"], entry["nulls"]
+            p.distinct.registers = np.array(arrays[f"hll_{i}"], dtype=np.uint8)
+            if p.kind == "numeric":
+                p.min, p.max, p.mean, p.m2 = entry["min"], entry["max"], entry["mean"], entry["m2"]
+                p.sketch.n = entry["sketch_n"]
+                p.sketch.levels = [np.array(arrays[f"kll_{i}_{h}"]) for h in range(entry["levels"])]
+            else:
+                p.top.counts, p.top.exact = dict(entry["top"]), entry["top_exact"]
+            profile.columns[entry["name"]] = p
+        return profile
+
+
+def profile_chunks(chunks: Iterable[pd.DataFrame], workers: int = 1) -> DatasetProfile:
+    """Profile each chunk on its own and fold the partial profiles together in chunk order.
+
+    With ``workers > 1`` chunks are profiled by a thread pool while the
+    caller keeps producing them; results do not depend on ``workers``.
+    """
+    total = DatasetProfile()
+    if workers <= 1:
+        for chunk in chunks:
+            total.merge(DatasetProfile().update(chunk))
+        return total
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        pending = []
+        for chunk in chunks:
+            pending.append(pool.submit(DatasetProfile().update, chunk))
+            while len(pending) > workers:  # bound the chunks held in memory
+                total.merge(pending.pop(0).result())
+        for future in pending:
+            total.merge(future.result())
+    return total
+
+
+# ---------------------------------------------------------------------------
+# Drift between two stored profiles
+# ---------------------------------------------------------------------------
+
+def _psi(ref: np.ndarray, cur: np.ndarray) -> float:
+    ref, cur = np.clip(ref, _EPS, None), np.clip(cur, _EPS, None)
+    return float(np.sum((cur - ref) * np.log(cur / ref)))
+
+
+def _cdf(quantiles: Dict[str, Optional[float]], x: np.ndarray) -> np.ndarray:
+    """Fraction of values <= x, interpolated from a profile's stored quantiles."""
+    points = [(float(q), v) for q, v in quantiles.items() if v is not None]
+    qs = np.array([q for q, _ in points])
+    vs = np.array([v for _, v in points])
+    # np.interp needs increasing x; for repeated values take the highest rank.
+    vs, last = np.unique(vs[::-1], return_index=True)
+    return np.interp(x, vs, qs[::-1][last], left=0.0, right=1.0)
+
+
+def _numeric_psi(ref: Dict[str, Any], cur: Dict[str, Any]) -> Optional[float]:
+    if ref["count"] == 0 or cur["count"] == 0:
+        return None
+    edges = np.unique([ref["quantiles"][str(q)] for q in DECILES if ref["quantiles"].get(str(q)) is not None])
+    ref_cdf = np.concatenate([[0.0], _cdf(ref["quantiles"], edges), [1.0]])
+    cur_cdf = np.concatenate([[0.0], _cdf(cur["quantiles"], edges), [1.0]])
+    return _psi(np.diff(ref_cdf), np.diff(cur_cdf))
+
+
+def _categorical_psi(ref: Dict[str, Any], cur: Dict[str, Any]) -> Optional[float]:
+    if ref["count"] == 0 or cur["count"] == 0:
+        return None
+    values = sorted({t["value"] for t in ref["top"]} | {t["value"] for t in cur["top"]})
+    shares = []
+    for side in (ref, cur):
+        known = {t["value"]: t["share"] for t in side["top"]}
+        row = [known.get(v, 0.0) for v in values]
+        shares.append(row + [max(0.0, 1.0 - sum(row))])  # everything outside the reported values
+    return _psi(np.array(shares[0]), np.array(shares[1]))
+
+
+def compare_profiles(reference: Dict[str, Any], current: Dict[str, Any], threshold: float = PSI_MAJOR,
+                     null_tolerance: float = NULL_RATE_TOLERANCE) -> Dict[str, Any]:
+    """Drift of ``current`` against ``reference``, both ``DatasetProfile.summary()`` dicts.
+
+    Each shared column gets a population stability index (numeric columns
+    over the reference deciles, categorical ones over their top values) and
+    its change in null rate. A column drifts when its PSI exceeds
+    ``threshold`` or its null rate moves by more than ``null_tolerance``.
+    """
+    ref_cols, cur_cols = reference["columns"], current["columns"]
+    columns: Dict[str, Any] = {}
+    for col in [c for c in ref_cols if c in cur_cols]:
+        ref, cur = ref_cols[col], cur_cols[col]
+        if ref["kind"] != cur["kind"]:
+            columns[col] = {"kind": f"{ref['kind']}->{cur['kind']}", "psi": None, "null_rate_delta": None,
+                            "status": "type changed"}
+            continue
+        psi = _numeric_psi(ref, cur) if ref["kind"] == "numeric" else _categorical_psi(ref, cur)
+        null_delta = cur["null_rate"] - ref["null_rate"]
+        if (psi is not None and psi > threshold) or abs(null_delta) > null_tolerance:
+            status = "drift"
+        elif psi is not None and psi > PSI_MODERATE:
+            status = "moderate"
+        else:
+            status = "stable"
+        columns[col] = {"kind": ref["kind"], "psi": psi, "null_rate_delta": null_delta, "status": status}
+    added = [c for c in cur_cols if c not in ref_cols]
+    removed = [c for c in ref_cols if c not in cur_cols]
+    drifted = [c for c, r in columns.items() if r["status"] in ("drift", "type changed")]
+    psis = [r["psi"] for r in columns.values() if r["psi"] is not None]
+    return {
+        "reference_rows": reference["rows"],
+        "current_rows": current["rows"],
+        "threshold": threshold,
+        "columns": columns,
+        "added_columns": added,
+        "removed_columns": removed,
+        "drifted": drifted,
+        "max_psi": max(psis) if psis else None,
+        "passed": not drifted and not added and not removed,
+    }
+
+
+def load_run_profile(run_id: str, runs_root: Path, archive_dir: Optional[Path] = None) -> Dict[str, Any]:
+    """The dataset profile stored in a run's metadata.json (run directory or archived bundle)."""
+    path = Path(runs_root) / run_id / "metadata.json"
+    if path.exists():
+        meta = json.loads(path.read_text(encoding="utf-8"))
+    else:
+        from pipeline.bundle import RunBundle, archive_path
+
+        archived = archive_path(archive_dir, run_id) if archive_dir else None
+        if archived is None or not archived.exists():
+            raise FileNotFoundError(f"No metadata.json for run {run_id}")
+        meta = json.loads(RunBundle(archived).read("metadata.json"))
+    profile = meta.get("dataset", {}).get("profile")
+    if not profile:
+        raise ValueError(f"Run {run_id} has no dataset profile (recorded before profiling existed?)")
+    return profile
+
+
+def main() -> None:
+    root = Path(__file__).resolve().parent.parent / "artifacts"
+    ap = argparse.ArgumentParser(description="Profile a dataset or compare the dataset profiles of two runs")
+    ap.add_argument("--runs", type=Path, default=root / "runs", help="Run directories root")
+    ap.add_argument("--archive-dir", type=Path, default=root / "archive", help="Where archived bundles are kept")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    p = sub.add_parser("profile", help="Profile a CSV in one chunked pass and print the statistics as JSON")
+    p.add_argument("csv", type=Path)
+    p.add_argument("--chunksize", type=int, default=200_000)
+    p.add_argument("--workers", type=int, default=1, help="Threads profiling chunks")
+    p = sub.add_parser("drift", help="Compare the stored dataset profile of a run against a reference run")
+    p.add_argument("reference_run")
+    p.add_argument("current_run")
+    p.add_argument("--threshold", type=float, default=PSI_MAJOR, help="PSI above which a column counts as drifted")
+    args = ap.parse_args()
+
+    if args.cmd == "profile":
+        from pipeline.ingestion import iter_csv_chunks
+
+        profile = profile_chunks(iter_csv_chunks(args.csv, args.chunksize), workers=args.workers)
+        print(json.dumps(profile.summary(), indent=2))
+        return
+    report = compare_profiles(load_run_profile(args.reference_run, args.runs, args.archive_dir),
+                              load_run_profile(args.current_run, args.runs, args.archive_dir), args.threshold)
+    print(f"{'column':<12} {'kind':<12} {'PSI':>8} {'Δ null':>8}  status")
+    for col, r in report["columns"].items():
+        psi = f"{r['psi']:.4f}" if r["psi"] is not None else "-"
+        delta = f"{r['null_rate_delta']:+.3f}" if r["null_rate_delta"] is not None else "-"
+        print(f"{col:<12} {r['kind']:<12} {psi:>8} {delta:>8}  {r['status']}")
+    for label, cols in (("added", report["added_columns"]), ("removed", report["removed_columns"])):
+        if cols:
+            print(f"Columns {label}: {', '.join(cols)}")
+    print(f"Drift: {'none' if report['passed'] else ', '.join(report['drifted']) or 'schema changed'} "
+          f"(rows {report['reference_rows']} -> {report['current_rows']}, max PSI {report['max_psi']})")
+    raise SystemExit(0 if report["passed"] else 1)
+
+
+if __name__ == "__main__":
+    main()
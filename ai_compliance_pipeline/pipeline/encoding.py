@@ -0,0 +1,129 @@
+from __future__ import annotations
+import json
+from pathlib import Path
+from typing import Dict, Any, List
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+
+def _is_categorical(series: pd.Series) -> bool:
+    return not pd.api.types.is_numeric_dtype(series)
+
+
+class CategoricalEncoder:
+    """Fitted one-hot encoder producing a scipy CSR feature matrix.
+
+    The column layout is fixed at fit time: numeric columns first (in input
+    order), then one indicator per category of each categorical column, with
+    categories sorted. Unseen or missing categories encode as all zeros for
+    that column's block, so transform never changes the layout.
+
+    ``partial_fit`` builds the same state one chunk at a time; with
+    ``scale_numeric=True`` it also tracks running moments so numeric columns
+    are standardized, which incremental (SGD) learners need.
+    """
+
+    def __init__(
+        self,
+        numeric: List[str] | None = None,
+        categories: Dict[str, List[str]] | None = None,
+        scaling: Dict[str, List[float]] | None = None,
+    ):
+        self.numeric = list(numeric or [])
+        self.categories = dict(categories or {})
+        self.scaling = dict(scaling or {})  # column -> [mean, std]
+        self._moments: Dict[str, List[float]] = {}
+
+    def fit(self, df: pd.DataFrame) -> "CategoricalEncoder":
+        self.numeric = [c for c in df.columns if not _is_categorical(df[c])]
+        self.categories = {}
+        for c in df.columns:
+            if _is_categorical(df[c]):
+                values = df[c].dropna().astype(str).unique()
+                self.categories[c] = sorted(values)
+        self.scaling = {}
+        return self
+
+    def partial_fit(self, df: pd.DataFrame, scale_numeric: bool = False) -> "CategoricalEncoder":
+        """Fold one chunk into the fitted state (category union, numeric moments)."""
+        if not self.numeric and not self.categories:
+            self.numeric = [c for c in df.columns if not _is_categorical(df[c])]
+            self.categories = {c: [] for c in df.columns if _is_categorical(df[c])}
+        for c, cats in self.categories.items():
+            new = set(df[c].dropna().astype(str).unique()) - set(cats)
+            if new:
+                self.categories[c] = sorted(set(cats) | new)
+        if scale_numeric:
+            for c in self.numeric:
+                values = pd.to_numeric(df[c], errors="coerce").fillna(0).to_numpy(dtype=np.float64)
+                count, total, total_sq = self._moments.get(c, [0.0, 0.0, 0.0])
+                self._moments[c] = [count + len(values), total + values.sum(), total_sq + np.square(values).sum()]
+                count, total, total_sq = self._moments[c]
+                mean = total / count if count else 0.0
+                var = max(total_sq / count - mean * mean, 0.0) if count else 0.0
+                self.scaling[c] = [mean, float(np.sqrt(var)) or 1.0]
+        return self
+
+    @property
+    def feature_names(self) -> List[str]:
+        names = list(self.numeric)
+        for col, cats in self.categories.items():
+            names.extend(f"{col}_{cat}" for cat in cats)
+        return names
+
+    @property
+    def n_features(self) -> int:
+        return len(self.numeric) + sum(len(c) for c in self.categories.values())
+
+    def transform(self, df: pd.DataFrame) -> sparse.csr_matrix:
+        missing = [c for c in self.numeric + list(self.categories) if c not in df.columns]
+        if missing:
+            raise ValueError(f"Missing columns for encoding: {missing}")
+        n = len(df)
+        rows, cols, data = [], [], []
+        if self.numeric:
+            num = df[self.numeric].apply(pd.to_numeric, errors="coerce").fillna(0).to_numpy(dtype=np.float64)
+            if self.scaling:
+                mean = np.array([self.scaling[c][0] for c in self.numeric])
+                std = np.array([self.scaling[c][1] for c in self.numeric])
+                num = (num - mean) / std
+            r, c = np.nonzero(num)
+            rows.append(r)
+            cols.append(c)
+            data.append(num[r, c])
+        offset = len(self.numeric)
+        for col, cats in self.categories.items():
+            values = df[col].astype(str).where(df[col].notna())
+            codes = np.asarray(pd.Categorical(values, categories=cats).codes, dtype=np.int64)
+            hit = np.flatnonzero(codes >= 0)
+            rows.append(hit)
+            cols.append(offset + codes[hit])
+            data.append(np.ones(len(hit), dtype=np.float64))
+            offset += len(cats)
+        if rows:
+            coo = sparse.coo_matrix(
+                (np.concatenate(data), (np.concatenate(rows), np.concatenate(cols))),
+                shape=(n, offset),
+            )
+            return coo.tocsr()
+        return sparse.csr_matrix((n, offset), dtype=np.float64)
+
+    def fit_transform(self, df: pd.DataFrame) -> sparse.csr_matrix:
+        return self.fit(df).transform(df)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"numeric": self.numeric, "categories": self.categories, "scaling": self.scaling}
+
+    @classmethod
+    def from_dict(cls, d: Dict[str, Any]) -> "CategoricalEncoder":
+        return cls(numeric=d["numeric"], categories=d["categories"], scaling=d.get("scaling"))
+
+    def save(self, path: Path) -> str:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(self.to_dict(), indent=2), encoding="utf-8")
+        return str(path)
+
+    @classmethod
+    def load(cls, path: Path) -> "CategoricalEncoder":
+        return cls.from_dict(json.loads(Path(path).read_text(encoding="utf-8")))
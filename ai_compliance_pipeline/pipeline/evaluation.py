@@ -0,0 +1,174 @@
+from __future__ import annotations
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Optional
+import numpy as np
+
+# Every metric is computed from per-row weights: all ones for the point
+# estimate, resample counts (how often each row was drawn) for a bootstrap
+# replicate. A block of B replicates is then a (B, n) weight matrix and each
+# metric one vectorized expression over it, so no replicate is ever
+# materialised as a resampled copy of the test set.
+DEFAULT_BOOTSTRAP = 1000
+DEFAULT_CALIBRATION_BINS = 10
+# Weight-matrix cells per bootstrap block, bounding memory on large test sets. The
+# float64 weights are ~128 MB, but a block peaks at about three times that: the
+# int64 draws and counts they are built from, then their per-class column copies
+# and cumulative sums. Each of ``workers`` threads holds one block at a time.
+BLOCK_CELLS = 16_000_000
+BOOTSTRAP_METRICS = ["accuracy", "precision", "recall", "f1", "roc_auc", "brier"]
+
+
+class _Prepared:
+    """Test-set arrays split by class, positives ranked among negatives for ROC-AUC."""
+
+    def __init__(self, y_true, proba, threshold: float):
+        y = np.asarray(y_true).astype(np.int8)
+        p = np.asarray(proba, dtype=np.float64)
+        if y.shape != p.shape or y.ndim != 1:
+            raise ValueError(f"y_true and proba must be 1-d of equal length, got {y.shape} and {p.shape}")
+        order = np.argsort(p, kind="stable")
+        self.y, self.p = y[order], p[order]
+        self.n = len(y)
+        self.pos_cols, self.neg_cols = np.flatnonzero(self.y == 1), np.flatnonzero(self.y != 1)
+        pred = (self.p > threshold).astype(np.float64)  # as predict(): p == threshold is negative
+        sq_err = np.square(self.p - (self.y == 1))
+        self.pred_pos, self.pred_neg = pred[self.pos_cols], pred[self.neg_cols]
+        self.sq_pos, self.sq_neg = sq_err[self.pos_cols], sq_err[self.neg_cols]
+        # For each positive: how many negatives score lower (lo) and lower-or-equal (hi).
+        neg_scores = self.p[self.neg_cols]
+        self.lo = np.searchsorted(neg_scores, self.p[self.pos_cols], "left")
+        self.hi = np.searchsorted(neg_scores, self.p[self.pos_cols], "right")
+        self.ties = bool((self.lo != self.hi).any())
+
+
+def _safe_div(num: np.ndarray, den: np.ndarray) -> np.ndarray:
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(den > 0, num / np.where(den > 0, den, 1.0), np.nan)
+
+
+def _weighted_metrics(prep: _Prepared, W: np.ndarray) -> Dict[str, np.ndarray]:
+    """Metrics for each row of weights ``W`` (shape (B, n)), as arrays of length B."""
+    Wpos, Wneg = W[:, prep.pos_cols], W[:, prep.neg_cols]
+    P, N = Wpos.sum(axis=1), Wneg.sum(axis=1)
+    tp, fp = Wpos @ prep.pred_pos, Wneg @ prep.pred_neg
+    fn, tn = P - tp, N - fp
+    # ROC-AUC as the Mann-Whitney statistic: each positive scores one per
+    # lower-scored negative and a half per tied one.
+    C = np.zeros((W.shape[0], len(prep.neg_cols) + 1))
+    np.cumsum(Wneg, axis=1, out=C[:, 1:])
+    below = C[:, prep.lo]
+    if prep.ties:
+        below += 0.5 * (C[:, prep.hi] - below)
+    auc = _safe_div(np.einsum("ij,ij->i", Wpos, below), P * N)
+    return {
+        "accuracy": _safe_div(tp + tn, P + N),
+        "precision": _safe_div(tp, tp + fp),
+        "recall": _safe_div(tp, P),
+        "f1": _safe_div(2 * tp, 2 * tp + fp + fn),
+        "roc_auc": auc,
+        "brier": _safe_div(Wpos @ prep.sq_pos + Wneg @ prep.sq_neg, P + N),
+        "tp": tp, "fp": fp, "fn": fn, "tn": tn,
+    }
+
+
+def _resample_counts(rng: np.random.Generator, n: int, size: int) -> np.ndarray:
+    """(size, n) matrix of how often each row is drawn in ``size`` bootstrap resamples."""
+    draws = rng.integers(0, n, size=(size, n)) + (np.arange(size) * n)[:, None]
+    return np.bincount(draws.ravel(), minlength=size * n).reshape(size, n).astype(np.float64)
+
+
+def _bootstrap_block(prep: _Prepared, size: int, seed: np.random.SeedSequence) -> Dict[str, np.ndarray]:
+    stats = _weighted_metrics(prep, _resample_counts(np.random.default_rng(seed), prep.n, size))
+    return {m: stats[m] for m in BOOTSTRAP_METRICS}
+
+
+def bootstrap_replicates(
+    prep: _Prepared, n_bootstrap: int, seed: int = 0, workers: int = 1, block_size: Optional[int] = None
+) -> Dict[str, np.ndarray]:
+    """Metric values of ``n_bootstrap`` resamples, computed in blocks.
+
+    Blocks get independent child seeds of ``seed``, so results depend on the
+    seed and block size but not on ``workers``.
+    """
+    block = block_size or max(1, min(n_bootstrap, BLOCK_CELLS // max(prep.n, 1)))
+    sizes = [min(block, n_bootstrap - i) for i in range(0, n_bootstrap, block)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    if workers > 1 and len(sizes) > 1:
+        # The heavy parts (bincount, cumsum, matrix products) release the GIL.
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            parts = list(pool.map(lambda args: _bootstrap_block(prep, *args), zip(sizes, seeds)))
+    else:
+        parts = [_bootstrap_block(prep, s, sd) for s, sd in zip(sizes, seeds)]
+    return {m: np.concatenate([part[m] for part in parts]) for m in BOOTSTRAP_METRICS}
+
+
+def calibration_curve(prep: _Prepared, bins: int = DEFAULT_CALIBRATION_BINS) -> Dict[str, Any]:
+    """Reliability table over equal-width probability bins plus the expected calibration error."""
+    edges = np.linspace(0.0, 1.0, bins + 1)
+    idx = np.searchsorted(edges[1:-1], prep.p)  # same binning as sklearn's calibration_curve
+    count = np.bincount(idx, minlength=bins)
+    sum_p = np.bincount(idx, weights=prep.p, minlength=bins)
+    sum_y = np.bincount(idx, weights=(prep.y == 1).astype(np.float64), minlength=bins)
+    table = [
+        {
+            "lower": round(float(edges[b]), 4),
+            "upper": round(float(edges[b + 1]), 4),
+            "count": int(count[b]),
+            "mean_predicted": float(sum_p[b] / count[b]) if count[b] else None,
+            "fraction_positive": float(sum_y[b] / count[b]) if count[b] else None,
+        }
+        for b in range(bins)
+    ]
+    ece = float(np.abs(sum_p - sum_y).sum() / prep.n) if prep.n else None
+    return {"bins": table, "ece": ece}
+
+
+def _finite(x) -> Optional[float]:
+    x = float(x)
+    return x if np.isfinite(x) else None
+
+
+def evaluate_scores(
+    y_true,
+    proba,
+    threshold: float = 0.5,
+    n_bootstrap: int = DEFAULT_BOOTSTRAP,
+    confidence: float = 0.95,
+    calibration_bins: int = DEFAULT_CALIBRATION_BINS,
+    seed: int = 0,
+    workers: int = 1,
+) -> Dict[str, Any]:
+    """All evaluation metrics from one set of positive-class probabilities.
+
+    Keeps the ``{"metric": "accuracy", "value": ...}`` keys that the catalog,
+    run log and compliance checks read, and adds precision/recall/F1,
+    ROC-AUC, Brier score, the confusion matrix, a calibration table and
+    percentile bootstrap confidence intervals.
+    """
+    prep = _Prepared(y_true, proba, threshold)
+    point = _weighted_metrics(prep, np.ones((1, prep.n)))
+    metrics: Dict[str, Any] = {
+        "metric": "accuracy",
+        "value": _finite(point["accuracy"][0]),
+        "n": prep.n,
+        "positives": len(prep.pos_cols),
+        "threshold": threshold,
+        **{m: _finite(point[m][0]) for m in BOOTSTRAP_METRICS if m != "accuracy"},
+        "confusion_matrix": {k: int(point[k][0]) for k in ("tn", "fp", "fn", "tp")},
+        "calibration": calibration_curve(prep, calibration_bins),
+    }
+    if n_bootstrap and prep.n:
+        reps = bootstrap_replicates(prep, n_bootstrap, seed, workers)
+        alpha = (1.0 - confidence) / 2
+        metrics["bootstrap"] = {
+            "replicates": n_bootstrap,
+            "confidence": confidence,
+            "seed": seed,
+            "intervals": {
+                m: [_finite(np.nanquantile(v, alpha)), _finite(np.nanquantile(v, 1 - alpha))]
+                if np.isfinite(v).any() else None
+                for m, v in reps.items()
+            },
+        }
+    return metrics
+
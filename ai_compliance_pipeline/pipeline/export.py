@@ -0,0 +1,214 @@
+from __future__ import annotations
+import hashlib, json, os, struct, uuid
+from pathlib import Path
+from typing import Any, Dict, Mapping, Optional, Sequence
+import numpy as np
+
+# Compact linear-model format (".lrm"):
+#   8 bytes   magic b"LRMODEL1"
+#   4 bytes   little-endian uint32 header length
+#   header    UTF-8 JSON: layout, classes, array offsets/shapes, payload sha256
+#   padding   to a 64-byte boundary
+#   payload   little-endian float64 arrays (coef, intercept), each 64-byte aligned
+# Only numpy is needed to read it; arrays are memory-mapped, not copied.
+MAGIC = b"LRMODEL1"
+FORMAT_VERSION = 1
+ALIGN = 64
+COMPACT_FILENAME = "model.lrm"
+
+
+def _pad(n: int) -> int:
+    return (-n) % ALIGN
+
+
+def export_linear_model(model: Any, encoder: Any, path: Path, algorithm: Optional[str] = None) -> Dict[str, Any]:
+    """Write a fitted linear classifier (``coef_``/``intercept_``/``classes_``) and its feature layout.
+
+    Works for LogisticRegression and SGDClassifier alike. Returns a summary
+    (path, size, sha256) for the run metadata.
+    """
+    coef = np.ascontiguousarray(model.coef_, dtype="<f8")
+    intercept = np.ascontiguousarray(np.atleast_1d(model.intercept_), dtype="<f8")
+    if coef.shape[1] != encoder.n_features:
+        raise ValueError(f"Model has {coef.shape[1]} coefficients but the encoder {encoder.n_features} features")
+    arrays, offset = {}, 0
+    for name, arr in (("coef", coef), ("intercept", intercept)):
+        arrays[name] = {"offset": offset, "shape": list(arr.shape)}
+        offset += arr.nbytes + _pad(arr.nbytes)
+    payload = b"".join(arr.tobytes() + b"\0" * _pad(arr.nbytes) for arr in (coef, intercept))
+    header = {
+        "format_version": FORMAT_VERSION,
+        "dtype": "<f8",
+        "algorithm": algorithm or type(model).__name__,
+        "classes": [c.item() if hasattr(c, "item") else c for c in model.classes_],
+        "n_features": int(coef.shape[1]),
+        "arrays": arrays,
+        "layout": encoder.to_dict(),
+        "payload_sha256": hashlib.sha256(payload).hexdigest(),
+    }
+    # Not sort_keys: the order of "categories" is the order of the one-hot blocks.
+    header_bytes = json.dumps(header).encode("utf-8")
+    prefix = MAGIC + struct.pack("<I", len(header_bytes)) + header_bytes
+    prefix += b"\0" * _pad(len(prefix))
+
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.{uuid.uuid4().hex}.tmp")
+    with open(tmp, "wb") as f:
+        f.write(prefix)
+        f.write(payload)
+    os.replace(tmp, path)
+    return {"path": str(path), "format": f"lrm/{FORMAT_VERSION}", "bytes": path.stat().st_size,
+            "payload_sha256": header["payload_sha256"]}
+
+
+def read_header(path: Path) -> tuple[Dict[str, Any], int]:
+    """Header of an .lrm file and the byte offset where its payload starts."""
+    with open(path, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} is not a compact model file")
+        (length,) = struct.unpack("<I", f.read(4))
+        header = json.loads(f.read(length).decode("utf-8"))
+    if header.get("format_version") != FORMAT_VERSION:
+        raise ValueError(f"Unsupported compact model version {header.get('format_version')}")
+    start = len(MAGIC) + 4 + length
+    return header, start + _pad(start)
+
+
+def _as_float(values: Sequence[Any]) -> np.ndarray:
+    """Like ``pd.to_numeric(errors="coerce").fillna(0)`` for one column."""
+    try:
+        out = np.asarray(values, dtype=np.float64)
+    except (TypeError, ValueError):
+        out = np.empty(len(values), dtype=np.float64)
+        for i, v in enumerate(values):
+            try:
+                out[i] = float(v)
+            except (TypeError, ValueError):
+                out[i] = np.nan
+    return np.nan_to_num(out, nan=0.0, posinf=0.0, neginf=0.0) if np.isnan(out).any() else out
+
+
+def _is_missing(v: Any) -> bool:
+    return v is None or (isinstance(v, float) and v != v)
+
+
+class LinearScorer:
+    """Pure-NumPy scorer over a memory-mapped .lrm export.
+
+    ``encode`` rebuilds the encoder's feature layout from plain column
+    sequences (numeric first, then sorted one-hot blocks; unseen or missing
+    categories encode as zeros), so scoring needs neither pandas nor
+    sklearn. ``predict_proba`` accepts that dense matrix or any matrix
+    supporting ``@`` (e.g. the encoder's scipy CSR output).
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.header, start = read_header(self.path)
+        self._mm = np.memmap(self.path, dtype="<f8", mode="r", offset=start)
+        arrays = {}
+        for name, spec in self.header["arrays"].items():
+            first = spec["offset"] // 8
+            size = int(np.prod(spec["shape"]))
+            arrays[name] = self._mm[first:first + size].reshape(spec["shape"])
+        self.coef, self.intercept = arrays["coef"], arrays["intercept"]
+        self.classes_ = np.asarray(self.header["classes"])
+        layout = self.header["layout"]
+        self.numeric = list(layout["numeric"])
+        self.categories = {c: list(v) for c, v in layout["categories"].items()}
+        self.scaling = layout.get("scaling") or {}
+        self.n_features = int(self.header["n_features"])
+        self.nbytes = self.path.stat().st_size
+
+    @classmethod
+    def load(cls, path: Path) -> "LinearScorer":
+        return cls(path)
+
+    def verify_payload(self) -> bool:
+        """Whether the payload still matches the digest recorded in the header."""
+        return hashlib.sha256(self._mm.tobytes()).hexdigest() == self.header["payload_sha256"]
+
+    def encode(self, columns: Mapping[str, Sequence[Any]]) -> np.ndarray:
+        missing = [c for c in self.numeric + list(self.categories) if c not in columns]
+        if missing:
+            raise ValueError(f"Missing columns for encoding: {missing}")
+        n = len(next(iter(columns.values()))) if columns else 0
+        X = np.zeros((n, self.n_features), dtype=np.float64)
+        for j, c in enumerate(self.numeric):
+            col = _as_float(columns[c])
+            if self.scaling:
+                mean, std = self.scaling[c]
+                col = (col - mean) / std
+            X[:, j] = col
+        offset = len(self.numeric)
+        for c, cats in self.categories.items():
+            index = {cat: i for i, cat in enumerate(cats)}
+            for r, v in enumerate(columns[c]):
+                k = None if _is_missing(v) else index.get(str(v))
+                if k is not None:
+                    X[r, offset + k] = 1.0
+            offset += len(cats)
+        return X
+
+    def decision_function(self, X) -> np.ndarray:
+        scores = np.asarray(X @ self.coef.T) + self.intercept
+        return scores[:, 0] if scores.shape[1] == 1 else scores
+
+    def predict_proba(self, X) -> np.ndarray:
+        """Class probabilities in ``classes_`` order, shape (n, n_classes)."""
+        scores = self.decision_function(X)
+        if scores.ndim == 1:
+            p = 1.0 / (1.0 + np.exp(-scores))
+            return np.column_stack([1.0 - p, p])
+        scores = scores - scores.max(axis=1, keepdims=True)
+        e = np.exp(scores)
+        return e / e.sum(axis=1, keepdims=True)
+
+    def predict(self, X) -> np.ndarray:
+        return self.classes_[np.argmax(self.predict_proba(X), axis=1)]
+
+    def predict_rows(self, rows: Sequence[Mapping[str, Any]]) -> np.ndarray:
+        """Positive-class probability for a list of record dicts."""
+        names = self.numeric + list(self.categories)
+        columns = {c: [row.get(c) for row in rows] for c in names}
+        return self.predict_proba(self.encode(columns))[:, -1]
+
+
+def verify_export(model: Any, encoder: Any, scorer: LinearScorer, X=None, probe_rows: int = 256,
+                  seed: int = 0) -> Dict[str, Any]:
+    """Check the compact scorer against the sklearn model and the pandas encoder.
+
+    Encodes synthetic probe rows (every category, plus unseen and missing
+    values) with both encoders, then scores ``X`` (default: the encoded
+    probe rows) with both models.
+    """
+    import pandas as pd
+
+    rng = np.random.default_rng(seed)
+    probe = {}
+    for c in encoder.numeric:
+        probe[c] = rng.integers(-1000, 1000, size=probe_rows).tolist()
+    for c, cats in encoder.categories.items():
+        pool = list(cats) + ["__unseen__", None]
+        probe[c] = [pool[i % len(pool)] for i in rng.permutation(probe_rows)]
+    encoded = encoder.transform(pd.DataFrame(probe))
+    encoding_diff = float(np.max(np.abs(encoded.toarray() - scorer.encode(probe))))
+
+    if X is None:
+        X = encoded
+    ref = model.predict_proba(X)
+    got = scorer.predict_proba(X)
+    max_diff = float(np.max(np.abs(ref - got))) if len(ref) else 0.0
+    predictions_match = bool(np.array_equal(model.predict(X), scorer.predict(X)))
+
+    tolerance = 1e-9
+    return {
+        "rows": int(X.shape[0]),
+        "max_abs_diff_proba": max_diff,
+        "predictions_match": predictions_match,
+        "probe_rows": probe_rows,
+        "max_abs_diff_encoding": encoding_diff,
+        "tolerance": tolerance,
+        "passed": max_diff <= tolerance and predictions_match and encoding_diff == 0.0,
+    }
@@ -0,0 +1,123 @@
+from __future__ import annotations
+import hashlib, json, mmap, os, threading, uuid
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Any, Iterable, Optional
+
+READ_BUFFER_SIZE = 1 << 20  # 1 MiB
+MMAP_THRESHOLD = 64 << 20  # files at least this large are hashed through mmap
+MMAP_SLICE = 16 << 20
+
+
+def sha256_of_file(path: Path) -> str:
+    """SHA-256 of a file using large reads, or mmap for big files.
+
+    hashlib releases the GIL on large updates, so several files can be
+    hashed in parallel threads (see ``HashManifest.hash_many``).
+    """
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if size >= MMAP_THRESHOLD:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                view = memoryview(mm)
+                try:
+                    for start in range(0, size, MMAP_SLICE):
+                        h.update(view[start:start + MMAP_SLICE])
+                finally:
+                    view.release()
+        else:
+            buf = bytearray(READ_BUFFER_SIZE)
+            view = memoryview(buf)
+            while True:
+                n = f.readinto(buf)
+                if not n:
+                    break
+                h.update(view[:n])
+    return h.hexdigest()
+
+
+def stat_signature(path: Path) -> Dict[str, int]:
+    st = path.stat()
+    return {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "inode": st.st_ino}
+
+
+class HashManifest:
+    """Per-run record of file hashes keyed by (path, size, mtime_ns, inode).
+
+    A hash is reused while the file's stat signature is unchanged and
+    recomputed otherwise. Paths inside the manifest's directory are stored
+    relative to it, so a run directory can be moved without invalidating it.
+    Note that the signature is a cache key, not a proof: a rewrite that
+    restores size, mtime and inode would not be noticed.
+    """
+
+    FILENAME = "hash_manifest.json"
+
+    def __init__(self, path: Path, entries: Optional[Dict[str, Dict[str, Any]]] = None):
+        self.path = Path(path)
+        self.entries: Dict[str, Dict[str, Any]] = dict(entries or {})
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def for_run(cls, run_dir: Path) -> "HashManifest":
+        return cls.load(Path(run_dir) / cls.FILENAME)
+
+    @classmethod
+    def load(cls, path: Path) -> "HashManifest":
+        path = Path(path)
+        entries = {}
+        if path.exists():
+            try:
+                entries = json.loads(path.read_text(encoding="utf-8")).get("files", {})
+            except ValueError:
+                entries = {}
+        return cls(path, entries)
+
+    def _key(self, file_path: Path) -> str:
+        resolved = Path(file_path).resolve()
+        try:
+            return str(resolved.relative_to(self.path.parent.resolve()))
+        except ValueError:
+            return str(resolved)
+
+    def get(self, file_path: Path) -> Optional[str]:
+        """Recorded hash if the file is unchanged since it was hashed, else None."""
+        entry = self.entries.get(self._key(file_path))
+        if entry is None or not Path(file_path).exists():
+            return None
+        sig = stat_signature(Path(file_path))
+        if all(entry.get(k) == v for k, v in sig.items()):
+            return entry["sha256"]
+        return None
+
+    def hash(self, file_path: Path) -> str:
+        file_path = Path(file_path)
+        cached = self.get(file_path)
+        if cached is not None:
+            with self._lock:
+                self.hits += 1
+            return cached
+        sig = stat_signature(file_path)
+        digest = sha256_of_file(file_path)
+        with self._lock:
+            self.misses += 1
+            self.entries[self._key(file_path)] = {**sig, "sha256": digest}
+        return digest
+
+    def hash_many(self, paths: Iterable[Path], max_workers: int = 4) -> Dict[str, str]:
+        """Hash several files in parallel threads; returns {file name: sha256}."""
+        paths = [Path(p) for p in paths]
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(paths)))) as pool:
+            digests = list(pool.map(self.hash, paths))
+        return {p.name: d for p, d in zip(paths, digests)}
+
+    def save(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._lock:
+            payload = json.dumps({"files": self.entries}, indent=2)
+        tmp = self.path.with_name(f".{self.path.name}.{uuid.uuid4().hex}.tmp")
+        tmp.write_text(payload, encoding="utf-8")
+        os.replace(tmp, self.path)
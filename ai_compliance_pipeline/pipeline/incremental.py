@@ -0,0 +1,290 @@
+from __future__ import annotations
+import hashlib, json, os, uuid
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from pipeline.encoding import CategoricalEncoder
+from pipeline.ingestion import (READ_BUFFER_SIZE, _HashingReader, _concat_chunks, _narrow_ints,
+                                dataframe_schema, read_dtypes)
+from pipeline.locking import file_lock
+
+# Chained fingerprint of a file split into fixed-size blocks:
+#   head_0 = sha256("sha256-chain/1:<block_bytes>")
+#   head_i = sha256(head_{i-1} || sha256(block_i))
+# and the digest folds a trailing partial block in the same way. The state
+# after the last full block is a few hashes that can be persisted: an
+# appended file is verified by re-hashing its old bytes against them (no
+# parsing) and extending the chain over the new bytes, which are the only
+# ones parsed. The chain digest only identifies versions for the incremental
+# refresh; the dataset's recorded SHA-256 is always a plain one.
+SCHEME = "sha256-chain/1"
+BLOCK_BYTES = 1 << 20
+
+
+class ChainHasher:
+    """hashlib-style ``update``/``hexdigest`` computing the chained block fingerprint."""
+
+    def __init__(self, block_bytes: int = BLOCK_BYTES):
+        self.block_bytes = block_bytes
+        self.head = hashlib.sha256(f"{SCHEME}:{block_bytes}".encode()).digest()
+        self.blocks = 0
+        self.size = 0
+        self._pending = bytearray()
+        self._last_byte = b""
+
+    def _fold(self, block) -> None:
+        self.head = hashlib.sha256(self.head + hashlib.sha256(block).digest()).digest()
+        self.blocks += 1
+
+    def update(self, data) -> None:
+        view = memoryview(data).cast("B")
+        if not len(view):
+            return
+        self.size += len(view)
+        self._last_byte = bytes(view[-1:])
+        if self._pending:
+            take = self.block_bytes - len(self._pending)
+            self._pending += view[:take]
+            view = view[take:]
+            if len(self._pending) < self.block_bytes:
+                return
+            self._fold(self._pending)
+            self._pending = bytearray()
+        full = len(view) - len(view) % self.block_bytes
+        for start in range(0, full, self.block_bytes):
+            self._fold(view[start:start + self.block_bytes])
+        self._pending += view[full:]
+
+    def hexdigest(self) -> str:
+        if not self._pending:
+            return self.head.hex()
+        return hashlib.sha256(self.head + hashlib.sha256(self._pending).digest()).hexdigest()
+
+    def state(self) -> Dict[str, Any]:
+        """JSON-serialisable summary of the chain, compared against on the next read."""
+        return {
+            "scheme": SCHEME,
+            "block_bytes": self.block_bytes,
+            "size": self.size,
+            "blocks": self.blocks,
+            "head": self.head.hex(),
+            "tail_sha256": hashlib.sha256(self._pending).hexdigest(),
+            "ends_with_newline": self._last_byte == b"\n",
+            "digest": self.hexdigest(),
+        }
+
+
+class TeeHasher:
+    """Feeds every update to several hashers; ``hexdigest`` is the first one's."""
+
+    def __init__(self, *hashers):
+        self.hashers = hashers
+
+    def update(self, data) -> None:
+        for h in self.hashers:
+            h.update(data)
+
+    def hexdigest(self) -> str:
+        return self.hashers[0].hexdigest()
+
+
+class FingerprintStore:
+    """Last chained fingerprint state (plus the file's plain ``sha256``) per dataset path, in ``root/fingerprints.json``."""
+
+    def __init__(self, root: Path):
+        self.path = Path(root) / "fingerprints.json"
+
+    def _read(self) -> Dict[str, Any]:
+        if not self.path.exists():
+            return {}
+        try:
+            return json.loads(self.path.read_text(encoding="utf-8"))
+        except ValueError:
+            return {}
+
+    def get(self, dataset_path: Path) -> Optional[Dict[str, Any]]:
+        return self._read().get(str(Path(dataset_path).resolve()))
+
+    def put(self, dataset_path: Path, state: Dict[str, Any], mtime_ns: int) -> None:
+        with file_lock(self.path):
+            index = self._read()
+            index[str(Path(dataset_path).resolve())] = {**state, "mtime_ns": mtime_ns}
+            tmp = self.path.with_suffix(f".{uuid.uuid4().hex}.tmp")
+            tmp.write_text(json.dumps(index), encoding="utf-8")
+            os.replace(tmp, self.path)
+
+
+def unchanged(state: Optional[Dict[str, Any]], dataset_path: Path) -> bool:
+    """Whether the file still has the size and mtime it had when ``state`` was recorded."""
+    if not state:
+        return False
+    st = Path(dataset_path).stat()
+    return st.st_size == state["size"] and st.st_mtime_ns == state.get("mtime_ns")
+
+
+@dataclass
+class AppendedRows:
+    """Rows appended to a dataset since its fingerprinted, cached base version."""
+
+    base: Any  # pipeline.cache.CachedDataset of the base version
+    rows: pd.DataFrame
+    state: Dict[str, Any]
+    sha256: str  # plain SHA-256 of the whole current file
+    appended_bytes: int  # parsed
+    bytes_read: int  # hashed: the whole file
+
+
+def read_appended(dataset_path: Path, prev: Dict[str, Any], base: Any,
+                  chunksize: int = 200_000) -> Optional[AppendedRows]:
+    """Parse only the bytes appended since ``prev`` was recorded.
+
+    Returns None unless the file is a strict append of the recorded version:
+    it must be larger, the old content must have ended on a line break, and
+    the chain rebuilt from every old byte must match the recorded head and
+    tail. The old bytes are hashed, not parsed, so a change anywhere in them
+    (not just at the edges) falls back to a full load; the same pass gives
+    the new version its plain SHA-256.
+    """
+    size = Path(dataset_path).stat().st_size
+    if size <= prev["size"] or not prev["ends_with_newline"] or prev.get("scheme") != SCHEME:
+        return None
+    columns = list(base.dataset["columns"])
+    sha, chain = hashlib.sha256(), ChainHasher(prev["block_bytes"])
+    hasher = TeeHasher(sha, chain)
+    with open(dataset_path, "rb", buffering=READ_BUFFER_SIZE) as f:
+        remaining = prev["size"]
+        while remaining:
+            data = f.read(min(remaining, READ_BUFFER_SIZE))
+            if not data:
+                return None
+            hasher.update(data)
+            remaining -= len(data)
+        old = chain.state()
+        if old["head"] != prev["head"] or old["tail_sha256"] != prev["tail_sha256"]:
+            return None
+        reader = _HashingReader(f, hasher)
+        try:
+            chunks = list(pd.read_csv(reader, header=None, names=columns, dtype=read_dtypes(columns),
+                                      chunksize=chunksize))
+        except pd.errors.EmptyDataError:
+            chunks = []
+        reader.drain()
+    rows = _narrow_ints(_concat_chunks(chunks)) if chunks else pd.DataFrame(columns=columns)
+    return AppendedRows(base=base, rows=rows, state=chain.state(), sha256=sha.hexdigest(),
+                        appended_bytes=chain.size - prev["size"], bytes_read=chain.size)
+
+
+def fingerprint_meta(state: Dict[str, Any], mode: str, **extra: Any) -> Dict[str, Any]:
+    """Dataset-metadata view of a fingerprint state; ``mode`` is "full" or "append"."""
+    return {"scheme": state["scheme"], "mode": mode, "digest": state["digest"], "block_bytes": state["block_bytes"],
+            "blocks": state["blocks"], "bytes": state["size"], **extra}
+
+
+def row_hashes(df: pd.DataFrame) -> np.ndarray:
+    """uint64 hash per row, independent of integer width and of categorical category sets."""
+    normalized = {c: df[c].astype("int64") if pd.api.types.is_integer_dtype(df[c]) else df[c] for c in df.columns}
+    return pd.util.hash_pandas_object(pd.DataFrame(normalized, copy=False), index=False).to_numpy()
+
+
+def build_row_index(df_clean: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray]:
+    """Sorted row hashes of a deduplicated frame and the row position of each."""
+    hashes = row_hashes(df_clean)
+    order = np.argsort(hashes, kind="stable")
+    return hashes[order], order.astype(np.int64)
+
+
+def _same_rows(old: pd.DataFrame, old_pos: np.ndarray, new: pd.DataFrame, new_pos: np.ndarray) -> np.ndarray:
+    """Element-wise row equality (missing equals missing, like drop_duplicates)."""
+    equal = np.ones(len(new_pos), dtype=bool)
+    for c in new.columns:
+        a = np.asarray(old[c].to_numpy()[old_pos], dtype=object)
+        b = np.asarray(new[c].to_numpy()[new_pos], dtype=object)
+        equal &= (a == b) | (pd.isna(a) & pd.isna(b))
+    return equal
+
+
+def _extend_encoder(encoder: CategoricalEncoder, rows: pd.DataFrame) -> Tuple[CategoricalEncoder, Optional[np.ndarray]]:
+    """Encoder refitted on old plus new rows, and the old-to-new feature index map if the layout grew.
+
+    ``fit`` keeps categories sorted, so adding a category shifts later
+    columns; existing CSR rows are remapped instead of re-encoded.
+    """
+    grown = {}
+    for c, cats in encoder.categories.items():
+        new = set(rows[c].dropna().astype(str).unique()) - set(cats)
+        if new:
+            grown[c] = sorted(set(cats) | new)
+    if not grown:
+        return encoder, None
+    extended = CategoricalEncoder(encoder.numeric, {c: grown.get(c, cats) for c, cats in encoder.categories.items()},
+                                  encoder.scaling)
+    mapping = list(range(len(encoder.numeric)))
+    offset = len(encoder.numeric)
+    for c, cats in encoder.categories.items():
+        position = {cat: i for i, cat in enumerate(extended.categories[c])}
+        mapping.extend(offset + position[cat] for cat in cats)
+        offset += len(extended.categories[c])
+    return extended, np.asarray(mapping, dtype=np.int64)
+
+
+def append_clean(appended: AppendedRows, row_index: Tuple[np.ndarray, np.ndarray], target_col: str):
+    """Extend a cached clean/encoded dataset with appended rows.
+
+    Equivalent to ``basic_clean`` + ``prepare_features`` over the whole new
+    file: appended rows already present (in the base or earlier in the
+    delta) are dropped, first occurrences win, and the encoder is refitted
+    on the union. Only the appended rows are hashed, compared and encoded;
+    the base frame, matrix and row index are copied, not recomputed.
+    Returns ``(df_clean, X, y, encoder, row_index, stats)``.
+    """
+    from pipeline.transform import make_binary_target
+
+    base, rows = appended.base, appended.rows.reset_index(drop=True)
+    hashes = row_hashes(rows) if len(rows) else np.empty(0, dtype=np.uint64)
+    keep = ~rows.duplicated(keep="first").to_numpy() if len(rows) else np.empty(0, dtype=bool)
+    old_hashes, old_positions = row_index
+    if len(old_hashes) and len(rows):
+        at = np.minimum(np.searchsorted(old_hashes, hashes), len(old_hashes) - 1)
+        candidates = np.flatnonzero(keep & (old_hashes[at] == hashes))
+        # A hash hit is confirmed against the stored row, so a collision never drops a row.
+        seen = _same_rows(base.df_clean, old_positions[at[candidates]], rows, candidates)
+        keep[candidates[seen]] = False
+    new_rows = rows[keep].reset_index(drop=True)
+
+    n_old = len(base.df_clean)
+    df_clean = _concat_chunks([base.df_clean, new_rows]) if len(new_rows) else base.df_clean
+    encoder, mapping = _extend_encoder(base.encoder, new_rows)
+    X_old = base.X
+    if mapping is not None:
+        X_old = sparse.csr_matrix((X_old.data, mapping[X_old.indices], X_old.indptr),
+                                  shape=(X_old.shape[0], encoder.n_features))
+    y_new = make_binary_target(new_rows, target_col)
+    X = sparse.vstack([X_old, encoder.transform(new_rows.drop(columns=[target_col]))], format="csr")
+    y = pd.Series(np.concatenate([np.asarray(base.y), y_new.to_numpy()]), name=base.y.name)
+
+    added = hashes[keep]
+    order = np.argsort(added, kind="stable")
+    at = np.searchsorted(old_hashes, added[order])
+    index = (np.insert(old_hashes, at, added[order]),
+             np.insert(old_positions, at, n_old + order.astype(np.int64)))
+    stats = {
+        "rows_reused": n_old,
+        "appended_rows": int(len(rows)),
+        "duplicates_dropped": int(len(rows) - len(new_rows)),
+        "new_categories": {c: sorted(set(encoder.categories[c]) - set(base.encoder.categories[c]))
+                           for c in encoder.categories if encoder.categories[c] != base.encoder.categories[c]},
+    }
+    return df_clean, X, y, encoder, index, stats
+
+
+def appended_schema(base_schema: Dict[str, str], rows: pd.DataFrame) -> Dict[str, str]:
+    """Raw-frame schema after appending ``rows`` (integer columns may widen)."""
+    schema = dict(base_schema)
+    for col, dtype in dataframe_schema(rows).items():
+        old = schema.get(col)
+        if old and old != dtype and old != "category" and dtype != "category":
+            schema[col] = str(np.promote_types(old, dtype))
+    return schema
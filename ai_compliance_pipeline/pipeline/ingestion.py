@@ -1,10 +1,131 @@
 from pathlib import Path
+from typing import Dict, Iterator, Tuple
+import hashlib
+import numpy as np
 import pandas as pd
 
+# Compact schema for the bank extract. Categorical columns are parsed straight
+# into pandas categoricals. Integer columns are left to pandas' inference (a
+# blank or non-numeric cell must not fail the load) and narrowed to the
+# pinned width afterwards when they hold only integral values that fit.
+CATEGORICAL_COLUMNS = [
+    "job", "marital", "education", "default", "housing",
+    "loan", "contact", "month", "poutcome", "deposit",
+]
+INTEGER_COLUMNS: Dict[str, str] = {
+    "age": "int16",
+    "balance": "int32",
+    "day": "int8",
+    "duration": "int32",
+    "campaign": "int16",
+    "pdays": "int16",
+    "previous": "int16",
+}
+DEFAULT_CHUNKSIZE = 200_000
+READ_BUFFER_SIZE = 1 << 20
+
+
+class _HashingReader:
+    """File wrapper that feeds every byte pandas reads into a SHA-256."""
+
+    def __init__(self, f, hasher):
+        self._f = f
+        self._hasher = hasher
+
+    def read(self, size: int = -1) -> bytes:
+        data = self._f.read(size)
+        self._hasher.update(data)
+        return data
+
+    def drain(self) -> None:
+        """Hash whatever the parser did not consume (e.g. trailing bytes)."""
+        for chunk in iter(lambda: self._f.read(READ_BUFFER_SIZE), b""):
+            self._hasher.update(chunk)
+
+
 def load_csv(csv_path: Path) -> pd.DataFrame:
     """Load a CSV file into a pandas DataFrame."""
     return pd.read_csv(csv_path)
 
 def dataframe_schema(df: pd.DataFrame) -> dict:
     """Return a simple mapping of column dtype as strings."""
-    return {col: str(dtype) for col, dtype in df.dtypes.items()}
\ No newline at end of file
+    return {col: str(dtype) for col, dtype in df.dtypes.items()}
+
+
+def read_dtypes(columns) -> Dict[str, str]:
+    """Parser dtypes for the categorical columns of the bank schema that are present."""
+    return {c: "category" for c in CATEGORICAL_COLUMNS if c in columns}
+
+
+def _narrow_ints(df: pd.DataFrame) -> pd.DataFrame:
+    """Downcast pinned integer columns without missing values when every value is integral and fits.
+
+    Columns with NA or non-numeric cells keep the dtype pandas inferred.
+    """
+    for col, dtype in INTEGER_COLUMNS.items():
+        if col not in df.columns or len(df) == 0:
+            continue
+        values = df[col]
+        if not pd.api.types.is_numeric_dtype(values) or pd.api.types.is_bool_dtype(values) or values.isna().any():
+            continue
+        if pd.api.types.is_float_dtype(values) and not np.array_equal(values, np.floor(values)):
+            continue
+        info = np.iinfo(dtype)
+        if values.min() >= info.min and values.max() <= info.max:
+            df[col] = values.astype(dtype)
+    return df
+
+
+def _concat_chunks(chunks) -> pd.DataFrame:
+    """Concatenate parsed chunks, unifying categoricals instead of decaying to object."""
+    if len(chunks) == 1:
+        return chunks[0]
+    df = pd.concat(chunks, ignore_index=True)
+    for col in chunks[0].columns:
+        if isinstance(chunks[0][col].dtype, pd.CategoricalDtype):
+            df[col] = pd.api.types.union_categoricals(
+                [c[col] for c in chunks], sort_categories=True
+            )
+    return df
+
+
+def iter_csv_chunks(csv_path: Path, chunksize: int = DEFAULT_CHUNKSIZE, hasher=None) -> Iterator[pd.DataFrame]:
+    """Yield bank-schema chunks of a CSV, optionally feeding the bytes to ``hasher``.
+
+    Only one chunk is held in memory at a time. When a hasher is given it has
+    seen the whole file once the generator is exhausted.
+    """
+    with open(csv_path, "rb", buffering=READ_BUFFER_SIZE) as raw:
+        header = pd.read_csv(raw, nrows=0).columns
+        raw.seek(0)
+        reader = _HashingReader(raw, hasher) if hasher is not None else raw
+        yield from pd.read_csv(reader, dtype=read_dtypes(header), chunksize=chunksize)
+        if hasher is not None:
+            reader.drain()
+
+
+def load_csv_fingerprinted(
+    csv_path: Path, chunksize: int = DEFAULT_CHUNKSIZE, hasher=None, profile=None, profile_workers: int = 1
+) -> Tuple[pd.DataFrame, str, dict]:
+    """Parse a CSV and compute its SHA-256 in a single read of the file.
+
+    The parser pulls its input through a hashing wrapper, so every buffer read
+    from disk is fed to both the chunked pandas parser and the digest.
+    ``hasher`` replaces the SHA-256 with any object offering ``update`` and
+    ``hexdigest`` (e.g. ``pipeline.incremental.ChainHasher``). A
+    ``pipeline.dataprofile.DatasetProfile`` passed as ``profile`` absorbs the
+    parsed chunks before they are concatenated.
+    Returns ``(df, hex_digest, dataframe_schema(df))``.
+    """
+    hasher = hasher if hasher is not None else hashlib.sha256()
+    chunks = list(iter_csv_chunks(csv_path, chunksize, hasher=hasher))
+    if profile is not None:
+        from pipeline.dataprofile import profile_chunks
+
+        profile.merge(profile_chunks(chunks, workers=profile_workers))
+    if chunks:
+        df = _concat_chunks(chunks)
+    else:
+        df = pd.DataFrame(columns=pd.read_csv(csv_path, nrows=0).columns)
+    df = _narrow_ints(df)
+    return df, hasher.hexdigest(), dataframe_schema(df)
@@ -0,0 +1,184 @@
+from __future__ import annotations
+import argparse, json, os, socket, sqlite3
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+# Job states: queued -> running -> done | failed; queued -> cancelled.
+STATUSES = ("queued", "running", "done", "failed", "cancelled")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    status TEXT NOT NULL DEFAULT 'queued',
+    dataset TEXT NOT NULL,
+    config TEXT NOT NULL DEFAULT '{}',
+    submitted_utc TEXT NOT NULL,
+    started_utc TEXT,
+    finished_utc TEXT,
+    worker TEXT,
+    run_id TEXT,
+    verdict TEXT,
+    accuracy REAL,
+    seconds REAL,
+    log_path TEXT,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status, id);
+"""
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def worker_name() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class JobQueue:
+    """SQLite table of run requests shared by submitters, workers and the viewer.
+
+    Claiming is a single UPDATE of the oldest queued row, so any number of
+    worker processes can pull from the same queue without handing a job out
+    twice.
+    """
+
+    def __init__(self, db_path: Path):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def submit(self, dataset: str, config: Optional[Dict[str, Any]] = None) -> int:
+        with self._connect() as conn:
+            cur = conn.execute("INSERT INTO jobs (dataset, config, submitted_utc) VALUES (?, ?, ?)",
+                               (str(dataset), json.dumps(config or {}, sort_keys=True), _now()))
+            return int(cur.lastrowid)
+
+    def claim(self, worker: str, run_id: str) -> Optional[Dict[str, Any]]:
+        """Mark the oldest queued job running under ``run_id`` and return it, or None if the queue is empty."""
+        with self._connect() as conn:
+            row = conn.execute(
+                "UPDATE jobs SET status = 'running', started_utc = ?, worker = ?, run_id = ? "
+                "WHERE id = (SELECT id FROM jobs WHERE status = 'queued' ORDER BY id LIMIT 1) RETURNING *",
+                (_now(), worker, run_id),
+            ).fetchone()
+        return self._job(row) if row else None
+
+    def finish(self, job_id: int, result: Dict[str, Any]) -> None:
+        """Record a worker result (the dict returned for a run) as done, or failed on error.
+
+        The claimed run id is kept unless ``result`` carries a ``run_id`` key.
+        """
+        failed = result.get("status") == "ERROR" or bool(result.get("error"))
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = ?, finished_utc = ?, run_id = CASE WHEN ? THEN ? ELSE run_id END, "
+                "verdict = ?, accuracy = ?, seconds = ?, log_path = ?, error = ? WHERE id = ?",
+                ("failed" if failed else "done", _now(), "run_id" in result, result.get("run_id"),
+                 None if failed else result.get("status"), result.get("accuracy"), result.get("seconds"),
+                 result.get("log"), result.get("error"), job_id),
+            )
+
+    def cancel(self, job_id: int) -> bool:
+        """Cancel a job that has not started yet."""
+        with self._connect() as conn:
+            cur = conn.execute("UPDATE jobs SET status = 'cancelled', finished_utc = ? WHERE id = ? AND status = 'queued'",
+                               (_now(), job_id))
+            return cur.rowcount == 1
+
+    def requeue_orphans(self) -> int:
+        """Put back jobs left running by dead worker processes on this host."""
+        host = socket.gethostname()
+        with self._connect() as conn:
+            rows = conn.execute("SELECT id, worker FROM jobs WHERE status = 'running'").fetchall()
+            orphans = []
+            for row in rows:
+                name, _, pid = (row["worker"] or "").rpartition(":")
+                if name == host and pid.isdigit() and not _pid_alive(int(pid)):
+                    orphans.append((row["id"],))
+            conn.executemany("UPDATE jobs SET status = 'queued', started_utc = NULL, worker = NULL, run_id = NULL "
+                             "WHERE id = ?", orphans)
+        return len(orphans)
+
+    def get(self, job_id: int) -> Optional[Dict[str, Any]]:
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._job(row) if row else None
+
+    def list(self, status: Optional[str] = None, limit: int = 100) -> List[Dict[str, Any]]:
+        """Most recent jobs first, optionally of one status."""
+        if status is not None and status not in STATUSES:
+            raise ValueError(f"Unknown job status {status!r}; expected one of {', '.join(STATUSES)}")
+        with self._connect() as conn:
+            if status:
+                rows = conn.execute("SELECT * FROM jobs WHERE status = ? ORDER BY id DESC LIMIT ?", (status, limit))
+            else:
+                rows = conn.execute("SELECT * FROM jobs ORDER BY id DESC LIMIT ?", (limit,))
+            return [self._job(r) for r in rows.fetchall()]
+
+    def counts(self) -> Dict[str, int]:
+        with self._connect() as conn:
+            rows = conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        return {s: 0 for s in STATUSES} | {status: n for status, n in rows}
+
+    @staticmethod
+    def _job(row: sqlite3.Row) -> Dict[str, Any]:
+        job = dict(row)
+        job["config"] = json.loads(job["config"] or "{}")
+        return job
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Submit and inspect jobs of the resident pipeline worker (main.py --worker)")
+    ap.add_argument("--queue", type=Path, default=Path(__file__).resolve().parent.parent / "artifacts" / "jobs.sqlite")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    p = sub.add_parser("submit", help="Queue one run")
+    p.add_argument("dataset", help="CSV path as seen by the worker")
+    p.add_argument("--config", type=str, default="{}",
+                   help='main.py options as JSON, by argument name, e.g. \'{"bootstrap": 200, "streaming": true}\'')
+    p = sub.add_parser("list", help="Show recent jobs")
+    p.add_argument("--status", choices=STATUSES, default=None)
+    p.add_argument("--limit", type=int, default=20)
+    p = sub.add_parser("cancel", help="Cancel a queued job")
+    p.add_argument("job_id", type=int)
+    args = ap.parse_args()
+
+    queue = JobQueue(args.queue)
+    if args.cmd == "submit":
+        print(f"Queued job {queue.submit(args.dataset, json.loads(args.config))}")
+    elif args.cmd == "list":
+        print(f"{'ID':>5} {'Status':<10} {'Run ID':<36} {'Verdict':<8} {'Seconds':>8}  Dataset")
+        for j in queue.list(args.status, args.limit):
+            print(f"{j['id']:>5} {j['status']:<10} {j['run_id'] or '-':<36} {j['verdict'] or '-':<8} "
+                  f"{j['seconds'] if j['seconds'] is not None else '-':>8}  {j['dataset']}")
+        print(" ".join(f"{k}={v}" for k, v in queue.counts().items()))
+    elif args.cmd == "cancel":
+        print("Cancelled" if queue.cancel(args.job_id) else f"Job {args.job_id} is not queued")
+
+
+if __name__ == "__main__":
+    main()
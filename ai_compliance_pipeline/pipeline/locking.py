@@ -0,0 +1,46 @@
+from __future__ import annotations
+import os
+from contextlib import contextmanager
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:  # Windows: fall back to best-effort O_APPEND semantics
+    fcntl = None
+
+
+@contextmanager
+def file_lock(path: Path):
+    """Exclusive advisory lock on ``<path>.lock`` across processes (no-op without fcntl)."""
+    lock_path = Path(path).with_name(Path(path).name + ".lock")
+    lock_path.parent.mkdir(parents=True, exist_ok=True)
+    fd = os.open(lock_path, os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        if fcntl:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+        yield
+    finally:
+        if fcntl:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+        os.close(fd)
+
+
+def append_line(path: Path, line: str) -> None:
+    """Append one line so that concurrent writers never interleave.
+
+    The file is locked for the duration of the write and the whole line is
+    written with a single ``os.write`` on an O_APPEND descriptor.
+    """
+    data = (line.rstrip("\n") + "\n").encode("utf-8")
+    fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+    try:
+        if fcntl:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+        view = memoryview(data)
+        while view:
+            written = os.write(fd, view)
+            view = view[written:]
+    finally:
+        if fcntl:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+        os.close(fd)
@@ -1,19 +1,269 @@
+from __future__ import annotations
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import Dict, Any
+from typing import Dict, Any, List
+import os, tempfile, time, warnings
+import numpy as np
+from scipy import sparse
+import sklearn
+from sklearn.exceptions import ConvergenceWarning
 from sklearn.linear_model import LogisticRegression
 from sklearn.metrics import accuracy_score
+from sklearn.model_selection import train_test_split
 import joblib
+from pipeline.evaluation import DEFAULT_BOOTSTRAP, evaluate_scores
 
 def train_logreg(X_train, y_train, max_iter: int = 200) -> LogisticRegression:
-    m = LogisticRegression(max_iter=max_iter)
-    m.fit(X_train, y_train)
-    return m
+    return fit_logreg({"max_iter": max_iter}, X_train, y_train)
 
-def evaluate(model, X_test, y_test) -> Dict[str, Any]:
-    preds = model.predict(X_test)
-    return {"metric": "accuracy", "value": float(accuracy_score(y_test, preds))}
+def evaluate(model, X_test, y_test, n_bootstrap: int = DEFAULT_BOOTSTRAP, workers: int = 1) -> Dict[str, Any]:
+    """Full evaluation (see pipeline.evaluation) from a single predict_proba pass."""
+    proba = model.predict_proba(X_test)[:, list(model.classes_).index(1)]
+    return evaluate_scores(np.asarray(y_test), proba, n_bootstrap=n_bootstrap, workers=workers)
 
 def save_model(model, path: Path) -> str:
     path.parent.mkdir(parents=True, exist_ok=True)
     joblib.dump(model, path)
     return str(path)
+
+
+# ---------------------------------------------------------------------------
+# Hyperparameter sweep
+# ---------------------------------------------------------------------------
+
+# Trials are fit through fit_logreg, on standardized columns; raw balance and
+# duration values otherwise keep lbfgs and saga from converging.
+DEFAULT_SWEEP_GRID = {
+    "C": [0.01, 0.1, 1.0, 10.0, 100.0],
+    "penalty_solver": [("l2", "lbfgs"), ("l2", "liblinear"), ("l1", "liblinear"), ("l1", "saga"), ("l2", "saga")],
+}
+
+# sklearn >= 1.8 deprecates `penalty` in favour of `l1_ratio`.
+_USE_L1_RATIO = tuple(int(p) for p in sklearn.__version__.split(".")[:2]) >= (1, 8)
+
+_shared: Dict[str, Any] = {}
+
+
+def sweep_configs(grid: Dict[str, list] | None = None, max_iter: int = 1000) -> List[Dict[str, Any]]:
+    grid = grid or DEFAULT_SWEEP_GRID
+    return [
+        {"C": C, "penalty": penalty, "solver": solver, "max_iter": max_iter}
+        for C in grid["C"]
+        for penalty, solver in grid["penalty_solver"]
+    ]
+
+
+def make_logreg(config: Dict[str, Any]) -> LogisticRegression:
+    penalty = config.get("penalty", "l2")
+    params = {"l1_ratio": 1.0 if penalty == "l1" else 0.0} if _USE_L1_RATIO else {"penalty": penalty}
+    return LogisticRegression(
+        C=config.get("C", 1.0), solver=config.get("solver", "lbfgs"), max_iter=config.get("max_iter", 1000), **params
+    )
+
+
+def column_scale(X) -> np.ndarray:
+    """Standard deviation of every column of ``X``, 1.0 where a column is constant."""
+    X = sparse.csr_matrix(X)
+    mean = np.asarray(X.mean(axis=0)).ravel()
+    var = np.asarray(X.multiply(X).mean(axis=0)).ravel() - mean * mean
+    scale = np.sqrt(np.maximum(var, 0.0))
+    scale[scale == 0] = 1.0
+    return scale
+
+
+def fit_logreg(config: Dict[str, Any], X, y) -> LogisticRegression:
+    """Fit ``make_logreg(config)`` on standardized columns, returned as a model of the raw ones.
+
+    Columns are divided by their standard deviation (not centred, so sparse
+    input stays sparse) and the fitted coefficients divided back, so the
+    model scores the encoder's features directly and exports like any other;
+    only the penalty and the solver's conditioning see the standardized scale.
+    """
+    scale = column_scale(X)
+    m = make_logreg(config).fit(X @ sparse.diags(1.0 / scale), y)
+    m.coef_ = m.coef_ / scale
+    return m
+
+
+def _fit_recording_convergence(config: Dict[str, Any], X, y):
+    """Fit ``fit_logreg(config)``; returns the model and whether the solver converged.
+
+    Convergence warnings are captured rather than printed: a trial counts as
+    unconverged if one was raised or if the solver used all ``max_iter``
+    iterations.
+    """
+    with warnings.catch_warnings(record=True) as caught:
+        warnings.simplefilter("always", ConvergenceWarning)
+        m = fit_logreg(config, X, y)
+    hit_limit = bool(np.any(np.asarray(m.n_iter_) >= m.max_iter))
+    warned = False
+    for w in caught:
+        if issubclass(w.category, ConvergenceWarning):
+            warned = True
+        else:
+            warnings.warn_explicit(w.message, w.category, w.filename, w.lineno)
+    return m, int(np.max(m.n_iter_)), not (hit_limit or warned)
+
+
+def _dump_shared(scratch: Path, name: str, X, y) -> None:
+    X = sparse.csr_matrix(X)
+    for part in ("data", "indices", "indptr"):
+        np.save(scratch / f"{name}_{part}.npy", getattr(X, part))
+    np.save(scratch / f"{name}_shape.npy", np.array(X.shape))
+    np.save(scratch / f"{name}_y.npy", np.asarray(y))
+
+
+def _load_shared(scratch: Path, name: str):
+    parts = tuple(np.load(scratch / f"{name}_{p}.npy", mmap_mode="r") for p in ("data", "indices", "indptr"))
+    shape = tuple(int(v) for v in np.load(scratch / f"{name}_shape.npy"))
+    return sparse.csr_matrix(parts, shape=shape, copy=False), np.load(scratch / f"{name}_y.npy", mmap_mode="r")
+
+
+def _init_sweep_worker(scratch: str) -> None:
+    # Each worker maps the matrices once; trials then share the page cache.
+    _shared["fit"] = _load_shared(Path(scratch), "fit")
+    _shared["val"] = _load_shared(Path(scratch), "val")
+
+
+def _run_trial(config: Dict[str, Any]) -> Dict[str, Any]:
+    X_fit, y_fit = _shared["fit"]
+    X_val, y_val = _shared["val"]
+    start = time.perf_counter()
+    n_iter, converged = None, None
+    try:
+        m, n_iter, converged = _fit_recording_convergence(config, X_fit, y_fit)
+        value = float(accuracy_score(y_val, m.predict(X_val)))
+        error = None
+    except ValueError as e:
+        value, error = None, str(e)
+    return {
+        "config": config,
+        "metric": "accuracy",
+        "value": value,
+        "n_iter": n_iter,
+        "converged": converged,
+        "fit_seconds": round(time.perf_counter() - start, 4),
+        "error": error,
+    }
+
+
+def run_sweep(
+    X_train,
+    y_train,
+    configs: List[Dict[str, Any]],
+    workers: int | None = None,
+    val_size: float = 0.2,
+    random_state: int = 42,
+) -> Dict[str, Any]:
+    """Score every config on a validation split carved from the training set.
+
+    The fit/validation matrices are written once to a scratch directory as
+    .npy files; every pool worker memory-maps them instead of receiving a
+    pickled copy. Only converged trials compete for best unless none
+    converged, in which case the selection says so. Returns
+    ``{"trials": [...], "best_index": i, "best": config, ...}``.
+    """
+    X_fit, X_val, y_fit, y_val = train_test_split(
+        X_train, y_train, test_size=val_size, random_state=random_state, stratify=y_train
+    )
+    with tempfile.TemporaryDirectory(prefix="sweep-") as scratch:
+        _dump_shared(Path(scratch), "fit", X_fit, y_fit)
+        _dump_shared(Path(scratch), "val", X_val, y_val)
+        with ProcessPoolExecutor(
+            max_workers=workers or os.cpu_count(), initializer=_init_sweep_worker, initargs=(scratch,)
+        ) as pool:
+            trials = list(pool.map(_run_trial, configs))
+    scored = [i for i, t in enumerate(trials) if t["value"] is not None]
+    if not scored:
+        raise RuntimeError("Every sweep trial failed; see trial errors.")
+    converged = [i for i in scored if trials[i]["converged"]]
+    best_index = max(converged or scored, key=lambda i: trials[i]["value"])
+    return {
+        "trials": trials,
+        "best_index": best_index,
+        "best": trials[best_index]["config"],
+        "selection": "validation-accuracy" if converged else "validation-accuracy (no trial converged)",
+        "unconverged": sum(1 for i in scored if not trials[i]["converged"]),
+    }
+
+
+# ---------------------------------------------------------------------------
+# Cross-validation
+# ---------------------------------------------------------------------------
+
+CV_METRICS = ["accuracy", "precision", "recall", "f1", "roc_auc", "brier"]
+
+
+def _init_cv_worker(scratch: str) -> None:
+    _shared["train"] = _load_shared(Path(scratch), "train")
+
+
+def _run_fold(task: Dict[str, Any]) -> Dict[str, Any]:
+    X, y = _shared["train"]
+    fit_idx, val_idx = task["fit_idx"], task["val_idx"]
+    start = time.perf_counter()
+    m, n_iter, converged = _fit_recording_convergence(task["config"], X[fit_idx], y[fit_idx])
+    fitted = time.perf_counter()
+    proba = m.predict_proba(X[val_idx])[:, list(m.classes_).index(1)]
+    scores = evaluate_scores(np.asarray(y[val_idx]), proba, n_bootstrap=0)
+    return {
+        "fold": task["fold"],
+        "train_size": len(fit_idx),
+        "val_size": len(val_idx),
+        "n_iter": n_iter,
+        "converged": converged,
+        "metrics": {name: scores["value"] if name == "accuracy" else scores[name] for name in CV_METRICS},
+        "fit_seconds": round(fitted - start, 4),
+        "eval_seconds": round(time.perf_counter() - fitted, 4),
+    }
+
+
+def run_cv(
+    X_train,
+    y_train,
+    config: Dict[str, Any],
+    k: int = 5,
+    workers: int | None = None,
+    random_state: int = 42,
+) -> Dict[str, Any]:
+    """Stratified k-fold fit/score of one config over the training set, folds in parallel.
+
+    As in ``run_sweep``, the encoded matrix is written once to a scratch
+    directory and memory-mapped by every worker; a fold only receives its
+    row indices. Returns the per-fold results plus the mean and (sample)
+    standard deviation of each metric.
+    """
+    from sklearn.model_selection import StratifiedKFold
+
+    if k < 2:
+        raise ValueError(f"Cross-validation needs at least 2 folds, got {k}")
+    y_train = np.asarray(y_train)
+    splitter = StratifiedKFold(n_splits=k, shuffle=True, random_state=random_state)
+    tasks = [
+        {"fold": i, "fit_idx": fit_idx, "val_idx": val_idx, "config": config}
+        for i, (fit_idx, val_idx) in enumerate(splitter.split(np.zeros(len(y_train)), y_train))
+    ]
+    start = time.perf_counter()
+    with tempfile.TemporaryDirectory(prefix="cv-") as scratch:
+        _dump_shared(Path(scratch), "train", X_train, y_train)
+        with ProcessPoolExecutor(
+            max_workers=min(k, workers or os.cpu_count() or 1), initializer=_init_cv_worker, initargs=(scratch,)
+        ) as pool:
+            folds = list(pool.map(_run_fold, tasks))
+    summary = {}
+    for name in CV_METRICS:
+        values = np.array([f["metrics"][name] for f in folds if f["metrics"][name] is not None], dtype=np.float64)
+        summary[name] = {
+            "mean": float(values.mean()) if len(values) else None,
+            "std": float(values.std(ddof=1)) if len(values) > 1 else None,
+        }
+    return {
+        "k": k,
+        "stratified": True,
+        "random_state": random_state,
+        "config": config,
+        "folds": folds,
+        "unconverged_folds": sum(1 for f in folds if not f["converged"]),
+        "summary": summary,
+        "wall_seconds": round(time.perf_counter() - start, 4),
+    }
@@ -0,0 +1,156 @@
+from __future__ import annotations
+import cProfile, os, resource, threading, time, tracemalloc
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+
+_MB = 1024 * 1024
+
+
+def _reset_peak_rss() -> bool:
+    """Reset the kernel's peak-RSS counter (VmHWM); Linux >= 4.0 only."""
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def peak_rss_bytes() -> int:
+    """Peak resident set size since the last reset (or since process start)."""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024  # kB on Linux
+
+
+def _cpu_seconds() -> float:
+    """CPU time of this process plus reaped children (e.g. sweep workers)."""
+    t = os.times()
+    return t.user + t.system + t.children_user + t.children_system
+
+
+class Profiler:
+    """Nested wall/CPU/peak-memory spans for one pipeline run.
+
+    ``span(name)`` measures a block of code on the main thread; nested spans
+    are named by their path ("train/fit"). Peak RSS and the tracemalloc peak
+    are reset when a span starts and folded into the enclosing span when it
+    ends, so every level reports its own true peak. Work done on other
+    threads (uploads, checks) is added afterwards with ``record``.
+    """
+
+    def __init__(self, trace_memory: bool = False, cprofile: bool = False):
+        self.spans: List[Dict[str, Any]] = []
+        self._stack: List[Dict[str, Any]] = []
+        self._origin = time.perf_counter()
+        self._lock = threading.Lock()
+        self.trace_memory = trace_memory
+        if trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        self._rss_resettable = _reset_peak_rss()
+        self._cprofile = cProfile.Profile() if cprofile else None
+        if self._cprofile:
+            self._cprofile.enable()
+
+    def _peaks(self) -> tuple[int, int]:
+        tm = tracemalloc.get_traced_memory()[1] if self.trace_memory else 0
+        return peak_rss_bytes(), tm
+
+    def _reset_peaks(self) -> None:
+        if self._rss_resettable:
+            _reset_peak_rss()
+        if self.trace_memory:
+            tracemalloc.reset_peak()
+
+    def _path(self, name: str) -> str:
+        return "/".join([f["name"] for f in self._stack] + [name])
+
+    @contextmanager
+    def span(self, name: str):
+        if self._stack:
+            parent = self._stack[-1]
+            rss, tm = self._peaks()
+            parent["rss"], parent["tm"] = max(parent["rss"], rss), max(parent["tm"], tm)
+        self._reset_peaks()
+        frame = {"name": name, "path": self._path(name), "rss": 0, "tm": 0}
+        self._stack.append(frame)
+        start, cpu = time.perf_counter(), _cpu_seconds()
+        try:
+            yield
+        finally:
+            wall, cpu = time.perf_counter() - start, _cpu_seconds() - cpu
+            rss, tm = self._peaks()
+            rss, tm = max(frame["rss"], rss), max(frame["tm"], tm)
+            self._stack.pop()
+            if self._stack:
+                parent = self._stack[-1]
+                parent["rss"], parent["tm"] = max(parent["rss"], rss), max(parent["tm"], tm)
+            span = {
+                "name": frame["path"],
+                "start_s": round(start - self._origin, 4),
+                "wall_s": round(wall, 4),
+                "cpu_s": round(cpu, 4),
+                "peak_rss_mb": round(rss / _MB, 2),
+            }
+            if self.trace_memory:
+                span["tracemalloc_peak_mb"] = round(tm / _MB, 2)
+            with self._lock:
+                self.spans.append(span)
+
+    def record(self, name: str, wall_s: float, **extra: Any) -> None:
+        """Add a span measured elsewhere (e.g. on a worker thread)."""
+        with self._lock:
+            self.spans.append({"name": self._path(name), "wall_s": round(wall_s, 4), **extra})
+
+    def stop(self) -> None:
+        if self._cprofile:
+            self._cprofile.disable()
+
+    def dump_cprofile(self, path: Path) -> Optional[str]:
+        """Write collected cProfile stats (pstats format, e.g. for snakeviz)."""
+        if self._cprofile is None:
+            return None
+        self._cprofile.dump_stats(str(path))
+        return str(path)
+
+
+def ordered(spans: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Spans in start order, parents before their children."""
+    return sorted(spans, key=lambda s: (s.get("start_s", float("inf")), s["name"].count("/")))
+
+
+def write_folded(spans: List[Dict[str, Any]], path: Path) -> str:
+    """Write spans as folded stacks ("a;b;c <ms>") for flamegraph.pl/speedscope.
+
+    Each line carries the span's self time: its wall time minus that of its
+    direct children.
+    """
+    child_ms: Dict[str, float] = {}
+    for s in spans:
+        if "/" in s["name"]:
+            parent = s["name"].rsplit("/", 1)[0]
+            child_ms[parent] = child_ms.get(parent, 0.0) + s["wall_s"] * 1000
+    lines = []
+    for s in ordered(spans):
+        self_ms = max(0.0, s["wall_s"] * 1000 - child_ms.get(s["name"], 0.0))
+        lines.append(f"{s['name'].replace('/', ';')} {int(round(self_ms))}")
+    Path(path).write_text("\n".join(lines) + "\n", encoding="utf-8")
+    return str(path)
+
+
+def summarize(spans: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Totals over top-level spans plus the overall memory peaks."""
+    top = [s for s in spans if "/" not in s["name"] and "start_s" in s]
+    traced = [s["tracemalloc_peak_mb"] for s in spans if "tracemalloc_peak_mb" in s]
+    return {
+        "wall_s": round(sum(s["wall_s"] for s in top), 4),
+        "cpu_s": round(sum(s.get("cpu_s", 0.0) for s in top), 4),
+        "peak_rss_mb": max((s.get("peak_rss_mb", 0.0) for s in spans), default=0.0),
+        "tracemalloc_peak_mb": max(traced) if traced else None,
+    }
@@ -0,0 +1,138 @@
+from __future__ import annotations
+import hashlib, json, os
+from dataclasses import asdict
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+from pipeline.bundle import write_bundle
+from pipeline.checks import CHECK_SUITE_VERSION, run_checks, write_findings
+from pipeline.hashing import HashManifest
+from pipeline.runlog import RunLog
+
+# Artifacts whose content (small files) or identity (large files) feeds the
+# re-check fingerprint. Anything the checks read must be listed here. Content
+# hashes come from the run's hash manifest, so unchanged files are not reread.
+HASHED_ARTIFACTS = ["metadata.json", "model_card.md"]
+STAT_ARTIFACTS = ["model.joblib", "model.lrm", "encoder.json", "dataset_card.md", "run_report.md"]
+
+
+def run_fingerprint(run_dir: Path) -> str:
+    """Digest of everything a compliance verdict depends on for one run."""
+    h = hashlib.sha256(f"suite={CHECK_SUITE_VERSION}\n".encode())
+    manifest = HashManifest.for_run(run_dir)
+    for name in HASHED_ARTIFACTS:
+        path = run_dir / name
+        h.update(f"{name}:".encode())
+        h.update(manifest.hash(path).encode() if path.exists() else b"missing")
+    if manifest.misses:
+        manifest.save()
+    for name in STAT_ARTIFACTS:
+        path = run_dir / name
+        if path.exists():
+            st = path.stat()
+            h.update(f"{name}:{st.st_size}:{st.st_mtime_ns}\n".encode())
+        else:
+            h.update(f"{name}:missing\n".encode())
+    h.update(f"log:{RunLog(run_dir.parent.parent / 'run_log').exists()}\n".encode())
+    return h.hexdigest()
+
+
+def recheck_run(run_dir: str) -> Dict[str, Any]:
+    """Run the check suite for one run directory (executed in a worker process)."""
+    path = Path(run_dir)
+    try:
+        metadata = json.loads((path / "metadata.json").read_text(encoding="utf-8"))
+        findings = run_checks(metadata, path)
+        status = write_findings(path, findings)
+        # The checks only write files outside the fingerprint, so it can be taken
+        # now; any manifest entries it adds then make it into the bundle.
+        fingerprint = run_fingerprint(path)
+        write_bundle(path)  # the bundle must carry the new findings
+    except (OSError, ValueError) as e:
+        return {"run_id": path.name, "status": "ERROR", "error": str(e)}
+    # Timings differ on every evaluation; only the verdicts decide "changed".
+    findings_bytes = json.dumps(
+        [{k: v for k, v in asdict(f).items() if k != "duration_ms"} for f in findings], sort_keys=True
+    ).encode()
+    metadata["compliance"] = {
+        "status": status,
+        "blockers": [f.id for f in findings if f.severity == "BLOCKER" and not f.passed],
+        "warnings": [f.id for f in findings if f.severity == "WARN" and not f.passed],
+    }
+    return {
+        "run_id": path.name,
+        "status": status,
+        "findings_sha256": hashlib.sha256(findings_bytes).hexdigest(),
+        "fingerprint": fingerprint,
+        "record": metadata,
+    }
+
+
+def load_state(state_path: Path) -> Dict[str, Dict[str, Any]]:
+    if not state_path.exists():
+        return {}
+    try:
+        return json.loads(state_path.read_text(encoding="utf-8"))
+    except ValueError:
+        return {}
+
+
+def save_state(state_path: Path, state: Dict[str, Dict[str, Any]]) -> None:
+    tmp = state_path.with_suffix(".tmp")
+    tmp.write_text(json.dumps(state, indent=2), encoding="utf-8")
+    os.replace(tmp, state_path)
+
+
+def bulk_recheck(
+    runs_root: Path,
+    run_ids: List[str],
+    state_path: Path,
+    workers: Optional[int] = None,
+    force: bool = False,
+) -> List[Dict[str, Any]]:
+    """Re-evaluate many runs in a process pool, skipping unchanged ones.
+
+    A run is skipped when its fingerprint (metadata, artifacts, check-suite
+    version) matches the one stored in ``state_path`` from the last bulk
+    re-check. Each result carries ``previous_status`` and ``changed`` (the
+    findings content differs from last time) so callers can upload and
+    report only what moved.
+    """
+    state = load_state(state_path)
+    todo, results = [], []
+    for run_id in run_ids:
+        run_dir = runs_root / run_id
+        if not (run_dir / "metadata.json").exists():
+            continue
+        prev = state.get(run_id)
+        if not force and prev and prev.get("fingerprint") == run_fingerprint(run_dir):
+            results.append({"run_id": run_id, "status": prev["status"], "previous_status": prev["status"],
+                            "skipped": True, "changed": False})
+            continue
+        todo.append(run_id)
+
+    if todo:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for res in pool.map(recheck_run, [str(runs_root / r) for r in todo], chunksize=16):
+                prev = state.get(res["run_id"], {})
+                res["previous_status"] = prev.get("status")
+                res["skipped"] = False
+                res["changed"] = res.get("findings_sha256") != prev.get("findings_sha256")
+                if res["status"] != "ERROR":
+                    state[res["run_id"]] = {
+                        "fingerprint": res["fingerprint"],
+                        "status": res["status"],
+                        "findings_sha256": res["findings_sha256"],
+                    }
+                results.append(res)
+        save_state(state_path, state)
+    return results
+
+
+def verdict_changes(results: List[Dict[str, Any]]) -> Dict[str, int]:
+    """Count status transitions, e.g. {"PASS -> FAIL": 3, "PASS -> PASS": 120}."""
+    counts: Dict[str, int] = {}
+    for r in results:
+        key = f"{r.get('previous_status') or 'NEW'} -> {r['status']}"
+        counts[key] = counts.get(key, 0) + 1
+    return dict(sorted(counts.items()))
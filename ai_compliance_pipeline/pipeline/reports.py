@@ -1,5 +1,5 @@
 from pathlib import Path
-from typing import Dict, Any
+from typing import Dict, Any, List
 
 def write_dataset_card(run_dir: Path, meta: Dict[str, Any]):
     """Write a simple dataset card as Markdown."""
@@ -12,10 +12,85 @@ def write_dataset_card(run_dir: Path, meta: Dict[str, Any]):
         f"**Schema**: {dataset.get('schema')}",
         f"**SHA-256**: {dataset.get('dataset_sha256')}",
     ]
+    fp = dataset.get("fingerprint")
+    if fp:
+        line = f"**Fingerprint**: {fp['scheme']} over {fp['blocks']} blocks of {fp['block_bytes']} bytes ({fp['mode']})"
+        if fp["mode"] == "append":
+            line += f", extends {fp['base_sha256'][:12]} by {fp['appended_rows']} rows / {fp['appended_bytes']} bytes"
+            line += "; every base byte was re-hashed and matched, only the appended bytes were parsed"
+        lines.append(line)
+    profile = dataset.get("profile")
+    if profile:
+        lines += _profile_lines(profile)
     path = run_dir / "dataset_card.md"
     path.write_text("\n".join(lines), encoding="utf-8")
     return str(path)
 
+def _profile_lines(profile: Dict[str, Any]) -> List[str]:
+    """Dataset-card section: one row per column from the one-pass profile (pipeline.dataprofile)."""
+    lines = ["", "## Profile",
+             f"{profile['rows']} rows; quantiles and distinct counts are sketch estimates.", "",
+             "| Column | Kind | Nulls | Distinct | Min | Mean ± std | p50 | Max | Top values |",
+             "|---|---|---|---|---|---|---|---|---|"]
+    for col, c in profile["columns"].items():
+        nulls = f"{c['nulls']} ({c['null_rate']:.1%})"
+        if c["kind"] == "numeric":
+            q = c["quantiles"]
+            lines.append(f"| {col} | numeric | {nulls} | {c['distinct']} | {_fmt(c['min'], 2)} | "
+                         f"{_fmt(c['mean'], 2)} ± {_fmt(c['std'], 2)} | {_fmt(q.get('0.5'), 2)} | {_fmt(c['max'], 2)} | |")
+        else:
+            top = ", ".join(f"{t['value']} ({t['share']:.1%})" for t in c["top"][:3])
+            lines.append(f"| {col} | categorical | {nulls} | {c['distinct']} | | | | | {top} |")
+    return lines
+
+def _metrics_lines(metrics: Dict[str, Any]) -> List[str]:
+    """Model-card section for the evaluation: metrics with CIs, confusion matrix, calibration."""
+    if "n" not in metrics:  # runs evaluated before the full evaluation existed
+        return [f"**Metrics**: {metrics}"]
+    boot = metrics.get("bootstrap") or {}
+    intervals = boot.get("intervals") or {}
+    names = ["accuracy", "precision", "recall", "f1", "roc_auc", "brier"]
+    ci_header = f"{boot['confidence']:.0%} CI ({boot['replicates']} bootstrap resamples)" if boot else "CI"
+    lines = ["", "## Evaluation",
+             f"Held-out rows: {metrics['n']} ({metrics['positives']} positive), threshold {metrics['threshold']}", "",
+             f"| Metric | Value | {ci_header} |", "|---|---|---|"]
+    for name in names:
+        value = metrics.get("value") if name == "accuracy" else metrics.get(name)
+        ci = intervals.get(name)
+        lines.append(f"| {name} | {_fmt(value, 4)} | {f'{ci[0]:.4f} - {ci[1]:.4f}' if ci else '-'} |")
+    cm = metrics.get("confusion_matrix")
+    if cm:
+        lines += ["", "Confusion matrix (rows: actual, columns: predicted)", "",
+                  "| | predicted 0 | predicted 1 |", "|---|---|---|",
+                  f"| actual 0 | {cm['tn']} | {cm['fp']} |", f"| actual 1 | {cm['fn']} | {cm['tp']} |"]
+    calibration = metrics.get("calibration")
+    if calibration:
+        lines += ["", f"Calibration (expected calibration error {_fmt(calibration['ece'], 4)})", "",
+                  "| Bin | Rows | Mean predicted | Fraction positive |", "|---|---|---|---|"]
+        lines += [f"| {b['lower']:.1f}-{b['upper']:.1f} | {b['count']} | {_fmt(b['mean_predicted'], 3)} | "
+                  f"{_fmt(b['fraction_positive'], 3)} |" for b in calibration["bins"]]
+    return lines
+
+def _cv_lines(cv: Dict[str, Any]) -> List[str]:
+    """Model-card section for cross-validation: mean ± std per metric and one row per fold."""
+    names = list(cv["summary"])
+    acc = cv["summary"]["accuracy"]
+    lines = ["", "## Cross-validation",
+             f"{cv['k']}-fold stratified on the training split (seed {cv['random_state']}), "
+             f"accuracy {_fmt(acc['mean'], 4)} ± {_fmt(acc['std'], 4)}, {cv['wall_seconds']:.2f}s wall", "",
+             "| Fold | Rows (fit/val) | " + " | ".join(names) + " | Fit s | Eval s |",
+             "|---|---|" + "---|" * (len(names) + 2)]
+    if cv.get("unconverged_folds"):
+        lines[2] += f". {cv['unconverged_folds']} folds did not converge (marked *)"
+    for f in cv["folds"]:
+        mark = "*" if f.get("converged") is False else ""
+        lines.append(f"| {f['fold']}{mark} | {f['train_size']}/{f['val_size']} | "
+                     + " | ".join(_fmt(f["metrics"][n], 4) for n in names)
+                     + f" | {f['fit_seconds']:.3f} | {f['eval_seconds']:.3f} |")
+    lines.append("| mean ± std | | " + " | ".join(
+        f"{_fmt(cv['summary'][n]['mean'], 4)} ± {_fmt(cv['summary'][n]['std'], 4)}" for n in names) + " | | |")
+    return lines
+
 def write_model_card(run_dir: Path, meta: Dict[str, Any]):
     """Write a simple model card as Markdown."""
     model = meta.get("model", {})
@@ -23,9 +98,29 @@ def write_model_card(run_dir: Path, meta: Dict[str, Any]):
         "# Model Card",
         f"**Algorithm**: {model.get('algorithm')}",
         f"**Hyperparameters**: {model.get('hyperparameters')}",
-        f"**Metrics**: {model.get('metrics')}",
         f"**Artifact Path**: {model.get('artifact_path')}",
     ]
+    sweep = model.get("sweep")
+    if sweep:
+        best = sweep["trials"][sweep["best_index"]]
+        line = f"**Sweep**: {len(sweep['trials'])} configs tried, best {sweep.get('selection', 'accuracy')} {best['value']:.4f}"
+        if sweep.get("unconverged"):
+            line += f"; {sweep['unconverged']} trials did not converge and were excluded from selection"
+            if best.get("converged") is False:
+                line += " (none converged, so the best is unconverged too)"
+        lines.append(line)
+    compact = model.get("compact_export")
+    if compact and compact.get("path"):
+        line = f"**Compact Export**: {Path(compact['path']).name} ({compact['format']}, {compact['bytes']} bytes)"
+        check = compact.get("verification")
+        if check:
+            line += f", max |Δp| vs model {check['max_abs_diff_proba']:.2e} on {check['rows']} rows"
+        lines.append(line)
+    # Sections open with a blank line, so the card's single-line fields must all come first.
+    cv = model.get("cv")
+    if cv:
+        lines += _cv_lines(cv)
+    lines += _metrics_lines(model.get("metrics") or {})
     path = run_dir / "model_card.md"
     path.write_text("\n".join(lines), encoding="utf-8")
     return str(path)
@@ -50,6 +145,27 @@ def write_run_report(run_dir: Path, meta: Dict[str, Any]):
         "## Compliance",
         f"- Status: {meta.get('compliance', {}).get('status', '-')}",
     ]
+    profile = meta.get("profile")
+    if profile:
+        lines += ["", "## Profile", _profile_table(profile.get("spans", []))]
     path = run_dir / "run_report.md"
     path.write_text("\n".join(lines), encoding="utf-8")
     return str(path)
+
+def _fmt(value, digits=None):
+    if value is None:
+        return "-"
+    return f"{value:.{digits}f}" if digits is not None else value
+
+def _profile_table(spans):
+    """Markdown table of profile spans (wall/CPU seconds, peak memory in MB)."""
+    rows = [
+        "| Span | Wall (s) | CPU (s) | Peak RSS (MB) | tracemalloc peak (MB) |",
+        "|---|---|---|---|---|",
+    ]
+    for s in spans:
+        rows.append(
+            f"| {s['name']} | {s['wall_s']} | {_fmt(s.get('cpu_s'))} | {_fmt(s.get('peak_rss_mb'))} "
+            f"| {_fmt(s.get('tracemalloc_peak_mb'))} |"
+        )
+    return "\n".join(rows)
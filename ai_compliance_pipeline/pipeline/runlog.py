@@ -0,0 +1,427 @@
+from __future__ import annotations
+import argparse, json, os, re, uuid
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+import numpy as np
+from pipeline.locking import append_line, file_lock
+
+# Layout of the global run log (artifacts/run_log/):
+#   segments/000007.jsonl     append-only JSON lines; the highest number is active
+#   parts/000001-000006.npz   compacted closed segments, one array per column
+#   index.json                per-part row count and timestamp/accuracy/status/dataset ranges
+# Records keep "later wins" semantics: a run logged twice is reported as its
+# most recent record, whichever segment or part holds it.
+LEGACY_FILENAME = "run_log.jsonl"
+INDEX_FILENAME = "index.json"
+DEFAULT_SEGMENT_BYTES = 4 * 1024 * 1024
+DEFAULT_COMPACT_SEGMENTS = 4  # closed segments that trigger a compaction
+MAX_INDEXED_DATASETS = 256
+_SEGMENT_RE = re.compile(r"^(\d{6})\.jsonl$")
+
+
+def _columns(record: Dict[str, Any]) -> Tuple[str, str, float, str, str]:
+    """Queryable columns of one run record (run_id, timestamp, accuracy, status, dataset)."""
+    accuracy = (record.get("model", {}).get("metrics") or {}).get("value")
+    return (
+        str(record.get("run_id") or ""),
+        str(record.get("timestamp_utc") or ""),
+        float(accuracy) if accuracy is not None else float("nan"),
+        str((record.get("compliance") or {}).get("status") or ""),
+        str((record.get("dataset") or {}).get("dataset_sha256") or ""),
+    )
+
+
+def _read_segment(path: Path) -> List[Dict[str, Any]]:
+    records = []
+    try:
+        with path.open("r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    continue  # tolerate a torn final line
+    except FileNotFoundError:
+        pass
+    return records
+
+
+def _matches(cols: Tuple[str, str, float, str, str], since, until, status, dataset_sha256, min_accuracy, run_id) -> bool:
+    rid, ts, acc, st, ds = cols
+    return not (
+        (since and ts < since)
+        or (until and ts >= until)
+        or (status and st != status)
+        or (dataset_sha256 and ds != dataset_sha256)
+        or (min_accuracy is not None and not acc >= min_accuracy)
+        or (run_id and rid != run_id)
+    )
+
+
+class RunLog:
+    """Segmented, compacted global run log with filtered queries.
+
+    ``append`` writes to the active segment and rotates it past
+    ``segment_bytes``; once ``compact_segments`` closed segments pile up they
+    are folded into one columnar part (sorted by timestamp, with a sorted
+    run_id index). ``query`` prunes parts by the ranges kept in index.json,
+    binary-searches the timestamp column and only decodes matching records.
+
+    Constructing a RunLog has no side effects. A legacy run_log.jsonl next to
+    the log directory is read as the oldest records until a writer calls
+    ``migrate``, which turns it into the first segment.
+    """
+
+    def __init__(self, root: Path, segment_bytes: int = DEFAULT_SEGMENT_BYTES,
+                 compact_segments: int = DEFAULT_COMPACT_SEGMENTS):
+        self.root = Path(root)
+        self.segment_dir = self.root / "segments"
+        self.part_dir = self.root / "parts"
+        self.index_path = self.root / INDEX_FILENAME
+        self.segment_bytes = segment_bytes
+        self.compact_segments = compact_segments
+        self.legacy_path = self.root.parent / LEGACY_FILENAME
+
+    # -- layout -------------------------------------------------------------
+
+    def _lock(self):
+        return file_lock(self.index_path)
+
+    def index(self) -> Dict[str, Any]:
+        if not self.index_path.exists():
+            return {"version": 1, "compacted_through": 0, "parts": []}
+        return json.loads(self.index_path.read_text(encoding="utf-8"))
+
+    def _save_index(self, index: Dict[str, Any]) -> None:
+        tmp = self.index_path.with_name(f".{INDEX_FILENAME}.{uuid.uuid4().hex}.tmp")
+        tmp.write_text(json.dumps(index, indent=2), encoding="utf-8")
+        os.replace(tmp, self.index_path)
+
+    def segments(self, index: Optional[Dict[str, Any]] = None) -> List[Path]:
+        """Uncompacted segments in order; the last one is active."""
+        through = (index or self.index())["compacted_through"]
+        if not self.segment_dir.exists():
+            return []
+        found = []
+        for name in os.listdir(self.segment_dir):
+            m = _SEGMENT_RE.match(name)
+            if m and int(m.group(1)) > through:
+                found.append((int(m.group(1)), self.segment_dir / name))
+        return [p for _, p in sorted(found)]
+
+    def exists(self) -> bool:
+        index = self.index()
+        return bool(index["parts"] or self.segments(index) or self.legacy_path.exists())
+
+    def _has_new_layout(self) -> bool:
+        index = self.index()
+        return bool(index["parts"] or self.segments(index))
+
+    def migrate(self) -> bool:
+        """Move a legacy run_log.jsonl into the segmented layout; returns whether there was one.
+
+        Called by writers (the pipeline's publish stage, the CLI), never on
+        construction, so read-only users leave the files alone.
+        """
+        legacy = self.legacy_path
+        if not legacy.exists():
+            return False
+        self.segment_dir.mkdir(parents=True, exist_ok=True)
+        with self._lock():
+            if not legacy.exists():
+                return False
+            if self._has_new_layout():
+                # The new layout was started meanwhile: the old lines become the oldest part.
+                records = _read_segment(legacy)
+                if records:
+                    index = self.index()
+                    index["parts"].insert(0, self._write_part(records, f"legacy-{uuid.uuid4().hex[:8]}.npz"))
+                    self._save_index(index)
+                legacy.unlink()
+                return True
+            os.replace(legacy, self.segment_dir / f"{1:06d}.jsonl")
+        return True
+
+    # -- writing ------------------------------------------------------------
+
+    def append(self, record: Dict[str, Any]) -> Path:
+        """Append one run record; safe with concurrent writers."""
+        self.segment_dir.mkdir(parents=True, exist_ok=True)
+        line = json.dumps(record, ensure_ascii=False)
+        with self._lock():
+            index = self.index()
+            segments = self.segments(index)
+            if segments:
+                active = segments[-1]
+                if active.stat().st_size >= self.segment_bytes:
+                    active = self.segment_dir / f"{int(active.stem) + 1:06d}.jsonl"
+                    segments.append(active)
+            else:
+                active = self.segment_dir / f"{index['compacted_through'] + 1:06d}.jsonl"
+                segments.append(active)
+            append_line(active, line)
+            if len(segments) - 1 >= self.compact_segments:
+                self._compact(index, segments[:-1])
+        return active
+
+    def compact(self, include_active: bool = False) -> Optional[Dict[str, Any]]:
+        """Fold closed segments (optionally the active one too) into a columnar part."""
+        with self._lock():
+            index = self.index()
+            segments = self.segments(index)
+            closed = segments if include_active else segments[:-1]
+            return self._compact(index, closed) if closed else None
+
+    def _compact(self, index: Dict[str, Any], segments: List[Path]) -> Optional[Dict[str, Any]]:
+        records = [r for path in segments for r in _read_segment(path)]
+        first, last = int(segments[0].stem), int(segments[-1].stem)
+        entry = None
+        if records:
+            entry = self._write_part(records, f"{first:06d}-{last:06d}.npz")
+            index["parts"].append(entry)
+        index["compacted_through"] = last
+        self._save_index(index)
+        for path in segments:
+            path.unlink(missing_ok=True)
+        return entry
+
+    def _write_part(self, records: List[Dict[str, Any]], name: str) -> Dict[str, Any]:
+        cols = [_columns(r) for r in records]
+        order = sorted(range(len(records)), key=lambda i: cols[i][1])  # stable: ties keep log order
+        run_id = np.array([cols[i][0] for i in order])
+        timestamp = np.array([cols[i][1] for i in order])
+        accuracy = np.array([cols[i][2] for i in order], dtype=np.float64)
+        status = np.array([cols[i][3] for i in order])
+        dataset = np.array([cols[i][4] for i in order])
+        blobs = [json.dumps(records[i], ensure_ascii=False).encode("utf-8") for i in order]
+        offsets = np.zeros(len(blobs) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum([len(b) for b in blobs])
+        run_id_rows = np.argsort(run_id, kind="stable")
+
+        self.part_dir.mkdir(parents=True, exist_ok=True)
+        path = self.part_dir / name
+        tmp = path.with_name(f".{name}.{uuid.uuid4().hex}.tmp.npz")
+        np.savez(
+            tmp, run_id=run_id, timestamp=timestamp, accuracy=accuracy, status=status, dataset=dataset,
+            log_order=np.array(order, dtype=np.int64), run_id_sorted=run_id[run_id_rows], run_id_rows=run_id_rows,
+            offsets=offsets, records=np.frombuffer(b"".join(blobs), dtype=np.uint8),
+        )
+        os.replace(tmp, path)
+        datasets = sorted(set(dataset.tolist()))
+        finite = accuracy[~np.isnan(accuracy)]
+        return {
+            "file": name,
+            "rows": len(records),
+            "min_timestamp": str(timestamp[0]),
+            "max_timestamp": str(timestamp[-1]),
+            "min_accuracy": float(finite.min()) if len(finite) else None,
+            "max_accuracy": float(finite.max()) if len(finite) else None,
+            "statuses": sorted(set(status.tolist())),
+            "datasets": datasets if len(datasets) <= MAX_INDEXED_DATASETS else None,
+        }
+
+    # -- reading ------------------------------------------------------------
+
+    def _snapshot(self) -> Tuple[Dict[str, Any], List[List[Dict[str, Any]]]]:
+        """Index plus the records of its uncompacted segments, read consistently.
+
+        Parts never change once written, but a concurrent compaction deletes
+        segments; if one happened mid-read, read again. An unmigrated legacy
+        file is read as the oldest segment, again retrying if a writer migrated
+        it mid-read.
+        """
+        while True:
+            legacy = self.legacy_path.exists()
+            try:
+                segments = [_read_segment(self.legacy_path)] if legacy else []
+            except FileNotFoundError:
+                continue
+            index = self.index()
+            segments += [_read_segment(p) for p in self.segments(index)]
+            if (self.index()["compacted_through"] == index["compacted_through"]
+                    and self.legacy_path.exists() == legacy):
+                return index, segments
+
+    def records(self) -> Iterator[Dict[str, Any]]:
+        """Every logged record, oldest first (parts in log order, then segments)."""
+        index, segments = self._snapshot()
+        for entry in index["parts"]:
+            with np.load(self.part_dir / entry["file"]) as part:
+                offsets, blob = part["offsets"], part["records"].tobytes()
+                for row in np.argsort(part["log_order"], kind="stable"):
+                    yield json.loads(blob[offsets[row]:offsets[row + 1]])
+        for records in segments:
+            yield from records
+
+    def query(
+        self,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+        status: Optional[str] = None,
+        dataset_sha256: Optional[str] = None,
+        min_accuracy: Optional[float] = None,
+        run_id: Optional[str] = None,
+        limit: Optional[int] = None,
+        descending: bool = False,
+    ) -> List[Dict[str, Any]]:
+        """Latest record of every run matching all filters, ordered by timestamp.
+
+        ``since`` is inclusive and ``until`` exclusive; both are ISO 8601
+        prefixes, so dates ("2025-01-31") work as well as full timestamps.
+        """
+        filters = (since, until, status, dataset_sha256, min_accuracy, run_id)
+        index, segment_records = self._snapshot()
+        # Sources oldest to newest: (parts..., segments...). A hit is dropped
+        # if any newer source holds another record of the same run.
+        hits: Dict[str, Tuple[int, Dict[str, Any]]] = {}
+        newest_source: Dict[str, int] = {}
+        sources = len(index["parts"])
+        for i, records in enumerate(segment_records):
+            for r in records:
+                cols = _columns(r)
+                newest_source[cols[0]] = sources + i
+                if _matches(cols, *filters):
+                    hits[cols[0]] = (sources + i, r)
+                else:
+                    hits.pop(cols[0], None)
+
+        for source, entry in enumerate(index["parts"]):
+            if not self._part_may_match(entry, *filters):
+                continue
+            for r in self._query_part(entry, *filters):
+                rid = r.get("run_id") or ""
+                if rid in hits and hits[rid][0] > source:
+                    continue
+                hits[rid] = (source, r)
+        # Drop hits superseded by a newer part or segment that did not match.
+        for rid in [rid for rid, (source, _) in hits.items() if newest_source.get(rid, source) > source]:
+            del hits[rid]
+        for source, entry in enumerate(index["parts"][1:], start=1):
+            older = np.array([rid for rid, (s, _) in hits.items() if s < source])
+            if not len(older):
+                continue
+            with np.load(self.part_dir / entry["file"]) as part:
+                superseded = older[np.isin(older, part["run_id_sorted"])]
+            for rid in superseded.tolist():
+                del hits[rid]
+        result = [r for _, r in hits.values()]
+        result.sort(key=lambda r: str(r.get("timestamp_utc") or ""), reverse=descending)
+        return result[:limit] if limit is not None else result
+
+    @staticmethod
+    def _part_may_match(entry, since, until, status, dataset_sha256, min_accuracy, run_id) -> bool:
+        if since and entry["max_timestamp"] < since:
+            return False
+        if until and entry["min_timestamp"] >= until:
+            return False
+        if status and status not in entry["statuses"]:
+            return False
+        if dataset_sha256 and entry["datasets"] is not None and dataset_sha256 not in entry["datasets"]:
+            return False
+        if min_accuracy is not None and (entry["max_accuracy"] is None or entry["max_accuracy"] < min_accuracy):
+            return False
+        return True
+
+    def _query_part(self, entry, since, until, status, dataset_sha256, min_accuracy, run_id) -> List[Dict[str, Any]]:
+        with np.load(self.part_dir / entry["file"]) as part:
+            timestamp = part["timestamp"]
+            if run_id:
+                sorted_ids = part["run_id_sorted"]
+                lo, hi = np.searchsorted(sorted_ids, run_id, "left"), np.searchsorted(sorted_ids, run_id, "right")
+                rows = np.sort(part["run_id_rows"][lo:hi])
+            else:
+                # Rows are sorted by timestamp, so a date range is a slice.
+                lo = np.searchsorted(timestamp, since, "left") if since else 0
+                hi = np.searchsorted(timestamp, until, "left") if until else len(timestamp)
+                rows = np.arange(lo, hi)
+            mask = np.ones(len(rows), dtype=bool)
+            if run_id and since:
+                mask &= timestamp[rows] >= since
+            if run_id and until:
+                mask &= timestamp[rows] < until
+            if status:
+                mask &= part["status"][rows] == status
+            if dataset_sha256:
+                mask &= part["dataset"][rows] == dataset_sha256
+            if min_accuracy is not None:
+                mask &= part["accuracy"][rows] >= min_accuracy
+            rows = rows[mask]
+            if not len(rows):
+                return []
+            # A run logged twice in one part counts by its latest record only,
+            # which may be one that did not match.
+            sorted_ids, id_rows, log_order = part["run_id_sorted"], part["run_id_rows"], part["log_order"]
+            ids = part["run_id"][rows]
+            lo, hi = np.searchsorted(sorted_ids, ids, "left"), np.searchsorted(sorted_ids, ids, "right")
+            repeated = np.flatnonzero(hi - lo > 1)
+            if len(repeated):
+                keep = np.ones(len(rows), dtype=bool)
+                for i in repeated.tolist():
+                    keep[i] = log_order[rows[i]] == log_order[id_rows[lo[i]:hi[i]]].max()
+                rows = rows[keep]
+            offsets, blob = part["offsets"], part["records"]
+            return [json.loads(blob[offsets[row]:offsets[row + 1]].tobytes()) for row in rows.tolist()]
+
+    def stats(self) -> Dict[str, Any]:
+        index = self.index()
+        segments = self.segments(index)
+        return {
+            "root": str(self.root),
+            "parts": len(index["parts"]),
+            "compacted_rows": sum(e["rows"] for e in index["parts"]),
+            "segments": len(segments),
+            "segment_bytes": sum(p.stat().st_size for p in segments),
+            "compacted_through": index["compacted_through"],
+        }
+
+
+def _print_table(records: List[Dict[str, Any]]) -> None:
+    print(f"{'Run ID':<38} {'Timestamp':<34} {'Accuracy':>9} {'Status':<8} Dataset")
+    for r in records:
+        rid, ts, acc, status, dataset = _columns(r)
+        accuracy = f"{acc:.4f}" if acc == acc else "-"
+        print(f"{rid:<38} {ts:<34} {accuracy:>9} {status or '-':<8} {dataset[:12] or '-'}")
+
+
+def main(argv: Optional[List[str]] = None):
+    ap = argparse.ArgumentParser(description="Query and maintain the segmented global run log")
+    ap.add_argument("--root", type=str, default="artifacts/run_log", help="Run log directory")
+    sub = ap.add_subparsers(dest="command", required=True)
+    q = sub.add_parser("query", help="Latest record of every run matching the filters")
+    q.add_argument("--since", type=str, default=None, help="ISO date/timestamp, inclusive")
+    q.add_argument("--until", type=str, default=None, help="ISO date/timestamp, exclusive")
+    q.add_argument("--status", type=str, default=None, help="Compliance status (PASS/WARN/FAIL)")
+    q.add_argument("--dataset", type=str, default=None, help="Dataset sha256")
+    q.add_argument("--min-accuracy", type=float, default=None)
+    q.add_argument("--run-id", type=str, default=None)
+    q.add_argument("--limit", type=int, default=None, help="At most this many runs (newest first with --desc)")
+    q.add_argument("--desc", action="store_true", help="Newest first")
+    q.add_argument("--json", action="store_true", help="Print full records as JSON lines")
+    c = sub.add_parser("compact", help="Fold closed segments into a columnar part")
+    c.add_argument("--all", action="store_true", help="Compact the active segment too")
+    sub.add_parser("stats", help="Show the log layout")
+    args = ap.parse_args(argv)
+
+    log = RunLog(Path(args.root))
+    if log.migrate():
+        print(f"Migrated {log.legacy_path} into {log.segment_dir}")
+    if args.command == "query":
+        records = log.query(args.since, args.until, args.status, args.dataset, args.min_accuracy,
+                            args.run_id, args.limit, args.desc)
+        if args.json:
+            for r in records:
+                print(json.dumps(r, ensure_ascii=False))
+        else:
+            _print_table(records)
+            print(f"{len(records)} runs")
+    elif args.command == "compact":
+        entry = log.compact(include_active=args.all)
+        print(f"Compacted {entry['rows']} records into {entry['file']}" if entry else "Nothing to compact")
+    else:
+        print(json.dumps(log.stats(), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+from __future__ import annotations
+import asyncio, io, json, threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+import numpy as np
+import pandas as pd
+from pipeline.encoding import CategoricalEncoder
+from pipeline.export import COMPACT_FILENAME, LinearScorer
+from pipeline.transform import TARGET_COL
+
+DEFAULT_MODEL_CACHE_BYTES = 512 * 1024 * 1024
+
+
+def parse_rows(body: bytes, content_type: str = "") -> pd.DataFrame:
+    """Rows of a scoring request: CSV, or JSON as a list of records or ``{"rows"|"records": [...]}``.
+
+    Raises ValueError for anything else, so a malformed body is a client
+    error rather than a failure inside the encoder.
+    """
+    if "csv" in content_type:
+        try:
+            return pd.read_csv(io.BytesIO(body))
+        except pd.errors.ParserError as e:
+            raise ValueError(str(e)) from None
+    payload = json.loads(body or b"[]")
+    rows = payload
+    if isinstance(payload, dict):
+        key = next((k for k in ("rows", "records") if k in payload), None)
+        rows = payload[key] if key else None
+    if not isinstance(rows, list) or not all(isinstance(row, dict) for row in rows):
+        raise ValueError('expected a list of records or {"rows": [...]}')
+    return pd.DataFrame.from_records(rows)
+
+
+@dataclass
+class LoadedModel:
+    run_id: str
+    model: Any
+    encoder: CategoricalEncoder
+    nbytes: int
+
+    def predict_proba(self, df: pd.DataFrame) -> np.ndarray:
+        """Positive-class probabilities, using the run's own feature layout."""
+        X = self.encoder.transform(df.drop(columns=[TARGET_COL], errors="ignore"))
+        return self.model.predict_proba(X)[:, 1]
+
+
+def load_run_model(run_dir: Path, run_id: str) -> LoadedModel:
+    """Load a run's model, preferring the memory-mapped model.lrm over unpickling model.joblib."""
+    model_path = run_dir / COMPACT_FILENAME
+    encoder_path = run_dir / "encoder.json"
+    if not model_path.exists():
+        model_path = run_dir / "model.joblib"
+    if not model_path.exists() or not encoder_path.exists():
+        raise FileNotFoundError(f"Run {run_id} has no model.joblib/encoder.json")
+    if model_path.name == COMPACT_FILENAME:
+        model = LinearScorer(model_path)
+    else:
+        import joblib
+
+        model = joblib.load(model_path)
+    encoder = CategoricalEncoder.load(encoder_path)
+    # File sizes are a cheap, stable proxy for the in-memory footprint.
+    nbytes = model_path.stat().st_size + encoder_path.stat().st_size
+    return LoadedModel(run_id=run_id, model=model, encoder=encoder, nbytes=nbytes)
+
+
+class ModelCache:
+    """Thread-safe LRU of loaded models, bounded by total estimated bytes."""
+
+    def __init__(self, max_bytes: int = DEFAULT_MODEL_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self._items: "OrderedDict[str, LoadedModel]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, run_id: str, loader: Callable[[str], LoadedModel]) -> LoadedModel:
+        with self._lock:
+            item = self._items.get(run_id)
+            if item is not None:
+                self._items.move_to_end(run_id)
+                return item
+        item = loader(run_id)  # loaded outside the lock so other runs stay servable
+        with self._lock:
+            if run_id not in self._items:
+                self._items[run_id] = item
+                self._bytes += item.nbytes
+                self._evict()
+            return self._items[run_id]
+
+    def _evict(self) -> None:
+        # Keep at least the most recent entry even if it alone exceeds the bound.
+        while self._bytes > self.max_bytes and len(self._items) > 1:
+            _, old = self._items.popitem(last=False)
+            self._bytes -= old.nbytes
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"models": len(self._items), "bytes": self._bytes, "max_bytes": self.max_bytes}
+
+
+@dataclass
+class _Pending:
+    frames: List[pd.DataFrame] = field(default_factory=list)
+    futures: List[asyncio.Future] = field(default_factory=list)
+    rows: int = 0
+    timer: asyncio.TimerHandle | None = None
+
+
+class MicroBatcher:
+    """Coalesce concurrent scoring requests per run into one predict_proba call.
+
+    A request waits at most ``max_wait_ms`` (or until ``max_rows`` are queued)
+    before its run's pending frames are concatenated, scored in a worker
+    thread and split back to the callers.
+    """
+
+    def __init__(self, models: ModelCache, loader: Callable[[str], LoadedModel], max_wait_ms: float = 2.0, max_rows: int = 4096):
+        self.models = models
+        self.loader = loader
+        self.max_wait = max_wait_ms / 1000.0
+        self.max_rows = max_rows
+        self._pending: Dict[str, _Pending] = {}
+        self._tasks: set = set()
+
+    async def submit(self, run_id: str, df: pd.DataFrame) -> np.ndarray:
+        loop = asyncio.get_running_loop()
+        fut = loop.create_future()
+        pending = self._pending.setdefault(run_id, _Pending())
+        pending.frames.append(df)
+        pending.futures.append(fut)
+        pending.rows += len(df)
+        if pending.rows >= self.max_rows:
+            self._flush(run_id)
+        elif pending.timer is None:
+            pending.timer = loop.call_later(self.max_wait, self._flush, run_id)
+        return await fut
+
+    def _flush(self, run_id: str) -> None:
+        pending = self._pending.pop(run_id, None)
+        if pending is None:
+            return
+        if pending.timer is not None:
+            pending.timer.cancel()
+        task = asyncio.get_running_loop().create_task(self._score(run_id, pending))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _score(self, run_id: str, pending: _Pending) -> None:
+        try:
+            results = await asyncio.to_thread(self._score_sync, run_id, pending.frames)
+        except Exception as e:  # e.g. the model could not be loaded
+            results = [e] * len(pending.futures)
+        for result, fut in zip(results, pending.futures):
+            if fut.done():
+                continue
+            if isinstance(result, Exception):
+                fut.set_exception(result)
+            else:
+                fut.set_result(result)
+
+    def _score_sync(self, run_id: str, frames: List[pd.DataFrame]) -> List[np.ndarray | Exception]:
+        loaded = self.models.get(run_id, self.loader)
+        required = loaded.encoder.numeric + list(loaded.encoder.categories)
+        results: List[np.ndarray | Exception] = []
+        valid = []
+        # Validate per request, so one malformed request cannot fail (or be
+        # silently padded by) the others it was batched with.
+        for i, frame in enumerate(frames):
+            missing = [c for c in required if c not in frame.columns]
+            results.append(ValueError(f"Missing columns for encoding: {missing}") if missing else None)
+            if not missing:
+                valid.append(i)
+        if valid:
+            batch = pd.concat([frames[i] for i in valid], ignore_index=True) if len(valid) > 1 else frames[valid[0]]
+            probs = loaded.predict_proba(batch)
+            offset = 0
+            for i in valid:
+                results[i] = probs[offset:offset + len(frames[i])]
+                offset += len(frames[i])
+        return results
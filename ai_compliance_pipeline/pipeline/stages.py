@@ -0,0 +1,197 @@
+from __future__ import annotations
+import hashlib, importlib.util, inspect, json, os, time, uuid
+from contextlib import nullcontext
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+from pipeline.hashing import stat_signature
+from pipeline.profiling import ordered
+
+STATE_FILENAME = "stages.json"
+
+
+@dataclass(frozen=True)
+class Stage:
+    """One named step of a run.
+
+    ``fn(ctx)`` returns a dict holding every name in ``outputs`` (persisted,
+    JSON-serialisable) and ``transient`` (in-memory only, e.g. matrices).
+    The cache key covers ``inputs`` (ctx values), ``config`` (option names),
+    ``files`` (run-dir files, by stat signature) and the source of ``fn``
+    plus the modules in ``code``. ``uses`` are ctx values the stage reads
+    without them affecting its result; ``produces`` are run-dir files that
+    must still exist for a cached result to count.
+    """
+
+    name: str
+    fn: Callable[[Dict[str, Any]], Dict[str, Any]]
+    inputs: Tuple[str, ...] = ()
+    uses: Tuple[str, ...] = ()
+    outputs: Tuple[str, ...] = ()
+    transient: Tuple[str, ...] = ()
+    config: Tuple[str, ...] = ()
+    files: Tuple[str, ...] = ()
+    code: Tuple[str, ...] = ()
+    produces: Tuple[str, ...] = ()
+
+
+def _digest(value: Any) -> str:
+    return hashlib.sha256(json.dumps(value, sort_keys=True, default=str).encode()).hexdigest()
+
+
+_CODE_VERSIONS: Dict[str, str] = {}
+
+
+def code_version(stage: Stage) -> str:
+    """Hash of the stage function's source and of the modules it declares."""
+    if stage.name not in _CODE_VERSIONS:
+        h = hashlib.sha256(inspect.getsource(stage.fn).encode())
+        for module in stage.code:
+            spec = importlib.util.find_spec(module)
+            h.update(module.encode())
+            h.update(Path(spec.origin).read_bytes() if spec and spec.origin else b"missing")
+        _CODE_VERSIONS[stage.name] = h.hexdigest()
+    return _CODE_VERSIONS[stage.name]
+
+
+def load_state(run_dir: Path) -> Dict[str, Any]:
+    """Recorded stage state of a run: {"run": ..., "config": ..., "stages": {...}}."""
+    path = Path(run_dir) / STATE_FILENAME
+    if not path.exists():
+        return {"run": {}, "config": {}, "stages": {}}
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+class StageRunner:
+    """Execute stages in order, reusing results recorded in ``<run_dir>/stages.json``.
+
+    A stage is skipped when its key matches the recorded one and the files
+    it produces still exist; its persisted outputs are then restored into
+    the context. Transient values a later stage needs (e.g. the feature
+    matrix for a retrain) are rebuilt on demand by re-executing the stage
+    that produces them. With a ``profiler`` each executed stage runs inside
+    a span named after it, and the stage's spans are kept with its state.
+    """
+
+    def __init__(self, stages: List[Stage], run_dir: Path, config: Dict[str, Any], profiler=None):
+        self.stages = list(stages)
+        self.by_name = {s.name: s for s in self.stages}
+        self.run_dir = Path(run_dir)
+        self.config = dict(config)
+        self.state_path = self.run_dir / STATE_FILENAME
+        self.state = load_state(self.run_dir)
+        self._producers = {name: s for s in self.stages for name in (*s.outputs, *s.transient)}
+        self.profiler = profiler
+        self.report: Dict[str, Dict[str, Any]] = {}
+
+    @property
+    def names(self) -> List[str]:
+        return [s.name for s in self.stages]
+
+    def key(self, stage: Stage, ctx: Dict[str, Any]) -> str:
+        files = {}
+        for name in stage.files:
+            path = self.run_dir / name
+            files[name] = stat_signature(path) if path.exists() else None
+        return _digest({
+            "stage": stage.name,
+            "code": code_version(stage),
+            "config": {k: self.config.get(k) for k in stage.config},
+            "inputs": {k: _digest(ctx.get(k)) for k in stage.inputs},
+            "files": files,
+        })
+
+    def _cached(self, stage: Stage, ctx: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        entry = self.state["stages"].get(stage.name)
+        if not entry or entry.get("key") != self.key(stage, ctx):
+            return None
+        if not all((self.run_dir / f).exists() for f in stage.produces):
+            return None
+        return entry
+
+    def _save(self) -> None:
+        self.run_dir.mkdir(parents=True, exist_ok=True)
+        self.state["config"] = self.config
+        tmp = self.state_path.with_name(f".{self.state_path.name}.{uuid.uuid4().hex}.tmp")
+        tmp.write_text(json.dumps(self.state, indent=2, default=str), encoding="utf-8")
+        os.replace(tmp, self.state_path)
+
+    def _execute(self, stage: Stage, ctx: Dict[str, Any]) -> None:
+        for name in (*stage.inputs, *stage.uses):
+            if name not in ctx:
+                producer = self._producers.get(name)
+                if producer is None:
+                    raise KeyError(f"Stage {stage.name!r} needs {name!r}, which no stage produces")
+                self._execute(producer, ctx)
+        key = self.key(stage, ctx)
+        mark = len(self.profiler.spans) if self.profiler else 0
+        start = time.perf_counter()
+        with self.profiler.span(stage.name) if self.profiler else nullcontext():
+            result = stage.fn(ctx)
+        seconds = round(time.perf_counter() - start, 4)
+        missing = [n for n in (*stage.outputs, *stage.transient) if n not in result]
+        if missing:
+            raise KeyError(f"Stage {stage.name!r} did not return {missing}")
+        ctx.update(result)
+        self.state["stages"][stage.name] = {
+            "key": key,
+            "outputs": {n: result[n] for n in stage.outputs},
+            "seconds": seconds,
+            "finished_utc": datetime.now(timezone.utc).isoformat(),
+        }
+        if self.profiler:
+            self.state["stages"][stage.name]["profile"] = ordered(self.profiler.spans[mark:])
+        self._save()
+        self.report[stage.name] = {"status": "ran", "seconds": seconds}
+
+    def _restore(self, stage: Stage, ctx: Dict[str, Any], entry: Dict[str, Any], status: str) -> None:
+        ctx.update(entry["outputs"])
+        self.report[stage.name] = {"status": status, "seconds": 0.0}
+
+    def profile(self) -> List[Dict[str, Any]]:
+        """Spans of every stage, in stage order, from the most recent execution of each."""
+        return [span for name in self.names for span in self.state["stages"].get(name, {}).get("profile", [])]
+
+    def check_names(self, from_stage: Optional[str] = None, only: Optional[Iterable[str]] = None) -> None:
+        """Raise ValueError if ``from_stage`` or any of ``only`` is not a registered stage."""
+        for name in [*(only or []), *([from_stage] if from_stage else [])]:
+            if name not in self.by_name:
+                raise ValueError(f"Unknown stage {name!r}; expected one of {self.names}")
+
+    def run(self, ctx: Dict[str, Any], from_stage: Optional[str] = None,
+            only: Optional[Iterable[str]] = None) -> Dict[str, Dict[str, Any]]:
+        """Run the pipeline; returns {stage: {"status", "seconds"}}.
+
+        Without options every stage whose key changed is re-executed.
+        ``from_stage`` forces that stage and everything after it to run,
+        restoring earlier stages from the recorded state. ``only`` runs just
+        the named stages (restoring their upstream) and leaves later ones
+        alone. Status is "ran", "cached" (key matched) or "restored" (taken
+        from the state without a key check because a later stage was forced).
+        """
+        only = list(only or [])
+        self.check_names(from_stage, only)
+        order = self.names
+        if only:
+            last = max(order.index(n) for n in only)
+            selected, forced = order[:last + 1], set(only)
+        elif from_stage:
+            selected, forced = order, set(order[order.index(from_stage):])
+        else:
+            selected, forced = order, set()
+
+        self.report = {}
+        for name in selected:
+            stage = self.by_name[name]
+            if name in forced:
+                self._execute(stage, ctx)
+                continue
+            entry = self._cached(stage, ctx)
+            if entry is not None:
+                self._restore(stage, ctx, entry, "cached")
+            elif forced and name in self.state["stages"]:
+                self._restore(stage, ctx, self.state["stages"][name], "restored")
+            else:
+                self._execute(stage, ctx)
+        return self.report
@@ -0,0 +1,271 @@
+from __future__ import annotations
+import os, random, shutil, threading, time
+from abc import ABC, abstractmethod
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Collection, Dict, List, Optional
+
+UPLOAD_CHUNK_SIZE = 4 * 1024 * 1024
+
+
+class TransientStorageError(Exception):
+    """A failure worth retrying (timeouts, throttling, 5xx)."""
+
+
+class UploadError(Exception):
+    """One or more uploads failed after all retries."""
+
+    def __init__(self, failures: Dict[str, BaseException]):
+        self.failures = failures
+        detail = "; ".join(f"{k}: {e}" for k, e in failures.items())
+        super().__init__(f"{len(failures)} upload(s) failed: {detail}")
+
+
+def content_type_for(filename: str) -> str:
+    if filename.endswith(".json"):
+        return "application/json"
+    if filename.endswith(".txt"):
+        return "text/plain"
+    if filename.endswith(".md"):
+        return "text/markdown"
+    if filename.endswith(".zip"):
+        return "application/zip"
+    return "application/octet-stream"
+
+
+class StorageBackend(ABC):
+    """Minimal object-store interface used for run artifacts."""
+
+    name = "base"
+
+    @abstractmethod
+    def put_file(self, key: str, path: Path, content_type: str) -> None: ...
+
+    @abstractmethod
+    def put_bytes(self, key: str, data: bytes, content_type: str) -> None: ...
+
+    @abstractmethod
+    def get_bytes(self, key: str) -> bytes: ...
+
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        """Remove an object; a missing key is not an error."""
+
+    def is_transient(self, exc: BaseException) -> bool:
+        return isinstance(exc, (TransientStorageError, ConnectionError, TimeoutError))
+
+
+class AzureBlobBackend(StorageBackend):
+    """Azure Blob container; one service client (and its connection pool) is shared by all uploads."""
+
+    name = "azure"
+
+    def __init__(self, blob_service, container: str):
+        self.container = blob_service.get_container_client(container)
+
+    def put_file(self, key: str, path: Path, content_type: str) -> None:
+        from azure.storage.blob import ContentSettings
+
+        # Passing the open file (with its length) lets the SDK stream it in
+        # blocks instead of us reading the whole artifact into memory.
+        with open(path, "rb") as f:
+            self.container.upload_blob(
+                key, f, length=os.path.getsize(path), overwrite=True,
+                content_settings=ContentSettings(content_type=content_type),
+            )
+
+    def put_bytes(self, key: str, data: bytes, content_type: str) -> None:
+        from azure.storage.blob import ContentSettings
+
+        self.container.upload_blob(
+            key, data, overwrite=True, content_settings=ContentSettings(content_type=content_type)
+        )
+
+    def get_bytes(self, key: str) -> bytes:
+        return self.container.get_blob_client(key).download_blob().readall()
+
+    def delete(self, key: str) -> None:
+        from azure.core.exceptions import ResourceNotFoundError
+
+        try:
+            self.container.delete_blob(key)
+        except ResourceNotFoundError:
+            pass
+
+    def is_transient(self, exc: BaseException) -> bool:
+        from azure.core.exceptions import HttpResponseError, ServiceRequestError, ServiceResponseError
+
+        if isinstance(exc, (ServiceRequestError, ServiceResponseError)):
+            return True
+        if isinstance(exc, HttpResponseError):
+            return exc.status_code in (408, 429) or (exc.status_code or 0) >= 500
+        return super().is_transient(exc)
+
+
+class LocalBackend(StorageBackend):
+    """Directory tree mirroring the blob layout; writes are atomic renames."""
+
+    name = "local"
+
+    def __init__(self, root: Path):
+        self.root = Path(root)
+
+    def _target(self, key: str) -> Path:
+        target = (self.root / key).resolve()
+        if self.root.resolve() not in target.parents:
+            raise ValueError(f"Key escapes storage root: {key}")
+        target.parent.mkdir(parents=True, exist_ok=True)
+        return target
+
+    def put_file(self, key: str, path: Path, content_type: str) -> None:
+        target = self._target(key)
+        tmp = target.with_name(target.name + ".part")
+        with open(path, "rb") as src, open(tmp, "wb") as dst:
+            shutil.copyfileobj(src, dst, UPLOAD_CHUNK_SIZE)
+        os.replace(tmp, target)
+
+    def put_bytes(self, key: str, data: bytes, content_type: str) -> None:
+        target = self._target(key)
+        tmp = target.with_name(target.name + ".part")
+        tmp.write_bytes(data)
+        os.replace(tmp, target)
+
+    def get_bytes(self, key: str) -> bytes:
+        return (self.root / key).read_bytes()
+
+    def delete(self, key: str) -> None:
+        self._target(key).unlink(missing_ok=True)
+
+
+class MemoryBackend(StorageBackend):
+    """In-process store for offline tests; can simulate latency and transient faults."""
+
+    name = "memory"
+
+    def __init__(self, latency: float = 0.0, failure_rate: float = 0.0, seed: Optional[int] = None):
+        self.objects: Dict[str, bytes] = {}
+        self.content_types: Dict[str, str] = {}
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.attempts = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def _simulate(self) -> None:
+        with self._lock:
+            self.attempts += 1
+            fail = self._rng.random() < self.failure_rate
+        if self.latency:
+            time.sleep(self.latency)
+        if fail:
+            raise TransientStorageError("simulated transient failure")
+
+    def put_file(self, key: str, path: Path, content_type: str) -> None:
+        self._simulate()
+        chunks = []
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(UPLOAD_CHUNK_SIZE), b""):
+                chunks.append(chunk)
+        with self._lock:
+            self.objects[key] = b"".join(chunks)
+            self.content_types[key] = content_type
+
+    def put_bytes(self, key: str, data: bytes, content_type: str) -> None:
+        self._simulate()
+        with self._lock:
+            self.objects[key] = bytes(data)
+            self.content_types[key] = content_type
+
+    def get_bytes(self, key: str) -> bytes:
+        return self.objects[key]
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self.objects.pop(key, None)
+            self.content_types.pop(key, None)
+
+
+class UploadManager:
+    """Run a run's artifact uploads concurrently, with retries and backoff.
+
+    Uploads are submitted as they become available and run on a thread pool
+    over a single backend client; ``wait()`` blocks until all are done and
+    raises ``UploadError`` if any failed after ``retries`` attempts. With
+    ``only``, files of other names are not uploaded (e.g. because they travel
+    inside the run bundle).
+    """
+
+    def __init__(self, backend: Optional[StorageBackend], max_workers: int = 8, retries: int = 4,
+                 backoff: float = 0.5, max_backoff: float = 8.0, only: Optional[Collection[str]] = None):
+        self.backend = backend
+        self.only = set(only) if only is not None else None
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="upload") if backend else None
+        self._futures: List[tuple[str, Future]] = []
+        self.timings: Dict[str, float] = {}
+
+    def _with_retries(self, key: str, fn, *args) -> None:
+        start = time.perf_counter()
+        for attempt in range(1, self.retries + 1):
+            try:
+                fn(key, *args)
+                break
+            except Exception as e:
+                if attempt == self.retries or not self.backend.is_transient(e):
+                    raise
+                delay = min(self.backoff * 2 ** (attempt - 1), self.max_backoff)
+                time.sleep(delay * (0.5 + random.random() / 2))  # jittered exponential backoff
+        self.timings[key] = round(time.perf_counter() - start, 4)
+
+    def _skip(self, filename: str) -> bool:
+        return self._pool is None or (self.only is not None and filename not in self.only)
+
+    def submit_file(self, run_id: str, filename: str, path: Path) -> None:
+        if self._skip(filename):
+            return
+        key = f"runs/{run_id}/{filename}"
+        self._futures.append((key, self._pool.submit(
+            self._with_retries, key, self.backend.put_file, Path(path), content_type_for(filename)
+        )))
+
+    def submit_bytes(self, run_id: str, filename: str, data: bytes | str) -> None:
+        if self._skip(filename):
+            return
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+        key = f"runs/{run_id}/{filename}"
+        self._futures.append((key, self._pool.submit(
+            self._with_retries, key, self.backend.put_bytes, data, content_type_for(filename)
+        )))
+
+    def flush(self) -> List[str]:
+        """Block until the uploads submitted so far finished; the manager stays usable."""
+        if self._pool is None:
+            return []
+        failures = {}
+        for key, fut in self._futures:
+            exc = fut.exception()
+            if exc is not None:
+                failures[key] = exc
+        if failures:
+            raise UploadError(failures)
+        return [key for key, _ in self._futures]
+
+    def wait(self) -> List[str]:
+        """Block until every submitted upload finished; return the uploaded keys."""
+        if self._pool is None:
+            print("No Azure Blob connection. Skipping upload.")
+            return []
+        try:
+            return self.flush()
+        finally:
+            self._pool.shutdown(wait=True)
+
+    def __enter__(self) -> "UploadManager":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
@@ -0,0 +1,173 @@
+from __future__ import annotations
+import hashlib
+from pathlib import Path
+from typing import Dict, Any, Tuple
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from sklearn.linear_model import SGDClassifier
+from pipeline.encoding import CategoricalEncoder
+from pipeline.evaluation import DEFAULT_BOOTSTRAP, evaluate_scores
+from pipeline.ingestion import iter_csv_chunks, DEFAULT_CHUNKSIZE
+from pipeline.transform import basic_clean, make_binary_target, TARGET_COL
+
+HASH_BUCKETS = 10_000
+# Encoded training rows held back and mixed across chunks before partial_fit.
+DEFAULT_SHUFFLE_BUFFER = 100_000
+
+
+def hash_split_mask(chunk: pd.DataFrame, test_size: float, salt: int = 42) -> np.ndarray:
+    """Boolean mask of held-out rows, assigned by hashing each row's content.
+
+    The assignment depends only on the row values (and ``salt``), so it is
+    stable across chunk boundaries, epochs and re-runs, and duplicate rows
+    always land on the same side of the split.
+    """
+    h = pd.util.hash_pandas_object(chunk, index=False, hash_key=f"{salt:016d}").to_numpy()
+    return (h % HASH_BUCKETS) < int(test_size * HASH_BUCKETS)
+
+
+def _clean_chunk(chunk: pd.DataFrame) -> Tuple[pd.DataFrame, pd.Series]:
+    # Duplicates are only dropped within a chunk; a global pass would need
+    # memory proportional to the dataset.
+    chunk = basic_clean(chunk)
+    return chunk.drop(columns=[TARGET_COL]), make_binary_target(chunk, TARGET_COL)
+
+
+class ShuffleBuffer:
+    """Bounded pool of encoded training rows that emits them in random order.
+
+    Each ``add`` joins a chunk to the pool and returns a random sample of
+    it, leaving ``capacity`` rows behind; ``flush`` returns the rest. A row
+    can thus be emitted next to rows from any chunk still pooled, so an
+    extract ordered by target is mixed across up to ``capacity`` rows
+    instead of only within a chunk. Ordering over longer stretches than
+    that still reaches the learner.
+    """
+
+    def __init__(self, capacity: int, rng: np.random.Generator):
+        self.capacity = capacity
+        self.rng = rng
+        self.X: sparse.csr_matrix | None = None
+        self.y = np.empty(0, dtype=np.int64)
+
+    def add(self, X, y: np.ndarray) -> Tuple[sparse.csr_matrix, np.ndarray] | None:
+        self.X = X if self.X is None else sparse.vstack([self.X, X], format="csr")
+        self.y = np.concatenate([self.y, y])
+        excess = len(self.y) - self.capacity
+        if excess <= 0:
+            return None
+        order = self.rng.permutation(len(self.y))
+        out, keep = order[:excess], order[excess:]
+        emitted = self.X[out], self.y[out]
+        self.X, self.y = self.X[keep], self.y[keep]
+        return emitted
+
+    def flush(self) -> Tuple[sparse.csr_matrix, np.ndarray] | None:
+        if self.X is None or not len(self.y):
+            return None
+        order = self.rng.permutation(len(self.y))
+        emitted = self.X[order], self.y[order]
+        self.X, self.y = None, np.empty(0, dtype=np.int64)
+        return emitted
+
+
+def scan_dataset(csv_path: Path, chunksize: int = DEFAULT_CHUNKSIZE) -> Tuple[CategoricalEncoder, Dict[str, Any]]:
+    """First pass: fit the encoder chunk by chunk, profile and fingerprint the file.
+
+    Returns the encoder and dataset metadata in the same shape as
+    ``main.gather_metadata``.
+    """
+    from pipeline.dataprofile import DatasetProfile
+
+    hasher = hashlib.sha256()
+    encoder = CategoricalEncoder()
+    profile = DatasetProfile()
+    rows = 0
+    columns, schema = [], {}
+    for chunk in iter_csv_chunks(csv_path, chunksize, hasher=hasher):
+        if not columns:
+            columns = list(chunk.columns)
+            schema = {col: str(dtype) for col, dtype in chunk.dtypes.items()}
+        rows += len(chunk)
+        encoder.partial_fit(chunk.drop(columns=[TARGET_COL]), scale_numeric=True)
+        profile.merge(DatasetProfile().update(chunk))
+    return encoder, {
+        "dataset_path": str(csv_path),
+        "dataset_sha256": hasher.hexdigest(),
+        "file_size_bytes": csv_path.stat().st_size,
+        "rows": rows,
+        "columns": columns,
+        "schema": schema,
+        "profile": profile.summary(),
+    }
+
+
+def train_streaming(
+    csv_path: Path,
+    encoder: CategoricalEncoder,
+    chunksize: int = DEFAULT_CHUNKSIZE,
+    epochs: int = 1,
+    test_size: float = 0.2,
+    random_state: int = 42,
+    alpha: float = 1e-4,
+    n_bootstrap: int = DEFAULT_BOOTSTRAP,
+    eval_workers: int = 1,
+    shuffle_buffer: int = DEFAULT_SHUFFLE_BUFFER,
+) -> Tuple[SGDClassifier, Dict[str, Any], Dict[str, Any]]:
+    """Fit a logistic SGD classifier with partial_fit over CSV chunks.
+
+    Memory is bounded by ``chunksize`` plus ``shuffle_buffer`` encoded rows:
+    each chunk is cleaned, encoded with the fixed encoder layout and split by
+    row hash, and its training rows go through a ``ShuffleBuffer`` before
+    ``partial_fit``. SGD is sensitive to row order, so a file ordered over
+    more than ``shuffle_buffer`` rows (e.g. a large extract sorted by target)
+    still fits worse than a shuffled one. Held-out rows are scored in a
+    final pass; only their probabilities and labels are kept for the
+    evaluation. Returns ``(model, metrics, transform_meta)``.
+    """
+    model = SGDClassifier(loss="log_loss", alpha=alpha, average=True, random_state=random_state)
+    classes = np.array([0, 1])
+    rng = np.random.default_rng(random_state)
+    rows_after_clean = train_size = test_size_rows = 0
+    for epoch in range(epochs):
+        buffer = ShuffleBuffer(shuffle_buffer, rng)
+        for chunk in iter_csv_chunks(csv_path, chunksize):
+            X_df, y = _clean_chunk(chunk)
+            held_out = hash_split_mask(X_df.assign(**{TARGET_COL: y}), test_size, random_state)
+            train_idx = np.flatnonzero(~held_out)
+            if epoch == 0:
+                rows_after_clean += len(X_df)
+                train_size += len(train_idx)
+                test_size_rows += int(held_out.sum())
+            if len(train_idx):
+                batch = buffer.add(encoder.transform(X_df.iloc[train_idx]), y.to_numpy()[train_idx])
+                if batch is not None:
+                    model.partial_fit(*batch, classes=classes)
+        batch = buffer.flush()
+        if batch is not None:
+            model.partial_fit(*batch, classes=classes)
+
+    probas, labels = [], []
+    for chunk in iter_csv_chunks(csv_path, chunksize):
+        X_df, y = _clean_chunk(chunk)
+        held_out = hash_split_mask(X_df.assign(**{TARGET_COL: y}), test_size, random_state)
+        if held_out.any():
+            probas.append(model.predict_proba(encoder.transform(X_df[held_out]))[:, 1])
+            labels.append(y.to_numpy()[held_out])
+
+    if probas:
+        proba, y_test = np.concatenate(probas), np.concatenate(labels)
+        metrics = evaluate_scores(y_test, proba, n_bootstrap=n_bootstrap, workers=eval_workers)
+    else:
+        metrics = {"metric": "accuracy", "value": None}
+    transform_meta = {
+        "rows_after_clean": rows_after_clean,
+        "feature_count": encoder.n_features,
+        "train_size": train_size,
+        "test_size": test_size_rows,
+        "dedup": "per-chunk",
+        "split": "row-hash",
+        "shuffle_buffer": shuffle_buffer,
+    }
+    return model, metrics, transform_meta
@@ -0,0 +1,169 @@
+from __future__ import annotations
+import argparse, time
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+import numpy as np
+import pandas as pd
+from pipeline.ingestion import CATEGORICAL_COLUMNS, INTEGER_COLUMNS
+from pipeline.transform import TARGET_COL
+
+# Numeric columns with many distinct values get relative noise on top of the
+# resampled value, so large outputs are not just repeats of the source values.
+JITTER_COLUMNS = {"balance": 0.05, "duration": 0.05}
+DEFAULT_CHUNK_ROWS = 500_000
+
+
+def fit_profile(df: pd.DataFrame) -> Dict[str, Any]:
+    """Class-conditional marginals of a bank-schema frame.
+
+    For each target class: its prior, the category frequencies of every
+    categorical column and the observed values of every integer column.
+    Sampling columns independently given the class keeps each column's
+    distribution and the label signal, but not cross-column correlations.
+    """
+    columns = list(df.columns)
+    classes = {}
+    for label, part in df.groupby(TARGET_COL, observed=True):
+        cats = {}
+        for c in columns:
+            if c == TARGET_COL or c not in CATEGORICAL_COLUMNS:
+                continue
+            freq = part[c].astype(str).value_counts(normalize=True)
+            cats[c] = (freq.index.to_numpy(dtype=object), freq.to_numpy())
+        nums = {c: part[c].to_numpy() for c in columns if c in INTEGER_COLUMNS}
+        classes[str(label)] = {"prior": len(part) / len(df), "categorical": cats, "numeric": nums}
+    return {"columns": columns, "classes": classes}
+
+
+def _sample_class(cls: Dict[str, Any], n: int, rng: np.random.Generator) -> Dict[str, np.ndarray]:
+    out = {}
+    for c, (levels, p) in cls["categorical"].items():
+        out[c] = rng.choice(levels, size=n, p=p)
+    for c, values in cls["numeric"].items():
+        v = rng.choice(values, size=n)
+        if c in JITTER_COLUMNS:
+            noise = rng.normal(0.0, JITTER_COLUMNS[c], size=n)
+            info = np.iinfo(INTEGER_COLUMNS[c])
+            v = np.clip(np.rint(v * (1.0 + noise)), info.min, info.max)
+        out[c] = v.astype(np.int64)
+    return out
+
+
+def generate_chunk(
+    profile: Dict[str, Any],
+    n: int,
+    rng: np.random.Generator,
+    duplicate_fraction: float = 0.0,
+    rare_fraction: float = 0.0,
+    rare_levels: int = 50,
+    pool: Optional[pd.DataFrame] = None,
+) -> pd.DataFrame:
+    """Sample ``n`` rows; optionally overwrite some with duplicates and rare categories.
+
+    Duplicates copy rows of this chunk or of ``pool`` (the tail of the
+    previous chunk), so both within- and cross-chunk duplicates occur. Rare
+    rows get one categorical value replaced by ``<column>_rare_<k>`` with a
+    Zipf-like ``k`` below ``rare_levels``, i.e. levels unseen in the source.
+    """
+    labels = list(profile["classes"])
+    priors = np.array([profile["classes"][l]["prior"] for l in labels])
+    y = rng.choice(len(labels), size=n, p=priors / priors.sum())
+    parts = []
+    for i, label in enumerate(labels):
+        idx = np.flatnonzero(y == i)
+        if not len(idx):
+            continue
+        sampled = _sample_class(profile["classes"][label], len(idx), rng)
+        sampled[TARGET_COL] = np.full(len(idx), label, dtype=object)
+        parts.append(pd.DataFrame(sampled, index=idx))
+    chunk = pd.concat(parts).sort_index()[profile["columns"]]
+
+    n_rare = int(round(n * rare_fraction))
+    if n_rare:
+        cat_cols = [c for c in profile["columns"] if c in CATEGORICAL_COLUMNS and c != TARGET_COL]
+        rows = rng.choice(n, size=n_rare, replace=False)
+        cols = rng.choice(len(cat_cols), size=n_rare)
+        ks = np.minimum(rng.zipf(1.5, size=n_rare) - 1, rare_levels - 1)
+        for j, c in enumerate(cat_cols):
+            hit = cols == j
+            if hit.any():
+                chunk[c] = chunk[c].astype(object)
+                chunk.iloc[rows[hit], chunk.columns.get_loc(c)] = [f"{c}_rare_{k}" for k in ks[hit]]
+
+    n_dup = int(round(n * duplicate_fraction))
+    if n_dup:
+        source = chunk if pool is None or pool.empty else pd.concat([pool, chunk], ignore_index=True)
+        targets = rng.choice(n, size=n_dup, replace=False)
+        origins = rng.choice(len(source), size=n_dup)
+        chunk.iloc[targets] = source.iloc[origins].to_numpy()
+    return chunk
+
+
+def generate_csv(
+    out_path: Path,
+    rows: int,
+    source: Path,
+    seed: int = 0,
+    duplicate_fraction: float = 0.02,
+    rare_fraction: float = 0.001,
+    rare_levels: int = 50,
+    chunk_rows: int = DEFAULT_CHUNK_ROWS,
+) -> Dict[str, Any]:
+    """Write a synthetic bank-schema CSV of ``rows`` rows, fitted on ``source``.
+
+    Rows are generated and appended chunk by chunk, so memory stays bounded
+    by ``chunk_rows`` whatever the output size. The same arguments and seed
+    always produce the same file.
+    """
+    start = time.perf_counter()
+    profile = fit_profile(pd.read_csv(source))
+    rng = np.random.default_rng(seed)
+    out_path = Path(out_path)
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = out_path.with_name(out_path.name + ".part")
+    written, pool = 0, None
+    with tmp.open("w", encoding="utf-8", newline="") as f:
+        while written < rows:
+            n = min(chunk_rows, rows - written)
+            chunk = generate_chunk(profile, n, rng, duplicate_fraction, rare_fraction, rare_levels, pool)
+            chunk.to_csv(f, header=written == 0, index=False)
+            pool = chunk.tail(min(len(chunk), 10_000))
+            written += n
+    tmp.replace(out_path)
+    return {
+        "path": str(out_path),
+        "rows": rows,
+        "seed": seed,
+        "source": str(source),
+        "duplicate_fraction": duplicate_fraction,
+        "rare_fraction": rare_fraction,
+        "rare_levels": rare_levels,
+        "file_size_bytes": out_path.stat().st_size,
+        "seconds": round(time.perf_counter() - start, 3),
+    }
+
+
+def dataset_name(rows: int, seed: int, duplicate_fraction: float, rare_fraction: float) -> str:
+    """File name encoding the generator arguments, so datasets can be reused."""
+    return f"bank_{rows}_s{seed}_d{duplicate_fraction:g}_r{rare_fraction:g}.csv"
+
+
+def main(argv: Optional[List[str]] = None):
+    ap = argparse.ArgumentParser(description="Generate a synthetic bank-schema CSV")
+    ap.add_argument("--rows", type=int, required=True, help="Number of rows to generate")
+    ap.add_argument("--out", type=str, default=None, help="Output CSV (default: data/synthetic/<name>.csv)")
+    ap.add_argument("--source", type=str, default="data/bank.csv", help="Dataset whose distributions are imitated")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--duplicates", type=float, default=0.02, help="Fraction of rows that duplicate another row")
+    ap.add_argument("--rare", type=float, default=0.001, help="Fraction of rows carrying an unseen rare category")
+    ap.add_argument("--rare-levels", type=int, default=50, help="Distinct rare levels per column")
+    ap.add_argument("--chunk-rows", type=int, default=DEFAULT_CHUNK_ROWS, help="Rows generated per chunk")
+    args = ap.parse_args(argv)
+    out = Path(args.out) if args.out else Path("data/synthetic") / dataset_name(args.rows, args.seed, args.duplicates, args.rare)
+    meta = generate_csv(out, args.rows, Path(args.source), args.seed, args.duplicates, args.rare,
+                        args.rare_levels, args.chunk_rows)
+    print(f"Wrote {meta['rows']} rows to {meta['path']} ({meta['file_size_bytes'] / 1e6:.1f} MB) in {meta['seconds']}s")
+
+
+if __name__ == "__main__":
+    main()
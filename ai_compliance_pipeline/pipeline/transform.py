@@ -1,7 +1,10 @@
 import pandas as pd
-from sklearn.model_selection import train_test_split
+from scipy import sparse
+from pipeline.encoding import CategoricalEncoder
 
 TARGET_COL = "deposit"
+# Bump whenever basic_clean/prepare_features change output, to invalidate cached features.
+TRANSFORM_VERSION = "2"
 
 def basic_clean(df: pd.DataFrame) -> pd.DataFrame:
     return df.drop_duplicates().reset_index(drop=True)
@@ -11,11 +14,17 @@ def make_binary_target(df: pd.DataFrame, target_col: str = TARGET_COL) -> pd.Ser
         raise ValueError(f"Expected target column '{target_col}' in dataset.")
     return (df[target_col].astype(str).str.lower() == "yes").astype(int)
 
-def prepare_features(df: pd.DataFrame) -> tuple[pd.DataFrame, pd.Series]:
+def prepare_features(
+    df: pd.DataFrame, encoder: CategoricalEncoder | None = None
+) -> tuple[sparse.csr_matrix, pd.Series, CategoricalEncoder]:
+    """Encode features into a CSR matrix; fits a new encoder unless one is given."""
     y = make_binary_target(df, TARGET_COL)
     X = df.drop(columns=[TARGET_COL])
-    X = pd.get_dummies(X, drop_first=True).fillna(0)
-    return X, y
+    if encoder is None:
+        encoder = CategoricalEncoder().fit(X)
+    return encoder.transform(X), y, encoder
 
 def train_test_split_simple(X, y, test_size: float = 0.2, random_state: int = 42):
+    from sklearn.model_selection import train_test_split  # deferred: sklearn import is slow
+
     return train_test_split(X, y, test_size=test_size, random_state=random_state, stratify=y)
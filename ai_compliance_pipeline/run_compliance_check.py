@@ -1,29 +1,41 @@
-
-import sys
+import argparse
 import os
 import json
 from pathlib import Path
+from pipeline.bundle import BUNDLE_FILENAME, write_bundle
 from pipeline.checks import run_checks, write_findings
+from pipeline.catalog import RunCatalog
 
 def get_latest_run_dir(runs_root):
     runs = [d for d in os.listdir(runs_root) if os.path.isdir(os.path.join(runs_root, d))]
     if not runs:
         raise FileNotFoundError("No runs found in artifacts/runs.")
-    
+
     runs.sort(key=lambda d: os.path.getctime(os.path.join(runs_root, d)), reverse=True)
     return runs[0]
 
-def main():
-    runs_root = os.path.join(os.path.dirname(__file__), "artifacts", "runs")
-    run_id = None
-    
-    for i, arg in enumerate(sys.argv):
-        if arg == "--run_id" and i + 1 < len(sys.argv):
-            run_id = sys.argv[i + 1]
-            break
-    if not run_id:
-        print("No run_id provided. Using latest run.")
-        run_id = get_latest_run_dir(runs_root)
+def upload_findings(run_ids, runs_root):
+    """Upload compliance artefacts for the given runs in one concurrent batch.
+
+    A run with a bundle is uploaded as that single object; older runs
+    without one get their findings files uploaded individually.
+    """
+    try:
+        from pipeline.compliance import default_backend
+        from pipeline.storage import UploadManager
+        uploads = UploadManager(default_backend())
+        for run_id in run_ids:
+            run_dir = Path(runs_root) / run_id
+            names = [BUNDLE_FILENAME] if (run_dir / BUNDLE_FILENAME).exists() else ["compliance_findings.json", "compliance_summary.txt"]
+            for fname in names:
+                if (run_dir / fname).exists():
+                    uploads.submit_file(run_id, fname, run_dir / fname)
+        if uploads.wait():
+            print("Uploaded updated compliance artefacts to Azure Blob Storage.")
+    except Exception as e:
+        print(f"[WARN] Could not upload to Azure Blob Storage: {e}")
+
+def check_one(runs_root, run_id):
     run_dir = os.path.join(runs_root, run_id)
     metadata_path = os.path.join(run_dir, "metadata.json")
     if not os.path.exists(metadata_path):
@@ -31,22 +43,79 @@ def main():
     with open(metadata_path, "r", encoding="utf-8") as f:
         metadata = json.load(f)
     findings = run_checks(metadata, Path(run_dir))
-    write_findings(Path(run_dir), findings)
-
-    
-    try:
-        from pipeline.compliance import upload_to_blob
-        compliance_findings_path = Path(run_dir) / "compliance_findings.json"
-        compliance_summary_path = Path(run_dir) / "compliance_summary.txt"
-        if compliance_findings_path.exists():
-            upload_to_blob(run_id, "compliance_findings.json", compliance_findings_path.read_text())
-        if compliance_summary_path.exists():
-            upload_to_blob(run_id, "compliance_summary.txt", compliance_summary_path.read_text())
-        print("Uploaded updated compliance artefacts to Azure Blob Storage.")
-    except Exception as e:
-        print(f"[WARN] Could not upload to Azure Blob Storage: {e}")
+    status = write_findings(Path(run_dir), findings)
+    metadata["compliance"] = {
+        "status": status,
+        "blockers": [f.id for f in findings if f.severity == "BLOCKER" and not f.passed],
+        "warnings": [f.id for f in findings if f.severity == "WARN" and not f.passed],
+    }
+    RunCatalog(Path(runs_root).parent / "catalog.sqlite").upsert(metadata)
+    write_bundle(Path(run_dir))
 
+    upload_findings([run_id], runs_root)
     print(f"Compliance check complete for run {run_id}. Findings written.")
 
+def check_many(runs_root, args):
+    """Re-check many runs in parallel, skipping runs that have not changed."""
+    from pipeline.recheck import bulk_recheck, verdict_changes
+    from pipeline.compliance import write_json, utc_now_iso
+
+    artifacts = Path(runs_root).parent
+    catalog = RunCatalog(artifacts / "catalog.sqlite")
+    if args.since:
+        if catalog.count() == 0:
+            catalog.rebuild_from_log(artifacts / "run_log")
+        run_ids = sorted(catalog.run_ids(since=args.since))
+    else:
+        run_ids = sorted(d for d in os.listdir(runs_root) if os.path.isdir(os.path.join(runs_root, d)))
+
+    results = bulk_recheck(Path(runs_root), run_ids, artifacts / "recheck_state.json",
+                           workers=args.workers, force=args.force)
+    evaluated = [r for r in results if not r["skipped"] and r["status"] != "ERROR"]
+    catalog.upsert_many(r["record"] for r in evaluated)
+    changed = [r["run_id"] for r in evaluated if r["changed"]]
+    if changed:
+        upload_findings(changed, runs_root)
+
+    summary = {
+        "timestamp_utc": utc_now_iso(),
+        "since": args.since,
+        "runs": len(results),
+        "evaluated": len(evaluated),
+        "skipped": sum(r["skipped"] for r in results),
+        "errors": [r for r in results if r["status"] == "ERROR"],
+        "findings_changed": changed,
+        "verdict_changes": verdict_changes(results),
+        "results": [{k: v for k, v in r.items() if k != "record"} for r in results],
+    }
+    write_json(artifacts / "compliance_recheck.json", summary)
+
+    print(f"Re-checked {summary['evaluated']} of {summary['runs']} runs "
+          f"({summary['skipped']} unchanged, {len(summary['errors'])} errors).")
+    print(f"{'Verdict change':<20} {'Runs':>6}")
+    for transition, count in summary["verdict_changes"].items():
+        print(f"{transition:<20} {count:>6}")
+    print(f"Aggregated results: {artifacts / 'compliance_recheck.json'}")
+
+def main():
+    ap = argparse.ArgumentParser(description="Re-run compliance checks for one run or many")
+    ap.add_argument("--run_id", type=str, default=None, help="Run to check (default: latest run)")
+    ap.add_argument("--all", action="store_true", help="Re-check every run under artifacts/runs")
+    ap.add_argument("--since", type=str, default=None, help="Re-check runs with timestamp_utc >= this ISO timestamp")
+    ap.add_argument("--workers", type=int, default=None, help="Worker processes for --all/--since")
+    ap.add_argument("--force", action="store_true", help="Ignore the re-check state and evaluate every selected run")
+    args = ap.parse_args()
+
+    runs_root = os.path.join(os.path.dirname(os.path.abspath(__file__)), "artifacts", "runs")
+    if args.all or args.since:
+        check_many(runs_root, args)
+        return
+
+    run_id = args.run_id
+    if not run_id:
+        print("No run_id provided. Using latest run.")
+        run_id = get_latest_run_dir(runs_root)
+    check_one(runs_root, run_id)
+
 if __name__ == "__main__":
     main()
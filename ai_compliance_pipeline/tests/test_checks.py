@@ -0,0 +1,49 @@
+import os
+
+import pipeline.hashing as hashing
+from pipeline.checks import CHECKS
+from pipeline.hashing import HashManifest, sha256_of_file
+
+ARTIFACT_CHECK = CHECKS["CHECK-008"].fn
+CARD_CHECK = CHECKS["CHECK-007"].fn
+
+
+def _run_dir(tmp_path):
+    for name, body in [("model.joblib", b"model"), ("encoder.json", b"{}"), ("model_card.md", b"# Model Card\n")]:
+        (tmp_path / name).write_bytes(body)
+    manifest = HashManifest.for_run(tmp_path)
+    hashes = manifest.hash_many([tmp_path / "model.joblib", tmp_path / "encoder.json"])
+    manifest.save()
+    return {"artifact_hashes": hashes, "model_card_hash": sha256_of_file(tmp_path / "model_card.md")}
+
+
+def _rewrite_keeping_stat(path, body):
+    st = path.stat()
+    path.write_bytes(body)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns))
+
+
+def test_runs_without_recorded_artifact_hashes_pass(tmp_path):
+    _run_dir(tmp_path)
+    assert ARTIFACT_CHECK({"run_id": "legacy"}, tmp_path)
+
+
+def test_artifact_check_reuses_manifest_hashes(tmp_path, monkeypatch):
+    meta = _run_dir(tmp_path)
+    calls = []
+    monkeypatch.setattr(hashing, "sha256_of_file", lambda p: calls.append(p) or sha256_of_file(p))
+
+    assert ARTIFACT_CHECK(meta, tmp_path)
+    assert calls == []
+
+    (tmp_path / "encoder.json").write_bytes(b'{"changed": true}')
+    assert not ARTIFACT_CHECK(meta, tmp_path)
+    assert [p.name for p in calls] == ["encoder.json"]
+
+
+def test_card_check_reads_every_byte(tmp_path):
+    meta = _run_dir(tmp_path)
+    assert CARD_CHECK(meta, tmp_path)
+
+    _rewrite_keeping_stat(tmp_path / "model_card.md", b"# Model Cart\n")  # same size and mtime
+    assert not CARD_CHECK(meta, tmp_path)
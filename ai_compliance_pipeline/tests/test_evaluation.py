@@ -0,0 +1,70 @@
+import numpy as np
+import pytest
+from sklearn.metrics import (accuracy_score, brier_score_loss, confusion_matrix, f1_score, precision_score,
+                             recall_score, roc_auc_score)
+
+from pipeline.evaluation import (BOOTSTRAP_METRICS, _Prepared, _resample_counts, _weighted_metrics,
+                                 bootstrap_replicates, evaluate_scores)
+
+THRESHOLD = 0.5
+
+
+def _scores(seed: int, n: int = 400):
+    rng = np.random.default_rng(seed)
+    y = rng.integers(0, 2, n)
+    # Rounded so ROC-AUC has ties and some scores sit exactly on the threshold.
+    proba = np.round(np.clip(0.35 * y + rng.random(n) * 0.65, 0, 1), 2)
+    return y, proba
+
+
+def _sklearn_metrics(y, p):
+    pred = (p > THRESHOLD).astype(int)
+    both = len(np.unique(y)) == 2
+    return {
+        "accuracy": accuracy_score(y, pred),
+        "precision": precision_score(y, pred, zero_division=np.nan),
+        "recall": recall_score(y, pred, zero_division=np.nan),
+        "f1": f1_score(y, pred, zero_division=np.nan),
+        "roc_auc": roc_auc_score(y, p) if both else np.nan,
+        "brier": brier_score_loss(y, p) if both else np.mean((p - y) ** 2),
+    }
+
+
+@pytest.mark.parametrize("seed", [0, 1, 7])
+def test_point_estimate_matches_sklearn(seed):
+    y, proba = _scores(seed)
+
+    metrics = evaluate_scores(y, proba, threshold=THRESHOLD, n_bootstrap=0)
+
+    expected = _sklearn_metrics(y, proba)
+    for m in BOOTSTRAP_METRICS:
+        got = metrics["value"] if m == "accuracy" else metrics[m]
+        assert got == pytest.approx(expected[m], abs=1e-12), m
+    tn, fp, fn, tp = confusion_matrix(y, (proba > THRESHOLD).astype(int), labels=[0, 1]).ravel()
+    assert metrics["confusion_matrix"] == {"tn": tn, "fp": fp, "fn": fn, "tp": tp}
+
+
+@pytest.mark.parametrize("seed", [0, 3])
+def test_weighted_resamples_match_sklearn_on_expanded_copies(seed):
+    y, proba = _scores(seed, n=120)
+    prep = _Prepared(y, proba, THRESHOLD)
+    W = _resample_counts(np.random.default_rng(seed), prep.n, 20)
+
+    engine = _weighted_metrics(prep, W)
+
+    for r in range(len(W)):
+        idx = np.repeat(np.arange(prep.n), W[r].astype(int))
+        expected = _sklearn_metrics(prep.y[idx].astype(int), prep.p[idx])
+        for m in BOOTSTRAP_METRICS:
+            assert engine[m][r] == pytest.approx(expected[m], abs=1e-9, nan_ok=True), (r, m)
+
+
+def test_bootstrap_does_not_depend_on_workers():
+    y, proba = _scores(5)
+    prep = _Prepared(y, proba, THRESHOLD)
+
+    serial = bootstrap_replicates(prep, 50, seed=11, workers=1, block_size=8)
+    threaded = bootstrap_replicates(prep, 50, seed=11, workers=4, block_size=8)
+
+    for m in BOOTSTRAP_METRICS:
+        np.testing.assert_array_equal(serial[m], threaded[m])
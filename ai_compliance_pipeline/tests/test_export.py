@@ -0,0 +1,40 @@
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.linear_model import LogisticRegression, SGDClassifier
+
+from pipeline.encoding import CategoricalEncoder
+from pipeline.export import LinearScorer, export_linear_model, verify_export
+from pipeline.transform import TARGET_COL, basic_clean, make_binary_target
+
+BANK_CSV = Path(__file__).resolve().parent.parent / "data" / "bank.csv"
+
+
+@pytest.fixture(scope="module")
+def bank():
+    df = basic_clean(pd.read_csv(BANK_CSV).iloc[::20])  # the file is sorted by target
+    features = df.drop(columns=[TARGET_COL])
+    # Standardized numeric columns, so both learners converge and the scaling is exported too.
+    encoder = CategoricalEncoder().partial_fit(features, scale_numeric=True)
+    return features, encoder.transform(features), make_binary_target(df), encoder
+
+
+@pytest.mark.parametrize("model", [
+    LogisticRegression(max_iter=1000),
+    SGDClassifier(loss="log_loss", average=True, random_state=0),
+], ids=["logreg", "sgd"])
+def test_exported_model_reproduces_predict_proba(tmp_path, bank, model):
+    features, X, y, encoder = bank
+    model.fit(X, y)
+    path = tmp_path / "model.lrm"
+
+    export_linear_model(model, encoder, path)
+    scorer = LinearScorer.load(path)
+
+    expected = model.predict_proba(X)
+    assert scorer.verify_payload()
+    np.testing.assert_allclose(scorer.predict_proba(X), expected, rtol=0, atol=1e-9)
+    np.testing.assert_allclose(scorer.predict_rows(features.to_dict("records")), expected[:, 1], rtol=0, atol=1e-9)
+    assert verify_export(model, encoder, scorer, X)["passed"]
@@ -0,0 +1,51 @@
+import hashlib
+from pathlib import Path
+from types import SimpleNamespace
+
+from pipeline.incremental import ChainHasher, read_appended
+
+BANK_CSV = Path(__file__).resolve().parent.parent / "data" / "bank.csv"
+BLOCK = 4096  # small blocks so the sample spans many of them
+
+
+def _split_bank(rows: int = 2000, appended: int = 50):
+    header, *lines = BANK_CSV.read_bytes().splitlines(keepends=True)
+    return header + b"".join(lines[:rows]), b"".join(lines[rows:rows + appended])
+
+
+def _fingerprint(data: bytes):
+    chain = ChainHasher(BLOCK)
+    chain.update(data)
+    return chain.state()
+
+
+def _base(data: bytes):
+    columns = data.split(b"\n", 1)[0].decode().split(",")
+    return SimpleNamespace(dataset={"columns": columns})
+
+
+def test_clean_append_parses_only_the_new_rows(tmp_path):
+    old, new = _split_bank()
+    path = tmp_path / "bank.csv"
+    path.write_bytes(old + new)
+
+    appended = read_appended(path, _fingerprint(old), _base(old))
+
+    assert appended is not None
+    assert len(appended.rows) == 50
+    assert appended.appended_bytes == len(new)
+    assert appended.sha256 == hashlib.sha256(old + new).hexdigest()
+    assert appended.state["head"] == _fingerprint(old + new)["head"]
+
+
+def test_change_in_a_middle_block_is_not_taken_for_an_append(tmp_path):
+    old, new = _split_bank()
+    prev = _fingerprint(old)
+    assert prev["blocks"] > 4
+    middle = len(old) // 2
+    changed = old[:middle] + old[middle:].replace(b",may,", b",jun,", 1)  # same size, first/last blocks intact
+    assert len(changed) == len(old) and changed != old
+    path = tmp_path / "bank.csv"
+    path.write_bytes(changed + new)
+
+    assert read_appended(path, prev, _base(old)) is None
@@ -0,0 +1,40 @@
+from pathlib import Path
+
+import pandas as pd
+
+from pipeline.ingestion import iter_csv_chunks, load_csv_fingerprinted
+
+BANK_CSV = Path(__file__).resolve().parent.parent / "data" / "bank.csv"
+
+
+def _bank_sample(rows: int = 49) -> pd.DataFrame:
+    return pd.read_csv(BANK_CSV, dtype=str, keep_default_na=False, nrows=rows)
+
+
+def test_blank_and_non_numeric_integer_cells_do_not_fail_the_load(tmp_path):
+    raw = _bank_sample()
+    raw.loc[3, "age"] = ""
+    raw.loc[5, "balance"] = "unknown"
+    path = tmp_path / "bank.csv"
+    raw.to_csv(path, index=False)
+
+    df, _, schema = load_csv_fingerprinted(path, chunksize=10)
+
+    expected = pd.read_csv(path)
+    assert len(df) == len(expected)
+    assert df["age"].isna().sum() == 1
+    assert schema["age"] == "float64"
+    assert schema["balance"] == "object"
+    assert schema["day"] == "int8"  # clean integer columns are still narrowed
+    assert sum(len(chunk) for chunk in iter_csv_chunks(path, chunksize=10)) == len(expected)
+
+
+def test_clean_integer_columns_are_narrowed_to_the_pinned_width(tmp_path):
+    path = tmp_path / "bank.csv"
+    _bank_sample().to_csv(path, index=False)
+
+    _, _, schema = load_csv_fingerprinted(path)
+
+    assert schema["age"] == "int16"
+    assert schema["balance"] == "int32"
+    assert schema["job"] == "category"
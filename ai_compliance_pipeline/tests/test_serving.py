@@ -0,0 +1,21 @@
+import pytest
+
+from pipeline.serving import parse_rows
+
+
+@pytest.mark.parametrize("body", [b"5", b'"age"', b"null", b"[1, 2]", b'{"age": 30}', b'{"rows": 5}', b"{not json"])
+def test_bodies_that_are_not_records_are_rejected(body):
+    with pytest.raises(ValueError):
+        parse_rows(body, "application/json")
+
+
+@pytest.mark.parametrize("body", [b'[{"age": 30, "job": "admin."}]', b'{"rows": [{"age": 30, "job": "admin."}]}',
+                                  b'{"records": [{"age": 30, "job": "admin."}]}'])
+def test_record_bodies_become_a_frame(body):
+    df = parse_rows(body, "application/json")
+    assert df.to_dict("records") == [{"age": 30, "job": "admin."}]
+
+
+def test_empty_body_and_csv():
+    assert parse_rows(b"").empty
+    assert parse_rows(b"age,job\n30,admin.\n", "text/csv").to_dict("records") == [{"age": 30, "job": "admin."}]
@@ -0,0 +1,36 @@
+from pathlib import Path
+
+import numpy as np
+from scipy import sparse
+
+from pipeline.streaming import ShuffleBuffer, scan_dataset, train_streaming
+
+BANK_CSV = Path(__file__).resolve().parent.parent / "data" / "bank.csv"
+
+
+def test_shuffle_buffer_emits_every_row_once_and_keeps_capacity():
+    buffer = ShuffleBuffer(capacity=25, rng=np.random.default_rng(0))
+    emitted = []
+    for start in range(0, 100, 10):
+        ids = np.arange(start, start + 10)
+        batch = buffer.add(sparse.csr_matrix(ids[:, None].astype(float)), ids)
+        if batch is not None:
+            np.testing.assert_array_equal(batch[0].toarray().ravel(), batch[1])
+            emitted.append(batch[1])
+        assert len(buffer.y) <= 25
+    emitted.append(buffer.flush()[1])
+
+    rows = np.concatenate(emitted)
+    assert sorted(rows) == list(range(100))
+    assert not np.array_equal(rows, np.arange(100))
+
+
+def test_small_chunks_of_a_target_sorted_file_fit_like_one_chunk():
+    # bank.csv is sorted by target, so without mixing across chunks SGD sees one class at a time.
+    accuracy = {}
+    for chunksize in (3000, 200_000):
+        encoder, _ = scan_dataset(BANK_CSV, chunksize)
+        _, metrics, _ = train_streaming(BANK_CSV, encoder, chunksize=chunksize, epochs=3, n_bootstrap=0)
+        accuracy[chunksize] = metrics["value"]
+
+    assert accuracy[3000] > accuracy[200_000] - 0.02